@@ -7,6 +7,11 @@ CONTAINS_CONTENT_ITEMS_VIEW_CACHE_TIMEOUT_SECONDS = 60 * 30
 CURATION_CONFIG_READ_ONLY_VIEW_CACHE_TIMEOUT_SECONDS = 60 * 30
 HIGHLIGHT_SET_READ_ONLY_VIEW_CACHE_TIMEOUT_SECONDS = 60 * 30
 
+# Per-view cache keys
+CONTAINS_CONTENT_ITEMS_CACHE_KEY_TPL = (
+    'contains_content_items:{catalog_uuid}:{catalog_query_id}:{version}:{include_restricted}:{content_keys_hash}'
+)
+
 
 class CourseMode():
     """
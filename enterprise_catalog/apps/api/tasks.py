@@ -8,18 +8,21 @@ from collections import defaultdict
 from datetime import datetime, timedelta
 
 from algoliasearch.exceptions import AlgoliaException
-from celery import shared_task, states
+from celery import group, shared_task, states
 from celery.exceptions import Ignore
 from celery_utils.logged_task import LoggedTask
 from django.conf import settings
 from django.db import IntegrityError
-from django.db.models import Prefetch, Q
+from django.db.models import F, Prefetch, Q
 from django.db.utils import OperationalError
 from django_celery_results.models import TaskResult
 from edx_django_utils.monitoring import function_trace
 from requests.exceptions import ConnectionError as RequestsConnectionError
 
 from enterprise_catalog.apps.api_client.discovery import DiscoveryApiClient
+from enterprise_catalog.apps.api_client.discovery_async import (
+    AsyncDiscoveryApiClient,
+)
 from enterprise_catalog.apps.catalog.algolia_utils import (
     ALGOLIA_FIELDS,
     ALGOLIA_JSON_METADATA_MAX_SIZE,
@@ -42,17 +45,22 @@ from enterprise_catalog.apps.catalog.constants import (
     PROGRAM,
     QUERY_FOR_RESTRICTED_RUNS,
     TASK_BATCH_SIZE,
+    TASK_TIMEOUT,
     VIDEO,
     AlgoliaTraceNames,
 )
 from enterprise_catalog.apps.catalog.content_metadata_utils import (
     transform_course_metadata_to_visible,
 )
+from enterprise_catalog.apps.catalog.filters import get_shared_content_filter
 from enterprise_catalog.apps.catalog.models import (
     CatalogQuery,
     ContentMetadata,
+    ContentMetadataChildKey,
+    DiscoverySyncWatermark,
     create_course_associated_programs,
     update_contentmetadata_from_discovery,
+    update_contentmetadata_from_shared_discovery_fetch,
 )
 from enterprise_catalog.apps.catalog.serializers import (
     NormalizedContentMetadataSerializer,
@@ -62,6 +70,7 @@ from enterprise_catalog.apps.catalog.utils import (
     get_content_filter_hash,
     localized_utcnow,
 )
+from enterprise_catalog.apps.catalog.waffle import ASYNC_DISCOVERY_CLIENT_SWITCH
 from enterprise_catalog.apps.video_catalog.models import Video
 
 
@@ -75,6 +84,15 @@ UNREADY_TASK_RETRY_COUNTDOWN_SECONDS = 60 * 5
 EXPLORE_CATALOG_TITLES = ['A la carte', 'Subscription']
 
 
+def _get_discovery_client_for_key_fetches():
+    """
+    Returns the course-discovery client used to fetch courses and programs by key.
+    """
+    if ASYNC_DISCOVERY_CLIENT_SWITCH.is_enabled():
+        return AsyncDiscoveryApiClient()
+    return DiscoveryApiClient()
+
+
 def _fetch_courses_by_keys(course_keys, extra_query_params=None):
     """
     Fetches course data from discovery's /api/v1/courses endpoint for the provided course keys.
@@ -84,7 +102,9 @@ def _fetch_courses_by_keys(course_keys, extra_query_params=None):
     Returns:
         list of dict: Returns a list of dictionaries where each dictionary represents the course data from discovery.
     """
-    return DiscoveryApiClient().fetch_courses_by_keys(course_keys, extra_query_params=extra_query_params)
+    return _get_discovery_client_for_key_fetches().fetch_courses_by_keys(
+        course_keys, extra_query_params=extra_query_params,
+    )
 
 
 def _fetch_programs_by_keys(program_keys):
@@ -96,7 +116,7 @@ def _fetch_programs_by_keys(program_keys):
     Returns:
         list of dict: Returns a list of dictionaries where each dictionary represents the program data from discovery.
     """
-    return DiscoveryApiClient().fetch_programs_by_keys(program_keys)
+    return _get_discovery_client_for_key_fetches().fetch_programs_by_keys(program_keys)
 
 
 def unready_tasks(celery_task, time_delta):
@@ -246,7 +266,9 @@ class LoggedTaskWithRetry(LoggedTask):  # pylint: disable=abstract-method
 
 @shared_task(base=LoggedTaskWithRetry, bind=True, default_retry_delay=UNREADY_TASK_RETRY_COUNTDOWN_SECONDS)
 @expiring_task_semaphore()
-def update_full_content_metadata_task(self, force=False, dry_run=False):  # pylint: disable=unused-argument
+def update_full_content_metadata_task(  # pylint: disable=unused-argument
+    self, force=False, dry_run=False, shard_courses=False,
+):
     """
     Looks up the full metadata from discovery's `/api/v1/courses` and `/api/v1/programs` endpoints to pad all
     ContentMetadata objects. The metadata is merged with the existing contents
@@ -254,10 +276,31 @@ def update_full_content_metadata_task(self, force=False, dry_run=False):  # pyli
 
     Args:
         force (bool): If true, forces execution of task and ignores time since last run.
+        shard_courses (bool): If true, the course keys are split into shards of
+            ``FULL_COURSE_METADATA_UPDATE_SHARD_SIZE`` that are updated in parallel by
+            `update_full_content_metadata_course_shard_task` workers, and this task waits for all of them.
+            Since it blocks on its subtasks, only use this when the task itself runs in-process via `.apply()`.
     """
     logger.info('update_full_content_metadata_task starting full update of courses')
-    content_keys = [metadata.content_key for metadata in ContentMetadata.objects.filter(content_type=COURSE)]
-    _update_full_content_metadata_course(content_keys, dry_run)
+    sync_started = localized_utcnow()
+    course_metadata = ContentMetadata.objects.filter(content_type=COURSE)
+    modified_since = DiscoverySyncWatermark.get_modified_since(DiscoverySyncWatermark.COURSES)
+    if modified_since:
+        # Courses whose /search/all metadata didn't change since their full metadata was fetched don't need
+        # to be re-fetched.
+        course_metadata = course_metadata.filter(
+            Q(full_metadata_fetched__isnull=True) | Q(modified__gt=F('full_metadata_fetched'))
+        )
+        logger.info('update_full_content_metadata_task only updating courses modified since their last update')
+    content_keys = [metadata.content_key for metadata in course_metadata]
+    if shard_courses:
+        _update_full_content_metadata_course_shards(content_keys, dry_run)
+    else:
+        _update_full_content_metadata_course(content_keys, dry_run)
+    if not dry_run:
+        DiscoverySyncWatermark.record_sync(
+            DiscoverySyncWatermark.COURSES, sync_started, is_full_sync=not modified_since,
+        )
     logger.info('update_full_content_metadata_task completed full update of courses')
     logger.info('update_full_content_metadata_task starting full update of programs')
     content_keys = [metadata.content_key for metadata in ContentMetadata.objects.filter(content_type=PROGRAM)]
@@ -265,7 +308,60 @@ def update_full_content_metadata_task(self, force=False, dry_run=False):  # pyli
     logger.info('update_full_content_metadata_task completed full update of programs')
 
 
-def _update_full_content_metadata_course(content_keys, dry_run=False):
+@shared_task(base=LoggedTaskWithRetry, bind=True)
+def update_full_content_metadata_course_shard_task(  # pylint: disable=unused-argument
+    self, content_keys, dry_run=False, course_reviews_by_content_key=None,
+):
+    """
+    Does the full update of the course metadata of one shard of the course keys updated by
+    `update_full_content_metadata_task`: fetches the full course metadata, normalizes it,
+    and bulk updates the course ContentMetadata records.
+
+    Args:
+        content_keys (list of str): The course keys of the shard.
+        course_reviews_by_content_key (dict): The course reviews of the shard's courses by course key,
+            fetched once for all shards. If omitted, every course review is fetched by the shard.
+    """
+    start_time = time.perf_counter()
+    _update_full_content_metadata_course(content_keys, dry_run, course_reviews_by_content_key)
+    logger.info(
+        f'Finished update_full_content_metadata_course_shard_task for {len(content_keys)} courses '
+        f'after update_full_content_metadata_course_shard_task_seconds={time.perf_counter() - start_time} seconds'
+    )
+
+
+def _update_full_content_metadata_course_shards(content_keys, dry_run=False):
+    """
+    Splits ``content_keys`` into shards, and updates the full course metadata of every shard
+    in parallel with a group of `update_full_content_metadata_course_shard_task`, waiting for all of them.
+    Each shard does the same work as `_update_full_content_metadata_course` would for its keys.
+    """
+    shards = list(batch(content_keys, batch_size=settings.FULL_COURSE_METADATA_UPDATE_SHARD_SIZE))
+    logger.info(
+        'update_full_content_metadata_task updating %d courses in %d shards',
+        len(content_keys),
+        len(shards),
+    )
+    # The /course_review endpoint can only be paged through as a whole, so fetch it once for all shards,
+    # and only send each shard the reviews of its own courses.
+    course_reviews_by_content_key = DiscoveryApiClient().get_all_course_reviews() if shards else {}
+    shard_group = group(
+        update_full_content_metadata_course_shard_task.s(
+            shard_content_keys,
+            dry_run=dry_run,
+            course_reviews_by_content_key={
+                content_key: course_reviews_by_content_key[content_key]
+                for content_key in shard_content_keys
+                if content_key in course_reviews_by_content_key
+            },
+        )
+        for shard_content_keys in shards
+    )
+    # This task runs in-process rather than on a worker, so it's safe to wait on its subtasks here.
+    shard_group.apply_async().get(timeout=TASK_TIMEOUT, propagate=True, disable_sync_subtasks=False)
+
+
+def _update_full_content_metadata_course(content_keys, dry_run=False, course_reviews_by_content_key=None):
     """
     Given content_keys, finds the associated ContentMetadata records with a type of course and looks up the full
     course metadata from discovery's /api/v1/courses endpoint to pad the ContentMetadata objects. The course
@@ -275,6 +371,7 @@ def _update_full_content_metadata_course(content_keys, dry_run=False):
         content_keys (list of str): A list of content keys representing ContentMetadata objects that should have their
             metadata updated with the full Course metadata. This list gets filtered down to only those representing
             Course ContentMetadata objects.
+        course_reviews_by_content_key (dict): The course reviews by course key, if they were already fetched.
 
     Returns:
         list of str: Returns the course keys that were updated and should be indexed in Algolia
@@ -282,14 +379,16 @@ def _update_full_content_metadata_course(content_keys, dry_run=False):
             the `EnterpriseCatalogRefreshDataFromDiscovery` view.
     """
     indexable_course_keys = []
+    # The /course_review endpoint can only be paged through as a whole, so fetch it once for all batches.
     for content_keys_batch in batch(content_keys, batch_size=TASK_BATCH_SIZE):
         full_course_dicts = _fetch_courses_by_keys(content_keys_batch)
         if not full_course_dicts:
             logger.info('No courses were retrieved from course-discovery in this batch.')
             continue
 
+        if course_reviews_by_content_key is None:
+            course_reviews_by_content_key = DiscoveryApiClient().get_all_course_reviews()
         fetched_course_keys = [course['key'] for course in full_course_dicts]
-        course_reviews_by_content_key = DiscoveryApiClient().get_course_reviews(fetched_course_keys)
         metadata_by_key = _get_course_records_by_key(fetched_course_keys)
 
         # Iterate through the courses to update the json_metadata field,
@@ -335,6 +434,7 @@ def _update_full_content_metadata_course(content_keys, dry_run=False):
                 ['_json_metadata'],
                 batch_size=10,
             )
+            _record_full_metadata_fetched(modified_content_metadata_records)
 
         logger.info(
             'Successfully updated %d of %d course ContentMetadata records with full metadata from course-discovery.',
@@ -352,6 +452,20 @@ def _update_full_content_metadata_course(content_keys, dry_run=False):
     )
 
 
+def _record_full_metadata_fetched(course_records):
+    """
+    Records that the full metadata of the given course records was fetched, as of the ``modified`` time they
+    were just bulk updated with, unless they've been modified again since.
+    """
+    if not course_records:
+        return
+    last_modified = course_records[0].modified
+    ContentMetadata.objects.filter(
+        id__in=[record.id for record in course_records],
+        modified=last_modified,
+    ).update(full_metadata_fetched=last_modified)
+
+
 def _update_full_restricted_course_metadata(modified_metadata_record, course_review, dry_run):
     """
     For all restricted courses whose parent is ``modified_metadata_record``, does a full
@@ -1363,6 +1477,51 @@ def update_catalog_metadata_task(self, catalog_query_id, force=False, dry_run=Fa
     )
 
 
+@shared_task(base=LoggedTaskWithRetry, bind=True)
+@expiring_task_semaphore()
+def update_catalog_metadata_shared_fetch_task(  # pylint: disable=unused-argument
+    self, catalog_query_ids, force=False, dry_run=False,
+):
+    """
+    Associates ContentMetadata objects with each catalog query of a group planned by
+    ``filters.plan_shared_content_fetches()``, pulling the content of the whole group
+    from /search/all on discovery only once.
+
+    Args:
+        catalog_query_ids (list of int): The ids of the catalog queries to update.
+        force (bool): If true, forces execution of task and ignores time since last run.
+    """
+    start_time = time.perf_counter()
+    catalog_queries = list(CatalogQuery.objects.filter(id__in=catalog_query_ids).order_by('id'))
+    shared_content_filter = get_shared_content_filter(
+        [catalog_query.content_filter for catalog_query in catalog_queries]
+    )
+
+    try:
+        if shared_content_filter is None:
+            # The content filters of the queries have changed since the group was planned.
+            logger.warning(
+                f'Catalog queries {catalog_query_ids} no longer share a content filter structure, '
+                'updating their content metadata individually.'
+            )
+            for catalog_query in catalog_queries:
+                update_contentmetadata_from_discovery(catalog_query, dry_run)
+        else:
+            update_contentmetadata_from_shared_discovery_fetch(shared_content_filter, catalog_queries, dry_run)
+    except Exception as e:
+        logger.exception(
+            f'Something went wrong while updating content metadata from discovery using catalogs: {catalog_query_ids} '
+            'after update_catalog_metadata_shared_fetch_task_seconds='
+            f'{time.perf_counter() - start_time} seconds',
+            exc_info=e,
+        )
+        raise e
+    logger.info(
+        f'Finished update_catalog_metadata_shared_fetch_task for catalogs {catalog_query_ids} '
+        f'after update_catalog_metadata_shared_fetch_task_seconds={time.perf_counter() - start_time} seconds'
+    )
+
+
 @shared_task(base=LoggedTaskWithRetry, bind=True)
 @expiring_task_semaphore()
 def fetch_missing_course_metadata_task(self, force=False, dry_run=False):  # pylint: disable=unused-argument
@@ -1374,25 +1533,8 @@ def fetch_missing_course_metadata_task(self, force=False, dry_run=False):  # pyl
     that are embedded inside a program.
     """
     logger.info('[FETCH_MISSING_METADATA] fetch_missing_course_metadata_task task started.')
-    program_metadata_list = ContentMetadata.objects.filter(
-        content_type=PROGRAM
-    ).values_list(
-        '_json_metadata',
-        flat=True,
-    )
-    course_keys = set()
-    for program_metadata in program_metadata_list:
-        if program_metadata is not None:
-            course_keys.update([item.get('key') for item in program_metadata.get('courses', [])])
-
-    # Check which courses do not have content metadata.
-    present_course_keys = ContentMetadata.objects.filter(
-        content_type=COURSE, content_key__in=course_keys
-    ).values_list(
-        'content_key', flat=True
-    )
-
-    missing_course_keys = course_keys.difference(present_course_keys)
+    # Check which courses of programs do not have content metadata.
+    missing_course_keys = ContentMetadataChildKey.get_missing_child_content_keys(PROGRAM, COURSE)
     if missing_course_keys:
         content_filter = {
             'status': 'published',
@@ -1444,23 +1586,8 @@ def fetch_missing_pathway_metadata_task(self, force=False, dry_run=False):  # py
         )
     )
 
-    learner_pathway_metadata_list = ContentMetadata.objects.filter(content_type=LEARNER_PATHWAY).values_list(
-        '_json_metadata', flat=True,
-    )
-    program_uuids = set()
-    course_keys = set()
-    for learner_pathway_metadata in learner_pathway_metadata_list:
-        program_uuids.update(get_pathway_program_uuids(learner_pathway_metadata))
-        course_keys.update(get_pathway_course_keys(learner_pathway_metadata))
-
     # Check which programs do not have content metadata.
-    present_program_uuids = ContentMetadata.objects.filter(
-        content_type=PROGRAM, content_key__in=program_uuids
-    ).values_list(
-        'content_key', flat=True
-    )
-
-    missing_program_uuids = program_uuids.difference(present_program_uuids)
+    missing_program_uuids = ContentMetadataChildKey.get_missing_child_content_keys(LEARNER_PATHWAY, PROGRAM)
     if missing_program_uuids:
         content_filter = {
             'status': 'published',
@@ -1481,13 +1608,7 @@ def fetch_missing_pathway_metadata_task(self, force=False, dry_run=False):  # py
         )
 
     # Check which courses do not have content metadata.
-    present_course_keys = ContentMetadata.objects.filter(
-        content_type=COURSE, content_key__in=course_keys
-    ).values_list(
-        'content_key', flat=True
-    )
-
-    missing_course_keys = course_keys.difference(present_course_keys)
+    missing_course_keys = ContentMetadataChildKey.get_missing_child_content_keys(LEARNER_PATHWAY, COURSE)
     if missing_course_keys:
         content_filter = {
             'status': 'published',
@@ -2,6 +2,7 @@
 Tests for the enterprise_catalog API celery tasks
 """
 
+import copy
 import json
 import uuid
 from datetime import timedelta
@@ -9,8 +10,10 @@ from unittest import mock
 
 import ddt
 from celery import states
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django_celery_results.models import TaskResult
+from edx_django_utils.cache import RequestCache
+from waffle.testutils import override_switch
 
 from enterprise_catalog.apps.api import tasks
 from enterprise_catalog.apps.api.constants import CourseMode
@@ -22,7 +25,11 @@ from enterprise_catalog.apps.catalog.constants import (
     LEARNER_PATHWAY,
     PROGRAM,
 )
-from enterprise_catalog.apps.catalog.models import CatalogQuery, ContentMetadata
+from enterprise_catalog.apps.catalog.models import (
+    CatalogQuery,
+    ContentMetadata,
+    DiscoverySyncWatermark,
+)
 from enterprise_catalog.apps.catalog.serializers import (
     DEFAULT_NORMALIZED_PRICE,
     _find_best_mode_seat,
@@ -33,6 +40,10 @@ from enterprise_catalog.apps.catalog.tests.factories import (
     EnterpriseCatalogFactory,
 )
 from enterprise_catalog.apps.catalog.utils import localized_utcnow
+from enterprise_catalog.apps.catalog.waffle import (
+    ASYNC_DISCOVERY_CLIENT_SWITCH,
+    INCREMENTAL_DISCOVERY_SYNC_SWITCH,
+)
 
 
 # An object that represents the output of some hard work done by a task.
@@ -208,6 +219,37 @@ class UpdateCatalogMetadataTaskTests(TestCase):
         mock_update_data_from_discovery.assert_not_called()
 
 
+@ddt.ddt
+class FetchByKeysTests(TestCase):
+    """
+    Tests for fetching courses and programs by key from course-discovery.
+    """
+
+    def setUp(self):
+        super().setUp()
+        # Waffle switches memoize their state in the request cache, which would otherwise outlive each test.
+        RequestCache.clear_all_namespaces()
+        self.addCleanup(RequestCache.clear_all_namespaces)
+
+    @ddt.data(True, False)
+    @mock.patch('enterprise_catalog.apps.api.tasks.AsyncDiscoveryApiClient')
+    @mock.patch('enterprise_catalog.apps.api.tasks.DiscoveryApiClient')
+    def test_fetch_by_keys_client(self, async_client_enabled, mock_client, mock_async_client):
+        """
+        Assert that courses and programs are fetched with the async client only when its switch is enabled.
+        """
+        with override_switch(ASYNC_DISCOVERY_CLIENT_SWITCH.name, active=async_client_enabled):
+            tasks._fetch_courses_by_keys(['edX+fakeX'])  # pylint: disable=protected-access
+            tasks._fetch_programs_by_keys(['program-uuid'])  # pylint: disable=protected-access
+
+        used_client, unused_client = (mock_async_client, mock_client) if async_client_enabled else (
+            mock_client, mock_async_client
+        )
+        used_client.return_value.fetch_courses_by_keys.assert_called_once_with(['edX+fakeX'], extra_query_params=None)
+        used_client.return_value.fetch_programs_by_keys.assert_called_once_with(['program-uuid'])
+        unused_client.assert_not_called()
+
+
 class FetchMissingCourseMetadataTaskTests(TestCase):
     """
     Tests for the `fetch_missing_course_metadata_task`.
@@ -360,6 +402,11 @@ class UpdateFullContentMetadataTaskTests(TestCase):
         cls.enterprise_catalog = EnterpriseCatalogFactory()
         cls.catalog_query = cls.enterprise_catalog.catalog_query
 
+    def setUp(self):
+        super().setUp()
+        # Waffle switches memoize their state in the request cache, which would otherwise outlive each test.
+        RequestCache.clear_all_namespaces()
+
     @ddt.data(
         # Test that it doesn't crash on empty input.
         {
@@ -576,7 +623,109 @@ class UpdateFullContentMetadataTaskTests(TestCase):
         first_call_keys = mock_update_program.call_args_list[0].args[0]
         assert first_call_keys == [program_key]
 
+    @override_switch(INCREMENTAL_DISCOVERY_SYNC_SWITCH.name, active=True)
+    @mock.patch('enterprise_catalog.apps.api.tasks.task_recently_run', return_value=False)
+    @mock.patch('enterprise_catalog.apps.api.tasks._update_full_content_metadata_program')
+    @mock.patch('enterprise_catalog.apps.api.tasks._update_full_content_metadata_course')
+    def test_update_full_metadata_incremental(self, mock_update_courses, mock_update_programs, mock_task_recently_run):
+        """
+        Assert that once a full metadata update has run, only the courses that were modified since their full
+        metadata was last fetched, or that it was never fetched for, are updated.
+        """
+        old_course = ContentMetadataFactory(content_type=COURSE, content_key='edX+oldX')
+        modified_course = ContentMetadataFactory(content_type=COURSE, content_key='edX+modifiedX')
+        sync_started = localized_utcnow()
+
+        tasks.update_full_content_metadata_task.apply().get()
+        assert set(mock_update_courses.call_args.args[0]) == {old_course.content_key, modified_course.content_key}
+        watermark = DiscoverySyncWatermark.objects.get(endpoint=DiscoverySyncWatermark.COURSES)
+        # The watermark is as of when the update started, so content modified while it ran isn't skipped.
+        assert sync_started <= watermark.synced_through < localized_utcnow()
+        assert watermark.last_full_sync
+
+        ContentMetadata.objects.filter(content_key__in=[old_course.content_key, modified_course.content_key]).update(
+            full_metadata_fetched=localized_utcnow(),
+        )
+        modified_course.save()
+        new_course = ContentMetadataFactory(content_type=COURSE, content_key='edX+newX')
+        tasks.update_full_content_metadata_task.apply(kwargs={'force': True}).get()
+        assert set(mock_update_courses.call_args.args[0]) == {modified_course.content_key, new_course.content_key}
+
+    @mock.patch('enterprise_catalog.apps.api.tasks.TASK_BATCH_SIZE', 1)
+    @mock.patch('enterprise_catalog.apps.api.tasks.partition_course_keys_for_indexing', return_value=([], []))
+    @mock.patch('enterprise_catalog.apps.api.tasks._fetch_courses_by_keys')
+    @mock.patch('enterprise_catalog.apps.api.tasks.DiscoveryApiClient')
+    def test_update_full_metadata_course_reviews_fetched_once(
+        self, mock_client, mock_fetch_courses, mock_partition_course_keys,
+    ):
+        """
+        Assert that course reviews are fetched once for all batches of a full course metadata update.
+        """
+        course_keys = ['edX+fakeX', 'edX+testX', 'edX+fooX']
+        for course_key in course_keys:
+            ContentMetadataFactory(content_type=COURSE, content_key=course_key)
+        mock_fetch_courses.side_effect = lambda keys: [{'key': key, 'programs': []} for key in keys]
+        mock_client.return_value.get_all_course_reviews.return_value = {
+            course_key: {'course_key': course_key, 'reviews_count': 10, 'avg_course_rating': 4.5}
+            for course_key in course_keys
+        }
+
+        tasks._update_full_content_metadata_course(course_keys)  # pylint: disable=protected-access
+
+        assert mock_fetch_courses.call_count == 3
+        mock_client.return_value.get_all_course_reviews.assert_called_once_with()
+        for metadata in ContentMetadata.objects.filter(content_key__in=course_keys):
+            assert metadata.json_metadata['reviews_count'] == 10
+            assert metadata.json_metadata['avg_course_rating'] == 4.5
+            assert metadata.full_metadata_fetched == metadata.modified
+
     # pylint: disable=unused-argument
+    @override_settings(FULL_COURSE_METADATA_UPDATE_SHARD_SIZE=2)
+    @mock.patch('enterprise_catalog.apps.api.tasks.task_recently_run', return_value=False)
+    @mock.patch('enterprise_catalog.apps.api.tasks.partition_course_keys_for_indexing', return_value=([], []))
+    @mock.patch('enterprise_catalog.apps.api.tasks._update_full_content_metadata_program')
+    @mock.patch('enterprise_catalog.apps.api.tasks._fetch_courses_by_keys')
+    @mock.patch('enterprise_catalog.apps.api.tasks.DiscoveryApiClient')
+    def test_update_full_metadata_sharded_matches_serial(
+        self, mock_client, mock_fetch_courses, mock_update_programs, mock_partition_course_keys, mock_task_recently_run,
+    ):
+        """
+        Assert that updating full course metadata in shards gives the same results as updating it serially.
+        """
+        course_keys = ['edX+aX', 'edX+bX', 'edX+cX', 'edX+dX', 'edX+eX']
+        for course_key in course_keys:
+            ContentMetadataFactory(content_type=COURSE, content_key=course_key)
+        course_metadata = ContentMetadata.objects.filter(content_key__in=course_keys).order_by('content_key')
+        original_json_metadata = {
+            metadata.content_key: copy.deepcopy(metadata.json_metadata) for metadata in course_metadata
+        }
+        mock_fetch_courses.side_effect = lambda keys: [
+            {'key': key, 'programs': [], 'full_course_only_field': key} for key in keys
+        ]
+        mock_client.return_value.get_all_course_reviews.return_value = {
+            course_key: {'course_key': course_key, 'reviews_count': 10, 'avg_course_rating': 4.5}
+            for course_key in course_keys
+        }
+
+        tasks.update_full_content_metadata_task.apply().get()
+        serial_json_metadata = {metadata.content_key: metadata.json_metadata for metadata in course_metadata.all()}
+
+        reset_course_metadata = list(course_metadata.all())
+        for metadata in reset_course_metadata:
+            metadata.json_metadata = original_json_metadata[metadata.content_key]
+        ContentMetadata.objects.bulk_update(reset_course_metadata, ['_json_metadata'])
+        mock_fetch_courses.reset_mock()
+        mock_client.reset_mock()
+
+        tasks.update_full_content_metadata_task.apply(kwargs={'shard_courses': True}).get()
+        sharded_json_metadata = {metadata.content_key: metadata.json_metadata for metadata in course_metadata.all()}
+
+        assert sorted(len(call.args[0]) for call in mock_fetch_courses.call_args_list) == [1, 2, 2]
+        # The course reviews are fetched once, rather than by every shard.
+        mock_client.return_value.get_all_course_reviews.assert_called_once_with()
+        assert serial_json_metadata['edX+aX']['full_course_only_field'] == 'edX+aX'
+        assert sharded_json_metadata == serial_json_metadata
+
     @mock.patch('enterprise_catalog.apps.api.tasks.task_recently_run', return_value=False)
     @mock.patch('enterprise_catalog.apps.api.tasks.partition_program_keys_for_indexing')
     @mock.patch('enterprise_catalog.apps.api_client.base_oauth.OAuthAPIClient')
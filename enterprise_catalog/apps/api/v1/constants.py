@@ -14,3 +14,6 @@ class SegmentEvents:
 
 DEFAULT_TRANSLATION_LANGUAGE = 'en'
 AVAILABLE_TRANSLATION_LANGUAGES = ['es']
+
+# Maximum number of containment checks accepted by a single bulk contains_content_items request.
+CONTAINS_CONTENT_ITEMS_BULK_MAX_ITEMS = 1000
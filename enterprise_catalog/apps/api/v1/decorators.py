@@ -1,5 +1,8 @@
+import hashlib
 from functools import wraps
 
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
 from rest_framework.exceptions import ValidationError
 
 
@@ -40,3 +43,44 @@ def require_at_least_one_query_parameter(*query_parameter_names):
             return view(request, *args, **kwargs)
         return wrapper
     return outer_wrapper
+
+
+def conditional_on_content_version(view_method):
+    """
+    Support conditional GET requests on a view method, based on the catalog content version returned
+    by the view's ``get_content_version()`` method as a ``(last_modified, etag)`` pair.
+
+    If the request's ``If-None-Match`` or ``If-Modified-Since`` headers show that the client already has
+    the current version, a 304 response is returned without calling the decorated method, so no content
+    metadata is loaded or serialized. Otherwise, the ``ETag`` and ``Last-Modified`` headers are added to
+    the successful response.
+
+    The same content version is served as different representations depending on the request's path,
+    query parameters and accepted renderer, so these are folded into the ``ETag``, and responses vary on
+    the ``Accept`` header.
+
+    Usage::
+        @conditional_on_content_version
+        def get(self, request, **kwargs):
+            # Some functionality ...
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        last_modified, content_version_etag = self.get_content_version()
+        accepted_renderer = getattr(request, 'accepted_renderer', None)
+        representation = '{content_version_etag}:{full_path}:{format}'.format(
+            content_version_etag=content_version_etag,
+            full_path=request.get_full_path(),
+            format=accepted_renderer.format if accepted_renderer else '',
+        )
+        etag = quote_etag(hashlib.md5(representation.encode('utf-8')).hexdigest())
+        last_modified_timestamp = int(last_modified.timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified_timestamp)
+        if response is None:
+            response = view_method(self, request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response.headers['ETag'] = etag
+            response.headers['Last-Modified'] = http_date(last_modified_timestamp)
+            patch_vary_headers(response, ('Accept',))
+        return response
+    return wrapper
@@ -1,4 +1,5 @@
-from rest_framework.pagination import PageNumberPagination
+from edx_rest_framework_extensions.paginators import DefaultPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class PageNumberWithSizePagination(PageNumberPagination):
@@ -8,3 +9,19 @@ class PageNumberWithSizePagination(PageNumberPagination):
     Example usage: /api/v1/enterprise-catalogs/{uuid}/get_content_metadata/?page_size=1000
     """
     page_size_query_param = 'page_size'
+
+
+class ContentMetadataCursorPagination(CursorPagination):
+    """
+    Keyset pagination over content metadata, ordered by primary key.
+
+    Each page is fetched with a ``WHERE id > <cursor> ORDER BY id LIMIT <page_size>``
+    query, so deep pages cost the same as the first one and no COUNT is issued.
+    Responses contain ``next``, ``previous``, and ``results``, but no ``count``.
+
+    Example usage: /api/v1/enterprise-catalogs/{uuid}/get_content_metadata/?cursor_pagination=true
+    """
+    ordering = 'id'
+    page_size = DefaultPagination.page_size
+    page_size_query_param = 'page_size'
+    max_page_size = DefaultPagination.max_page_size
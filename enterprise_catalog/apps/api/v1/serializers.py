@@ -8,6 +8,7 @@ from rest_framework import serializers, status
 from enterprise_catalog.apps.academy.models import Academy, Tag
 from enterprise_catalog.apps.api.v1.constants import (
     AVAILABLE_TRANSLATION_LANGUAGES,
+    CONTAINS_CONTENT_ITEMS_BULK_MAX_ITEMS,
     DEFAULT_TRANSLATION_LANGUAGE,
 )
 from enterprise_catalog.apps.api.v1.utils import (
@@ -250,36 +251,106 @@ class CatalogQueryGetByHashRequestSerializer(ImmutableStateSerializer):
         return value
 
 
+class ContentMetadataListSerializer(serializers.ListSerializer):
+    """
+    List serializer for Content Metadata objects that loads the child course runs of
+    every course in the list up front, rather than once per serialized course.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        content_metadata_list = list(iterable)
+        if (
+            self.context.get('enterprise_catalog')
+            and not self.context.get('skip_customer_fetch')
+            and self.child.include_field('course_runs')
+        ):
+            course_keys = [
+                item.content_key for item in content_metadata_list
+                if item.content_type == COURSE and not item.is_exec_ed_2u_course
+            ]
+            # Copy the context so that the prefetched records don't leak into the caller's dict.
+            self._context = {
+                **self._context,
+                'child_records_by_parent_key': ContentMetadata.get_child_records_by_parent_key(course_keys),
+            }
+        return super().to_representation(content_metadata_list)
+
+
+class ContainsContentItemsBulkItemSerializer(ImmutableStateSerializer):
+    """
+    Request serializer for a single containment check of the bulk ``contains_content_items`` endpoint.
+    Exactly one of ``enterprise_customer_uuid`` or ``catalog_uuid`` must be provided.
+    """
+    enterprise_customer_uuid = serializers.UUIDField(required=False)
+    catalog_uuid = serializers.UUIDField(required=False)
+    content_keys = serializers.ListField(child=serializers.CharField(), allow_empty=False)
+
+    def validate(self, attrs):
+        if bool(attrs.get('enterprise_customer_uuid')) == bool(attrs.get('catalog_uuid')):
+            raise serializers.ValidationError(
+                'Exactly one of enterprise_customer_uuid or catalog_uuid must be provided.'
+            )
+        return attrs
+
+
+class ContainsContentItemsBulkRequestSerializer(ImmutableStateSerializer):
+    """
+    Request serializer to validate request data provided to the bulk ``contains_content_items`` endpoint.
+    """
+    items = ContainsContentItemsBulkItemSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=CONTAINS_CONTENT_ITEMS_BULK_MAX_ITEMS,
+    )
+
+
 class ContentMetadataSerializer(ImmutableStateSerializer):
     """
     Serializer for rendering Content Metadata objects
     """
 
+    class Meta:
+        list_serializer_class = ContentMetadataListSerializer
+
+    def include_field(self, field_name):
+        """
+        Whether ``field_name`` should be part of the serialized representation, based on the optional
+        ``fields`` and ``exclude_fields`` sets of field names in the serializer context.
+        """
+        fields = self.context.get('fields')
+        if fields is not None and field_name not in fields:
+            return False
+        return field_name not in (self.context.get('exclude_fields') or ())
+
     def to_representation(self, instance):
         """
         Return the updated content metadata dictionary.
 
+        Only the fields allowed by the ``fields`` / ``exclude_fields`` context are serialized, and the
+        computed fields that are left out (e.g. ``enrollment_url``) are never computed.
+
         Arguments:
             instance (dict): ContentMetadata instance.
 
         Returns:
             dict: The modified json_metadata field.
         """
-        catalog_modified = None
-        customer_modified = None
         enterprise_catalog = self.context.get('enterprise_catalog')
-
-        if enterprise_catalog:
-            catalog_modified = enterprise_catalog.modified
-        if enterprise_catalog and not self.context.get('skip_customer_fetch'):
-            customer_modified = enterprise_catalog.enterprise_customer.last_modified_date
+        skip_customer_fetch = self.context.get('skip_customer_fetch')
 
         content_type = instance.content_type
-        json_metadata = instance.json_metadata.copy()
+        stored_json_metadata = instance.json_metadata
+        json_metadata = {
+            field_name: value
+            for field_name, value in stored_json_metadata.items()
+            if self.include_field(field_name)
+        }
         marketing_url = json_metadata.get('marketing_url')
-        content_key = json_metadata.get('key')
+        content_key = stored_json_metadata.get('key')
 
-        json_metadata['parent_content_key'] = instance.parent_content_key
+        if self.include_field('parent_content_key'):
+            json_metadata['parent_content_key'] = instance.parent_content_key
 
         # Currently (3/17/23) product source can potentially be two different formats, string and dict.
         # For the purposes of the metadata serializer, we will standardize and default to the dict format.
@@ -290,13 +361,18 @@ class ContentMetadataSerializer(ImmutableStateSerializer):
         # The enrollment URL field of content metadata is generated on request and is determined by the status of the
         # enterprise customer as well as the catalog. So, in order to detect when content metadata has last been
         # modified, we have to also check the customer and the catalog's modified times.
-        modified_time = get_most_recent_modified_time(
-            instance.modified,
-            catalog_modified,
-            customer_modified
-        )
-
-        json_metadata['content_last_modified'] = modified_time
+        if self.include_field('content_last_modified'):
+            catalog_modified = None
+            customer_modified = None
+            if enterprise_catalog:
+                catalog_modified = enterprise_catalog.modified
+            if enterprise_catalog and not skip_customer_fetch:
+                customer_modified = enterprise_catalog.enterprise_customer.last_modified_date
+            json_metadata['content_last_modified'] = get_most_recent_modified_time(
+                instance.modified,
+                catalog_modified,
+                customer_modified
+            )
 
         if marketing_url and enterprise_catalog:
             marketing_url = update_query_parameters(
@@ -307,23 +383,26 @@ class ContentMetadataSerializer(ImmutableStateSerializer):
 
         if content_type in (COURSE, COURSE_RUN):
             if enterprise_catalog:
-                json_metadata['enrollment_url'] = None
-                if not self.context.get('skip_customer_fetch'):
-                    json_metadata['enrollment_url'] = enterprise_catalog.get_content_enrollment_url(instance)
-                json_metadata['xapi_activity_id'] = enterprise_catalog.get_xapi_activity_id(
-                    content_resource=content_type,
-                    content_key=content_key,
-                )
+                if self.include_field('enrollment_url'):
+                    json_metadata['enrollment_url'] = None
+                    if not skip_customer_fetch:
+                        json_metadata['enrollment_url'] = enterprise_catalog.get_content_enrollment_url(instance)
+                if self.include_field('xapi_activity_id'):
+                    json_metadata['xapi_activity_id'] = enterprise_catalog.get_xapi_activity_id(
+                        content_resource=content_type,
+                        content_key=content_key,
+                    )
             if content_type == COURSE:
-                serialized_course_runs = json_metadata.get('course_runs', [])
-                json_metadata['active'] = is_any_course_run_active(serialized_course_runs)
+                if self.include_field('active'):
+                    json_metadata['active'] = is_any_course_run_active(stored_json_metadata.get('course_runs', []))
                 # We don't include enrollment_url values for the nested course runs in a course
                 # for exec-ed-2u content, because enrollment fulfillment for such content
                 # is controlled via Entitlements, which are tied directly to Courses
                 # (as opposed to Seats, which are tied to Course Runs).
-                if not instance.is_exec_ed_2u_course and not self.context.get('skip_customer_fetch'):
-                    self._augment_serialized_runs_for_course(instance, serialized_course_runs)
-        elif content_type == PROGRAM:
+                include_runs = self.include_field('course_runs')
+                if include_runs and not instance.is_exec_ed_2u_course and not skip_customer_fetch:
+                    self._augment_serialized_runs_for_course(instance, json_metadata.get('course_runs', []))
+        elif content_type == PROGRAM and self.include_field('enrollment_url'):
             # We want this to be null, because we have no notion
             # of directly enrolling in a program.
             json_metadata['enrollment_url'] = None
@@ -342,7 +421,14 @@ class ContentMetadataSerializer(ImmutableStateSerializer):
 
         serialized_runs_by_key = {run['key']: run for run in serialized_course_runs}
 
-        for course_run_instance in ContentMetadata.get_child_records(course_instance):
+        # Use the child records prefetched for the whole list, if any, before falling back to a query.
+        child_records_by_parent_key = self.context.get('child_records_by_parent_key')
+        if child_records_by_parent_key is not None:
+            child_records = child_records_by_parent_key.get(course_instance.content_key, [])
+        else:
+            child_records = ContentMetadata.get_child_records(course_instance)
+
+        for course_run_instance in child_records:
             serialized_run = serialized_runs_by_key.get(course_run_instance.content_key)
             if not serialized_run:
                 continue
@@ -4,16 +4,27 @@ from unittest import mock
 
 import pytz
 from algoliasearch.exceptions import AlgoliaException
+from django.core.cache import cache
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
+from waffle.testutils import override_switch
 
 from enterprise_catalog.apps.api.base.tests.enterprise_customer_views import (
     BaseEnterpriseCustomerViewSetTests,
 )
+from enterprise_catalog.apps.catalog.constants import COURSE, COURSE_RUN
+from enterprise_catalog.apps.catalog.models import (
+    EnterpriseCatalogContentMembership,
+)
 from enterprise_catalog.apps.catalog.tests.factories import (
     ContentMetadataFactory,
     EnterpriseCatalogFactory,
 )
+from enterprise_catalog.apps.catalog.waffle import (
+    USE_CATALOG_CONTENT_MEMBERSHIP_SWITCH,
+)
 
 
 class EnterpriseCustomerViewSetTests(BaseEnterpriseCustomerViewSetTests):
@@ -46,6 +57,38 @@ class EnterpriseCustomerViewSetTests(BaseEnterpriseCustomerViewSetTests):
         assert response.data == 'catalog_diff GET requests supports up to 100. If more content keys required, please ' \
                                 'use a POST body.'
 
+    @mock.patch('enterprise_catalog.apps.api_client.enterprise_cache.EnterpriseApiClient')
+    def test_generate_diff_get_conditional_requests(self, mock_api_client):
+        """
+        Test that GET requests to generate_diff return a 304 when the client already has the current version
+        of the catalog's content, and a full response once the customer has been modified.
+        """
+        now = self.enterprise_catalog.modified
+        mock_api_client.return_value.get_enterprise_customer.return_value = {
+            'slug': self.enterprise_slug,
+            'enable_learner_portal': True,
+            'modified': str(now),
+        }
+        content = ContentMetadataFactory()
+        self.add_metadata_to_catalog(self.enterprise_catalog, [content])
+        url = self._get_generate_diff_base_url() + f'?content_keys={content.content_key}'
+
+        response = self.client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        etag = response.headers['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        mock_api_client.return_value.get_enterprise_customer.return_value['modified'] = str(
+            now + timedelta(hours=1)
+        )
+        # Evict the cached customer details.
+        cache.clear()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers['ETag'] != etag
+
     @mock.patch('enterprise_catalog.apps.api_client.enterprise_cache.EnterpriseApiClient')
     def test_generate_diff_matched_modified_uses_content(self, mock_api_client):
         """
@@ -344,6 +387,78 @@ class EnterpriseCustomerViewSetTests(BaseEnterpriseCustomerViewSetTests):
         catalog_list = response.json()['catalog_list']
         assert catalog_list == []
 
+    def _add_metadata_and_refresh_membership(self, catalog, metadata):
+        """
+        Helper to associate metadata with a catalog and rebuild the catalog's content membership.
+        """
+        self.add_metadata_to_catalog(catalog, metadata)
+        EnterpriseCatalogContentMembership.refresh_for_catalog_query(catalog.catalog_query)
+
+    @override_switch(USE_CATALOG_CONTENT_MEMBERSHIP_SWITCH.name, active=True)
+    def test_contains_content_items_from_membership(self):
+        """
+        Verify the contains_content_items endpoint answers from the content membership table,
+        matching on content keys, parent content keys, and the parent of a requested course run.
+        """
+        course = ContentMetadataFactory(content_key='edX+DemoX', content_type=COURSE)
+        ContentMetadataFactory(
+            content_key='course-v1:edX+DemoX+2024',
+            content_type=COURSE_RUN,
+            parent_content_key='edX+DemoX',
+        )
+        self._add_metadata_and_refresh_membership(self.enterprise_catalog, [ContentMetadataFactory()])
+        second_catalog = EnterpriseCatalogFactory(enterprise_uuid=self.enterprise_uuid)
+        self._add_metadata_and_refresh_membership(second_catalog, [course])
+
+        base_url = self._get_contains_content_base_url()
+        for content_key in ('edX+DemoX', 'course-v1:edX+DemoX+2024'):
+            response = self.client.get(
+                f'{base_url}?course_run_ids={content_key}&get_catalogs_containing_specified_content_ids=True'
+            ).json()
+            assert response['contains_content_items'] is True
+            assert response['catalog_list'] == [str(second_catalog.uuid)]
+        self.assert_correct_contains_response(f'{base_url}?course_run_ids=course-v1:edX+DemoX+2024', True)
+        self.assert_correct_contains_response(f'{base_url}?course_run_ids=edX+NotInAnyCatalog', False)
+
+    @override_switch(USE_CATALOG_CONTENT_MEMBERSHIP_SWITCH.name, active=True)
+    def test_contains_content_items_from_membership_ignores_other_customers(self):
+        """
+        Verify content contained only by another customer's catalog is not reported as contained.
+        """
+        content_key = 'fake-key+101x'
+        another_customers_catalog = EnterpriseCatalogFactory(enterprise_uuid=uuid.uuid4())
+        self._add_metadata_and_refresh_membership(
+            another_customers_catalog, [ContentMetadataFactory(content_key=content_key)],
+        )
+
+        url = self._get_contains_content_base_url() + '?course_run_ids=' + content_key
+        self.assert_correct_contains_response(url, False)
+
+    @override_switch(USE_CATALOG_CONTENT_MEMBERSHIP_SWITCH.name, active=True)
+    def test_contains_content_items_from_membership_query_count(self):
+        """
+        Verify the number of queries issued by contains_content_items does not grow with
+        the number of catalogs the customer has.
+        """
+        content_key = 'fake-key+101x'
+        relevant_content = ContentMetadataFactory(content_key=content_key)
+        url = self._get_contains_content_base_url() + '?course_run_ids=' + content_key + \
+            '&get_catalogs_containing_specified_content_ids=True'
+        # Warm up any per-user state so that only the containment lookup is compared below.
+        self.client.get(url)
+
+        query_counts = []
+        for _ in range(2):
+            for _ in range(5):
+                catalog = EnterpriseCatalogFactory(enterprise_uuid=self.enterprise_uuid)
+                self._add_metadata_and_refresh_membership(catalog, [relevant_content])
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            assert response.json()['contains_content_items'] is True
+            query_counts.append(len(queries))
+
+        assert query_counts[0] == query_counts[1]
+
     def test_filter_content_items_unauthorized_non_catalog_learner(self):
         """
         Verify the filter_content_items endpoint rejects users that are not catalog learners
@@ -473,6 +588,30 @@ class EnterpriseCustomerViewSetTests(BaseEnterpriseCustomerViewSetTests):
         # response should only contain content keys found in the "second_catalog"
         self.assertEqual(response.get('filtered_content_keys'), [relevant_content_key])
 
+    def test_filter_content_items_query_count(self):
+        """
+        Verify the number of queries issued by filter_content_items does not grow with
+        the number of catalogs or requested content keys.
+        """
+        url = self._get_filter_content_base_url()
+        # Warm up any per-user state so that only the filtering is compared below.
+        self.client.post(url, {'content_keys': ['warm-up']}, format='json')
+
+        query_counts = []
+        content_keys = []
+        for round_index in range(2):
+            for catalog_index in range(5):
+                content_key = f'fake-key+{round_index}{catalog_index}x'
+                catalog = EnterpriseCatalogFactory(enterprise_uuid=self.enterprise_uuid)
+                self.add_metadata_to_catalog(catalog, [ContentMetadataFactory(content_key=content_key)])
+                content_keys.append(content_key)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(url, {'content_keys': content_keys}, format='json')
+            assert set(response.json()['filtered_content_keys']) == set(content_keys)
+            query_counts.append(len(queries))
+
+        assert query_counts[0] == query_counts[1]
+
     @override_settings(
         ALGOLIA={
             'APPLICATION_ID': 'fake-app-id',
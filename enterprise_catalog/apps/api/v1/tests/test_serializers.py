@@ -1,3 +1,4 @@
+from unittest import mock
 from uuid import uuid4
 
 from django.db import transaction
@@ -10,10 +11,12 @@ from enterprise_catalog.apps.api.v1.serializers import (
     HighlightSetSerializer,
     find_and_modify_catalog_query,
 )
+from enterprise_catalog.apps.catalog.constants import COURSE, COURSE_RUN
 from enterprise_catalog.apps.catalog.models import CatalogQuery
 from enterprise_catalog.apps.catalog.tests.factories import (
     ContentMetadataFactory,
     ContentTranslationFactory,
+    EnterpriseCatalogFactory,
 )
 from enterprise_catalog.apps.catalog.utils import get_content_filter_hash
 from enterprise_catalog.apps.curation.tests.factories import (
@@ -46,6 +49,98 @@ class ContentMetadataSerializerTests(TestCase):
             'description': None
         }
 
+    def _create_courses_with_runs(self, num_courses):
+        """
+        Helper to create courses, each with a single child course run.
+        """
+        courses = []
+        for index in range(num_courses):
+            course_key = f'edX+course{index}'
+            run_key = f'course-v1:edX+course{index}+1T2024'
+            course = ContentMetadataFactory(content_key=course_key, content_type=COURSE)
+            course._json_metadata['course_runs'] = [{'key': run_key}]  # pylint: disable=protected-access
+            course.save()
+            ContentMetadataFactory(content_key=run_key, content_type=COURSE_RUN, parent_content_key=course_key)
+            courses.append(course)
+        return courses
+
+    @mock.patch('enterprise_catalog.apps.catalog.models.EnterpriseCustomerDetails')
+    def test_course_runs_prefetched_for_list(self, mock_customer_details):
+        """
+        Test that serializing many courses loads their child course runs with a single query,
+        and that each nested run still gets its parent key and enrollment url.
+        """
+        mock_customer_details.return_value.learner_portal_enabled = False
+        mock_customer_details.return_value.last_modified_date = None
+        courses = self._create_courses_with_runs(10)
+        context = {'enterprise_catalog': EnterpriseCatalogFactory()}
+
+        with self.assertNumQueries(1):
+            serialized_courses = ContentMetadataSerializer(courses, context=context, many=True).data
+
+        # The prefetched records should not leak into the caller's context.
+        assert 'child_records_by_parent_key' not in context
+        for course, serialized_course in zip(courses, serialized_courses):
+            serialized_run = serialized_course['course_runs'][0]
+            assert serialized_run['parent_content_key'] == course.content_key
+            assert f'/course/{serialized_run["key"]}/enroll/' in serialized_run['enrollment_url']
+
+    @mock.patch('enterprise_catalog.apps.catalog.models.EnterpriseCustomerDetails')
+    def test_course_runs_fetched_for_single_instance(self, mock_customer_details):
+        """
+        Test that serializing a single course still looks up its child course runs.
+        """
+        mock_customer_details.return_value.learner_portal_enabled = False
+        mock_customer_details.return_value.last_modified_date = None
+        course = self._create_courses_with_runs(1)[0]
+
+        serialized_course = ContentMetadataSerializer(
+            course,
+            context={'enterprise_catalog': EnterpriseCatalogFactory()},
+        ).data
+
+        assert serialized_course['course_runs'][0]['parent_content_key'] == course.content_key
+
+    @mock.patch('enterprise_catalog.apps.catalog.models.EnterpriseCustomerDetails')
+    def test_fields_projection(self, mock_customer_details):
+        """
+        Test that only the requested fields are serialized, and that the computed fields that are
+        left out never look up the customer or the child course runs.
+        """
+        courses = self._create_courses_with_runs(3)
+        context = {
+            'enterprise_catalog': EnterpriseCatalogFactory(),
+            'fields': {'key', 'title'},
+        }
+
+        with self.assertNumQueries(0):
+            serialized_courses = ContentMetadataSerializer(courses, context=context, many=True).data
+
+        for serialized_course in serialized_courses:
+            assert set(serialized_course) == {'key', 'title'}
+        mock_customer_details.assert_not_called()
+
+    @mock.patch('enterprise_catalog.apps.catalog.models.EnterpriseCustomerDetails')
+    def test_exclude_fields_projection(self, mock_customer_details):
+        """
+        Test that excluded fields, stored or computed, are left out of the serialized data.
+        """
+        mock_customer_details.return_value.learner_portal_enabled = False
+        course = self._create_courses_with_runs(1)[0]
+
+        serialized_course = ContentMetadataSerializer(
+            course,
+            context={
+                'enterprise_catalog': EnterpriseCatalogFactory(),
+                'exclude_fields': {'course_runs', 'content_last_modified'},
+            },
+        ).data
+
+        assert 'course_runs' not in serialized_course
+        assert 'content_last_modified' not in serialized_course
+        assert serialized_course['key'] == course.content_key
+        assert 'enrollment_url' in serialized_course
+
 
 class FindCatalogQueryTest(TestCase):
     """
@@ -10,8 +10,9 @@ import ddt
 import pytz
 from django.conf import settings
 from django.core.cache import cache
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils.http import urlencode
 from django.utils.text import slugify
 from rest_framework import status
@@ -38,6 +39,7 @@ from enterprise_catalog.apps.catalog.constants import (
 from enterprise_catalog.apps.catalog.models import (
     ContentMetadata,
     EnterpriseCatalog,
+    associate_content_metadata_with_query,
 )
 from enterprise_catalog.apps.catalog.tests.factories import (
     CatalogQueryFactory,
@@ -1175,6 +1177,78 @@ class EnterpriseCatalogContainsContentItemsTests(APITestMixin):
         with self.assertNumQueries(4):
             self.assert_correct_contains_response(url, True)
 
+    def test_contains_content_items_conditional_requests(self):
+        """
+        Verify the contains_content_items endpoint returns a 304 from the per-view cache when the client
+        already has the current version of the catalog's content.
+        """
+        content_key = 'test-key'
+        associated_metadata = ContentMetadataFactory(content_key=content_key)
+        self.add_metadata_to_catalog(self.enterprise_catalog, [associated_metadata])
+        url = self._get_contains_content_base_url(self.enterprise_catalog) + '?course_run_ids=' + content_key
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response.headers['ETag']
+
+        with self.assertNumQueries(4):
+            not_modified_response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified_response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # A request without the conditional header still gets the full (cached) response.
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertTrue(response.data['contains_content_items'])
+
+    def test_contains_content_items_etag_varies_by_representation(self):
+        """
+        Verify requests for other query params or renderers get different ETags for the same content version,
+        and aren't answered with a 304 for the ETag of another representation.
+        """
+        associated_metadata = ContentMetadataFactory(content_key='test-key')
+        self.add_metadata_to_catalog(self.enterprise_catalog, [associated_metadata])
+        base_url = self._get_contains_content_base_url(self.enterprise_catalog)
+        url = base_url + '?course_run_ids=test-key'
+
+        response = self.client.get(url)
+        etag = response.headers['ETag']
+        self.assertIn('Accept', response.headers['Vary'])
+
+        other_keys_response = self.client.get(base_url + '?course_run_ids=other-key', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(other_keys_response.status_code, status.HTTP_200_OK)
+        self.assertFalse(other_keys_response.data['contains_content_items'])
+        self.assertNotEqual(other_keys_response.headers['ETag'], etag)
+
+        other_renderer_response = self.client.get(url, HTTP_ACCEPT='application/xml', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(other_renderer_response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(other_renderer_response.headers['ETag'], etag)
+
+    def test_contains_content_items_cache_invalidated_by_content_refresh(self):
+        """
+        Verify cached contains_content_items results are reused regardless of the order of the keys,
+        and invalidated as soon as the content of the catalog query is refreshed.
+        """
+        metadata = [{'aggregation_key': 'course:edX+otherX', 'key': 'edX+otherX', 'content_type': COURSE}]
+        associate_content_metadata_with_query(metadata, self.enterprise_catalog.catalog_query)
+        base_url = self._get_contains_content_base_url(self.enterprise_catalog)
+        url = base_url + '?course_run_ids=edX+testX&course_run_ids=edX+fooX'
+        self.assert_correct_contains_response(url, False)
+        etag = self.client.get(url).headers['ETag']
+
+        # The same set of keys, in another order, is served from the cache.
+        with self.assertNumQueries(4):
+            self.assert_correct_contains_response(
+                base_url + '?course_run_ids=edX+fooX&course_run_ids=edX+testX&course_run_ids=edX+fooX', False,
+            )
+
+        metadata.append({'aggregation_key': 'course:edX+testX', 'key': 'edX+testX', 'content_type': COURSE})
+        associate_content_metadata_with_query(metadata, self.enterprise_catalog.catalog_query)
+        self.assert_correct_contains_response(url, True)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
     def test_contains_content_items_parent_keys_in_catalog(self):
         """
         Verify the contains_content_items endpoint returns True if the parent's key is in the catalog
@@ -1559,8 +1633,7 @@ class EnterpriseCatalogGetContentMetadataTests(APITestMixin):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         response_data = response.json()
-        # count is the SQL total (1 unpublished item exists); results are filtered to empty
-        self.assertEqual(response_data["count"], 1)
+        self.assertEqual(response_data["count"], 0)
         self.assertEqual(response_data["results"], [])
 
         # Test 2: With content_keys parameter explicitly requesting the unpublished course
@@ -1570,17 +1643,14 @@ class EnterpriseCatalogGetContentMetadataTests(APITestMixin):
 
         self.assertEqual(response_with_keys.status_code, status.HTTP_200_OK)
         response_data_with_keys = response_with_keys.json()
-        self.assertEqual(response_data_with_keys["count"], 1)
+        self.assertEqual(response_data_with_keys["count"], 0)
         self.assertEqual(response_data_with_keys["results"], [])
 
     @mock.patch('enterprise_catalog.apps.api_client.enterprise_cache.EnterpriseApiClient')
-    def test_filtering_occurs_after_pagination(self, mock_api_client):  # pylint: disable=unused-argument
+    def test_filtering_occurs_before_pagination(self, mock_api_client):  # pylint: disable=unused-argument
         """
-        Verify that is_unpublished/is_active filtering happens after paginate_queryset.
-
-        The observable consequence: response 'count' equals the SQL total (which includes
-        items that will be filtered), while 'results' contains only the filtered items.
-        This proves json_metadata is read for page_size rows only, not the whole catalog.
+        Verify that unpublished/inactive filtering happens in SQL, before paginate_queryset,
+        so that the response 'count' only includes the items that are actually returned.
         """
         published_courses = ContentMetadataFactory.create_batch(3, content_type=COURSE)
         unpublished_course = ContentMetadataFactory(
@@ -1596,9 +1666,7 @@ class EnterpriseCatalogGetContentMetadataTests(APITestMixin):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         data = response.json()
 
-        # SQL COUNT includes the unpublished course; filtering is post-pagination
-        self.assertEqual(data['count'], len(all_items))
-        # Results are still correctly filtered
+        self.assertEqual(data['count'], len(published_courses))
         self.assertEqual(len(data['results']), len(published_courses))
         result_content_keys = [r['key'] for r in data['results']]
         self.assertNotIn(unpublished_course.content_key, result_content_keys)
@@ -1653,8 +1721,8 @@ class EnterpriseCatalogGetContentMetadataTests(APITestMixin):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         response_data = response.json()
-        # count is the SQL COUNT and includes the inactive course; results are filtered post-pagination
-        self.assertEqual((response_data['count']), len(metadata))
+        # the inactive course is excluded from the count as well as the results
+        self.assertEqual((response_data['count']), len(metadata) - 1)
         self.assertEqual(
             uuid.UUID(response_data['uuid']), self.enterprise_catalog.uuid)
         self.assertEqual(response_data['title'], self.enterprise_catalog.title)
@@ -1749,6 +1817,143 @@ class EnterpriseCatalogGetContentMetadataTests(APITestMixin):
             json.dumps(expected_metadata, sort_keys=True),
         )
 
+    @mock.patch('enterprise_catalog.apps.api_client.enterprise_cache.EnterpriseApiClient')
+    @override_settings(GET_CONTENT_METADATA_STREAMING_CHUNK_SIZE=3)
+    def test_get_content_metadata_traverse_pagination_streaming(self, mock_api_client):
+        """
+        Verify the get_content_metadata endpoint streams the same traversed payload, filtered
+        chunk by chunk, if the stream query parameter is added.
+        """
+        mock_api_client.return_value.get_enterprise_customer.return_value = {
+            'slug': self.enterprise_slug,
+            'enable_learner_portal': False,
+            'modified': str(datetime.now().replace(tzinfo=pytz.UTC)),
+        }
+        course = ContentMetadataFactory.create(content_type=COURSE)
+        course_runs = ContentMetadataFactory.create_batch(
+            api_settings.PAGE_SIZE,
+            content_type=COURSE_RUN,
+            parent_content_key=course.content_key,
+        )
+        course.json_metadata['course_runs'] = [run.json_metadata for run in course_runs]
+        course.save()
+        unpublished_course = ContentMetadataFactory.create(content_type=COURSE)
+        unpublished_course.json_metadata['course_runs'] = [{'key': 'course-v1:unpublished', 'status': 'unpublished'}]
+        unpublished_course.save()
+        self.add_metadata_to_catalog(self.enterprise_catalog, course_runs + [course, unpublished_course])
+
+        base_url = self._get_content_metadata_url(self.enterprise_catalog) + '?traverse_pagination=1'
+        response = self.client.get(base_url + '&stream=true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        assert response.streaming
+        streamed_data = json.loads(b''.join(response.streaming_content))
+        expected_data = self.client.get(base_url).json()
+
+        self.assertEqual(streamed_data['count'], api_settings.PAGE_SIZE + 1)
+        self.assertEqual(
+            json.dumps(streamed_data, sort_keys=True),
+            json.dumps(expected_data, sort_keys=True),
+        )
+
+    @mock.patch('enterprise_catalog.apps.api_client.enterprise_cache.EnterpriseApiClient')
+    def test_get_content_metadata_fields(self, mock_api_client):
+        """
+        Verify the get_content_metadata endpoint only serializes the requested fields.
+        """
+        mock_api_client.return_value.get_enterprise_customer.return_value = {
+            'slug': self.enterprise_slug,
+            'enable_learner_portal': False,
+            'modified': str(datetime.now().replace(tzinfo=pytz.UTC)),
+        }
+        metadata = ContentMetadataFactory.create_batch(3, content_type=COURSE)
+        self.add_metadata_to_catalog(self.enterprise_catalog, metadata)
+        url = self._get_content_metadata_url(self.enterprise_catalog)
+
+        response = self.client.get(url + '?fields=key,title&fields=content_type')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for item in response.json()['results']:
+            self.assertEqual(set(item), {'key', 'title', 'content_type'})
+
+        response = self.client.get(url + '?exclude_fields=course_runs,enrollment_url,content_last_modified')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for item in response.json()['results']:
+            assert not {'course_runs', 'enrollment_url', 'content_last_modified'} & set(item)
+            assert 'key' in item
+
+    @mock.patch('enterprise_catalog.apps.api_client.enterprise_cache.EnterpriseApiClient')
+    def test_get_content_metadata_cursor_pagination(self, mock_api_client):
+        """
+        Verify the get_content_metadata endpoint pages through the whole catalog by cursor, in primary
+        key order, without issuing a COUNT query, when the cursor pagination query parameter is added.
+        """
+        mock_api_client.return_value.get_enterprise_customer.return_value = {
+            'slug': self.enterprise_slug,
+            'enable_learner_portal': False,
+            'modified': str(datetime.now().replace(tzinfo=pytz.UTC)),
+        }
+        metadata = ContentMetadataFactory.create_batch(api_settings.PAGE_SIZE * 2 + 1, content_type=COURSE_RUN)
+        self.add_metadata_to_catalog(self.enterprise_catalog, metadata)
+
+        url = self._get_content_metadata_url(self.enterprise_catalog) + '?cursor_pagination=true'
+        actual_content_keys = []
+        num_pages = 0
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            assert not any(
+                'COUNT(' in query['sql'] and 'catalog_contentmetadata' in query['sql']
+                for query in queries.captured_queries
+            )
+            response_data = response.json()
+            assert 'count' not in response_data
+            self.assertEqual(uuid.UUID(response_data['uuid']), self.enterprise_catalog.uuid)
+            actual_content_keys.extend(item['key'] for item in response_data['results'])
+            num_pages += 1
+            url = response_data['next']
+
+        self.assertEqual(num_pages, 3)
+        expected_content_keys = [
+            item.content_key for item in sorted(metadata, key=lambda item: item.id)
+        ]
+        self.assertEqual(actual_content_keys, expected_content_keys)
+
+    @mock.patch('enterprise_catalog.apps.api_client.enterprise_cache.EnterpriseApiClient')
+    def test_get_content_metadata_conditional_requests(self, mock_api_client):
+        """
+        Verify the get_content_metadata endpoint returns a 304, without loading any content metadata,
+        when the client already has the current version of the catalog's content, and a full response
+        once that content changes.
+        """
+        mock_api_client.return_value.get_enterprise_customer.return_value = {
+            'slug': self.enterprise_slug,
+            'enable_learner_portal': False,
+            'modified': str(datetime.now().replace(tzinfo=pytz.UTC)),
+        }
+        metadata = ContentMetadataFactory.create_batch(3, content_type=COURSE_RUN)
+        self.add_metadata_to_catalog(self.enterprise_catalog, metadata)
+        url = self._get_content_metadata_url(self.enterprise_catalog)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response.headers['ETag']
+        last_modified = response.headers['Last-Modified']
+
+        with CaptureQueriesContext(connection) as queries:
+            not_modified_response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified_response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified_response.headers['ETag'], etag)
+        assert not any('"json_metadata"' in query['sql'] for query in queries.captured_queries)
+
+        not_modified_response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(not_modified_response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        metadata[0].save()
+        modified_response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(modified_response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(modified_response.headers['ETag'], etag)
+        self.assertEqual(modified_response.json()['count'], len(metadata))
+
     @mock.patch('enterprise_catalog.apps.api_client.enterprise_cache.EnterpriseApiClient')
     @ddt.data(
         False,
@@ -1997,6 +2202,85 @@ class DistinctCatalogQueriesViewTests(APITestMixin):
         assert str(self.catalog_query_one.id) in response['catalog_uuids_by_catalog_query_id']
 
 
+class EnterpriseCatalogBulkContainsContentItemsTests(APITestMixin):
+    """
+    Tests for the EnterpriseCatalogBulkContainsContentItems view.
+    """
+    url = reverse('api:v1:bulk-contains-content-items')
+
+    def setUp(self):
+        super().setUp()
+        self.set_up_catalog_learner()
+        self.enterprise_catalog = EnterpriseCatalogFactory(enterprise_uuid=self.enterprise_uuid)
+        self.other_catalog = EnterpriseCatalogFactory(enterprise_uuid=self.enterprise_uuid)
+        self.course = ContentMetadataFactory(content_key='edX+testX', content_type=COURSE)
+        self.course_run = ContentMetadataFactory(
+            content_key='course-v1:edX+testX+1T2025',
+            parent_content_key=self.course.content_key,
+            content_type=COURSE_RUN,
+        )
+        self.program = ContentMetadataFactory(content_key='program-uuid', content_type=PROGRAM)
+        self.add_metadata_to_catalog(self.enterprise_catalog, [self.course])
+        self.add_metadata_to_catalog(self.other_catalog, [self.program])
+
+    def test_bulk_contains_content_items(self):
+        """
+        Verify each item is resolved against its customer or catalog with a fixed number of queries.
+        """
+        request_json = {
+            'items': [
+                {'catalog_uuid': str(self.enterprise_catalog.uuid), 'content_keys': [self.course.content_key]},
+                {'catalog_uuid': str(self.enterprise_catalog.uuid), 'content_keys': [self.course_run.content_key]},
+                {'catalog_uuid': str(self.other_catalog.uuid), 'content_keys': [self.course.content_key]},
+                {'catalog_uuid': str(uuid.uuid4()), 'content_keys': [self.course.content_key]},
+                {'enterprise_customer_uuid': str(self.enterprise_uuid), 'content_keys': [self.program.content_key]},
+                {'enterprise_customer_uuid': str(self.enterprise_uuid), 'content_keys': ['fake-key']},
+            ]
+        }
+        with CaptureQueriesContext(connection) as single_item_queries:
+            self.client.post(self.url, {'items': request_json['items'][:1]})
+        with CaptureQueriesContext(connection) as all_items_queries:
+            response = self.client.post(self.url, request_json)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(all_items_queries), len(single_item_queries))
+
+        results = response.json()['results']
+        self.assertEqual(
+            [result['contains_content_items'] for result in results],
+            [True, True, False, False, True, False],
+        )
+        self.assertEqual(results[4]['catalog_list'], [str(self.other_catalog.uuid)])
+        self.assertEqual(results[5]['catalog_list'], [])
+
+    def test_bulk_contains_content_items_unauthorized_enterprise(self):
+        """
+        Verify the request is rejected if the user cannot access any of the requested customers' catalogs.
+        """
+        inaccessible_catalog = EnterpriseCatalogFactory()
+        request_json = {
+            'items': [
+                {'catalog_uuid': str(self.enterprise_catalog.uuid), 'content_keys': [self.course.content_key]},
+                {'catalog_uuid': str(inaccessible_catalog.uuid), 'content_keys': [self.course.content_key]},
+            ]
+        }
+        response = self.client.post(self.url, request_json)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_contains_content_items_invalid_item(self):
+        """
+        Verify items must reference exactly one of an enterprise customer or a catalog.
+        """
+        request_json = {
+            'items': [{
+                'catalog_uuid': str(self.enterprise_catalog.uuid),
+                'enterprise_customer_uuid': str(self.enterprise_uuid),
+                'content_keys': [self.course.content_key],
+            }]
+        }
+        response = self.client.post(self.url, request_json)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 @ddt.ddt
 class EnterpriseCustomerContentMetadataViewSetTests(APITestMixin):
     """
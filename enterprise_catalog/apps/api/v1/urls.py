@@ -32,6 +32,9 @@ from enterprise_catalog.apps.api.v1.views.default_catalog_results import (
 from enterprise_catalog.apps.api.v1.views.distinct_catalog_queries import (
     DistinctCatalogQueriesView,
 )
+from enterprise_catalog.apps.api.v1.views.enterprise_catalog_bulk_contains_content_items import (
+    EnterpriseCatalogBulkContainsContentItems,
+)
 from enterprise_catalog.apps.api.v1.views.enterprise_catalog_contains_content_items import (
     EnterpriseCatalogContainsContentItems,
 )
@@ -85,6 +88,10 @@ urlpatterns = [
     path('enterprise-catalogs/catalog_workbook', CatalogWorkbookView.as_view(),
          name='catalog-workbook'
          ),
+    path('enterprise-catalogs/bulk_contains_content_items',
+         EnterpriseCatalogBulkContainsContentItems.as_view({'post': 'post'}),
+         name='bulk-contains-content-items'
+         ),
     path('academies', AcademiesReadOnlyViewSet.as_view({'get': 'list'}),
          name='academies-list'
          ),
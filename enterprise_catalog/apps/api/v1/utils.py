@@ -126,3 +126,20 @@ def str_to_bool(s):
             raise TypeError(f'Invalid boolean string: {str}')
     except AttributeError as exc:
         raise TypeError('Argument is not boolean nor string') from exc
+
+
+def get_comma_separated_query_param(query_params, name):
+    """
+    Returns the values of a query parameter that may be repeated and/or hold comma separated values.
+
+    Returns:
+        (set or None): The set of non-empty values, or None if the parameter was not provided.
+    """
+    if name not in query_params:
+        return None
+    return {
+        value.strip()
+        for param_value in query_params.getlist(name)
+        for value in param_value.split(',')
+        if value.strip()
+    }
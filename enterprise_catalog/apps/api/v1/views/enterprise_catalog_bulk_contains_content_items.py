@@ -0,0 +1,128 @@
+from collections import defaultdict
+
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.status import HTTP_200_OK
+
+from enterprise_catalog.apps.api.v1.serializers import (
+    ContainsContentItemsBulkRequestSerializer,
+)
+from enterprise_catalog.apps.api.v1.views.base import BaseViewSet
+from enterprise_catalog.apps.catalog.models import EnterpriseCatalog
+
+
+class EnterpriseCatalogBulkContainsContentItems(BaseViewSet):
+    """
+    View that answers many ``contains_content_items`` checks, for any number of enterprise
+    customers and/or enterprise catalogs, in a single request.
+    """
+    permission_required = 'catalog.has_learner_access'
+    # The enterprise customer being checked by edx-rbac, set by ``check_permissions()``.
+    permission_enterprise_uuid = None
+
+    @cached_property
+    def items(self):
+        """
+        The validated items of the request.
+        """
+        serializer = ContainsContentItemsBulkRequestSerializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['items']
+
+    @cached_property
+    def enterprise_uuids(self):
+        """
+        The requested enterprise customer uuids.
+        """
+        return {item['enterprise_customer_uuid'] for item in self.items if item.get('enterprise_customer_uuid')}
+
+    @cached_property
+    def enterprise_catalogs(self):
+        """
+        Every catalog of the requested enterprise customers, along with the requested catalogs.
+        """
+        catalog_uuids = {item['catalog_uuid'] for item in self.items if item.get('catalog_uuid')}
+        return list(
+            EnterpriseCatalog.objects.filter(
+                Q(enterprise_uuid__in=self.enterprise_uuids) | Q(uuid__in=catalog_uuids)
+            ).order_by('created')
+        )
+
+    def check_permissions(self, request):
+        """
+        Runs edx-rbac's permission check against every enterprise customer the request reads from,
+        the requested ones along with those of the requested catalogs.
+        """
+        if not request.user.is_authenticated:
+            self.permission_denied(request)
+        catalog_enterprise_uuids = {catalog.enterprise_uuid for catalog in self.enterprise_catalogs}
+        for enterprise_uuid in self.enterprise_uuids | catalog_enterprise_uuids:
+            self.permission_enterprise_uuid = enterprise_uuid
+            super().check_permissions(request)
+
+    def get_permission_object(self):
+        """
+        Retrieves the appropriate object to use during edx-rbac's permission checks.
+
+        This object is passed to the rule predicate(s).
+        """
+        return str(self.permission_enterprise_uuid)
+
+    @action(detail=False)
+    def post(self, request, **kwargs):
+        """
+        Given a list of (enterprise customer or enterprise catalog, content keys) items, return
+        whether each customer or catalog contains any of the item's content keys.
+
+        Containment follows the same rules as the single ``contains_content_items`` endpoints,
+        but all items are resolved together with a fixed number of queries.
+
+        Request Data:
+            - items (list[dict]): Each item has ``content_keys`` (list[str]) and exactly one of
+            ``enterprise_customer_uuid`` or ``catalog_uuid``.
+
+        Response Data:
+            - results (list[dict]): One result per requested item, in the same order, echoing the item
+            along with ``contains_content_items`` (bool). Results for enterprise customers also include
+            ``catalog_list``, the UUIDs of the customer's catalogs that contain any of the content keys.
+        """
+        catalogs_by_uuid = {catalog.uuid: catalog for catalog in self.enterprise_catalogs}
+        catalogs_by_enterprise_uuid = defaultdict(list)
+        for catalog in self.enterprise_catalogs:
+            catalogs_by_enterprise_uuid[catalog.enterprise_uuid].append(catalog)
+
+        all_content_keys = {content_key for item in self.items for content_key in item['content_keys']}
+        matching_keys_by_catalog = EnterpriseCatalog.get_matching_content_keys_by_catalog(
+            self.enterprise_catalogs,
+            all_content_keys,
+        )
+
+        def catalog_contains_content_keys(catalog, content_keys):
+            return not matching_keys_by_catalog[catalog.uuid].isdisjoint(content_keys)
+
+        results = []
+        for item in self.items:
+            content_keys = item['content_keys']
+            if item.get('catalog_uuid'):
+                catalog = catalogs_by_uuid.get(item['catalog_uuid'])
+                results.append({
+                    'catalog_uuid': item['catalog_uuid'],
+                    'content_keys': content_keys,
+                    'contains_content_items': bool(catalog) and catalog_contains_content_keys(catalog, content_keys),
+                })
+            else:
+                catalog_list = [
+                    catalog.uuid
+                    for catalog in catalogs_by_enterprise_uuid[item['enterprise_customer_uuid']]
+                    if catalog_contains_content_keys(catalog, content_keys)
+                ]
+                results.append({
+                    'enterprise_customer_uuid': item['enterprise_customer_uuid'],
+                    'content_keys': content_keys,
+                    'contains_content_items': bool(catalog_list),
+                    'catalog_list': catalog_list,
+                })
+
+        return Response({'results': results}, status=HTTP_200_OK)
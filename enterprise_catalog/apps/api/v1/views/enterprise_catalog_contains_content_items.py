@@ -1,5 +1,8 @@
+import hashlib
+
+from django.core.cache import cache
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from django.utils.functional import cached_property
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.renderers import JSONRenderer
@@ -7,9 +10,11 @@ from rest_framework.response import Response
 from rest_framework_xml.renderers import XMLRenderer
 
 from enterprise_catalog.apps.api.constants import (
+    CONTAINS_CONTENT_ITEMS_CACHE_KEY_TPL,
     CONTAINS_CONTENT_ITEMS_VIEW_CACHE_TIMEOUT_SECONDS,
 )
 from enterprise_catalog.apps.api.v1.decorators import (
+    conditional_on_content_version,
     require_at_least_one_query_parameter,
 )
 from enterprise_catalog.apps.api.v1.serializers import (
@@ -18,17 +23,26 @@ from enterprise_catalog.apps.api.v1.serializers import (
 from enterprise_catalog.apps.api.v1.utils import unquote_course_keys
 from enterprise_catalog.apps.api.v1.views.base import BaseViewSet
 from enterprise_catalog.apps.catalog.models import EnterpriseCatalog
+from enterprise_catalog.apps.catalog.utils import get_content_keys_hash
 
 
 class EnterpriseCatalogContainsContentItems(BaseViewSet, viewsets.ReadOnlyModelViewSet):
     """
     View to determine if an enterprise catalog contains certain content
     """
-    queryset = EnterpriseCatalog.objects.all().order_by('created')
+    queryset = EnterpriseCatalog.objects.select_related('catalog_query').order_by('created')
     renderer_classes = [JSONRenderer, XMLRenderer]
     serializer_class = EnterpriseCatalogSerializer
     permission_required = 'catalog.has_learner_access'
     lookup_field = 'uuid'
+    include_restricted = False
+
+    @cached_property
+    def enterprise_catalog(self):
+        """
+        The enterprise catalog specified by the request path, fetched once per request.
+        """
+        return self.get_object()
 
     def get_permission_object(self):
         """
@@ -37,23 +51,57 @@ class EnterpriseCatalogContainsContentItems(BaseViewSet, viewsets.ReadOnlyModelV
         This object is passed to the rule predicate(s).
         """
         if self.kwargs.get('uuid'):
-            enterprise_catalog = self.get_object()
-            return str(enterprise_catalog.enterprise_uuid)
+            return str(self.enterprise_catalog.enterprise_uuid)
         return None
 
+    def get_content_version(self):
+        """
+        Returns the ``(last_modified, etag)`` content version of the catalog, used for conditional requests.
+
+        Whether content is contained by the catalog only changes along with the content version of its
+        catalog query, so this is derived from that version without querying the database.
+        """
+        enterprise_catalog = self.enterprise_catalog
+        if not enterprise_catalog.catalog_query:
+            return enterprise_catalog.get_content_version(include_customer_modified=False)
+        version_token, version_bumped_at = enterprise_catalog.catalog_query.content_version
+        version = f'{enterprise_catalog.uuid}:{enterprise_catalog.catalog_query_id}:{version_token}'
+        etag = hashlib.md5(version.encode('utf-8')).hexdigest()
+        return max(version_bumped_at, enterprise_catalog.modified), etag
+
     def catalog_contains_content_items(self, content_keys):
         """
         Returns a boolean indicating whether all of the provided content_keys
         are contained by the catalog record associated with the current request.
+
+        Results are cached per catalog, content version of its catalog query, and set of content keys,
+        so they are not reused once the content of the catalog query is refreshed. They still expire after
+        the view's cache timeout, since course runs and restricted runs are resolved through content that
+        other catalog queries' syncs update without changing this version.
         """
-        enterprise_catalog = self.get_object()
-        return enterprise_catalog.contains_content_keys(content_keys)
+        enterprise_catalog = self.enterprise_catalog
+        if not enterprise_catalog.catalog_query:
+            return enterprise_catalog.contains_content_keys(content_keys, include_restricted=self.include_restricted)
+
+        version_token, _ = enterprise_catalog.catalog_query.content_version
+        cache_key = CONTAINS_CONTENT_ITEMS_CACHE_KEY_TPL.format(
+            catalog_uuid=enterprise_catalog.uuid,
+            catalog_query_id=enterprise_catalog.catalog_query_id,
+            version=version_token,
+            include_restricted=self.include_restricted,
+            content_keys_hash=get_content_keys_hash(content_keys),
+        )
+        contains_content_items = cache.get(cache_key)
+        if contains_content_items is None:
+            contains_content_items = enterprise_catalog.contains_content_keys(
+                content_keys,
+                include_restricted=self.include_restricted,
+            )
+            cache.set(cache_key, contains_content_items, CONTAINS_CONTENT_ITEMS_VIEW_CACHE_TIMEOUT_SECONDS)
+        return contains_content_items
 
-    # Becuase the edx-rbac perms are built around a part of the URL
-    # path, here (the uuid of the catalog), we can utilize per-view caching,
-    # rather than per-user caching.
-    @method_decorator(cache_page(CONTAINS_CONTENT_ITEMS_VIEW_CACHE_TIMEOUT_SECONDS))
     @method_decorator(require_at_least_one_query_parameter('course_run_ids', 'program_uuids'))
+    @conditional_on_content_version
     @action(detail=True)
     def contains_content_items(self, request, uuid, course_run_ids, program_uuids, **kwargs):  # pylint: disable=unused-argument
         """
@@ -7,6 +7,7 @@ from rest_framework.status import HTTP_400_BAD_REQUEST
 from rest_framework_xml.renderers import XMLRenderer
 
 from enterprise_catalog.apps.api.v1.decorators import (
+    conditional_on_content_version,
     require_at_least_one_query_parameter,
 )
 from enterprise_catalog.apps.api.v1.serializers import (
@@ -40,6 +41,12 @@ class EnterpriseCatalogDiff(BaseViewSet, viewsets.ModelViewSet):
             return str(enterprise_catalog.enterprise_uuid)
         return None
 
+    def get_content_version(self):
+        """
+        Returns the ``(last_modified, etag)`` content version of the catalog, used for conditional requests.
+        """
+        return self.get_object().get_content_version()
+
     @action(detail=True)
     def post(self, request, **kwargs):
         content_keys = []
@@ -60,6 +67,13 @@ class EnterpriseCatalogDiff(BaseViewSet, viewsets.ModelViewSet):
                     status=HTTP_400_BAD_REQUEST
                 )
 
+        return self.conditional_catalog_diff(request, content_keys)
+
+    @conditional_on_content_version
+    def conditional_catalog_diff(self, request, content_keys):  # pylint: disable=unused-argument
+        """
+        Returns the catalog diff, unless the client already has the current version of the catalog's content.
+        """
         return self.catalog_diff(content_keys)
 
     def catalog_diff(self, content_keys):
@@ -1,6 +1,8 @@
-from asyncio.log import logger
 from collections import OrderedDict
 
+from django.conf import settings
+from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils.functional import cached_property
 from drf_spectacular.utils import (
@@ -15,8 +17,15 @@ from rest_framework.generics import GenericAPIView
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.status import HTTP_400_BAD_REQUEST
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework_xml.renderers import XMLRenderer
 
+from enterprise_catalog.apps.api.v1.decorators import (
+    conditional_on_content_version,
+)
+from enterprise_catalog.apps.api.v1.pagination import (
+    ContentMetadataCursorPagination,
+)
 from enterprise_catalog.apps.api.v1.serializers import (
     ContentMetadataListResponseSerializer,
     ContentMetadataSerializer,
@@ -25,7 +34,7 @@ from enterprise_catalog.apps.api.v1.throttles import (
     GetContentMetadataHourlyThrottle,
     GetContentMetadataMinuteThrottle,
 )
-from enterprise_catalog.apps.api.v1.utils import is_any_course_run_active
+from enterprise_catalog.apps.api.v1.utils import get_comma_separated_query_param
 from enterprise_catalog.apps.api.v1.views.base import BaseViewSet
 from enterprise_catalog.apps.catalog.models import EnterpriseCatalog
 
@@ -50,6 +59,26 @@ class EnterpriseCatalogGetContentMetadata(BaseViewSet, GenericAPIView):
         uuid = self.kwargs.get('uuid')
         return get_object_or_404(EnterpriseCatalog, uuid=uuid)
 
+    @property
+    def use_cursor_pagination(self):
+        """
+        Whether the client opted into keyset pagination via the `cursor_pagination` query param.
+        """
+        return self.request.query_params.get('cursor_pagination', '').lower() in ('1', 'true')
+
+    @property
+    def paginator(self):
+        """
+        The paginator instance for this request, which is a cursor paginator if the client
+        opted into cursor pagination, and the default page number paginator otherwise.
+        """
+        if not hasattr(self, '_paginator'):
+            if self.use_cursor_pagination:
+                self._paginator = ContentMetadataCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def get_permission_object(self):
         """
         Retrieves the appropriate object to use during edx-rbac's permission checks.
@@ -58,6 +87,23 @@ class EnterpriseCatalogGetContentMetadata(BaseViewSet, GenericAPIView):
         """
         return str(self.enterprise_catalog.enterprise_uuid)
 
+    def get_content_version(self):
+        """
+        Returns the ``(last_modified, etag)`` content version of the catalog, used for conditional requests.
+        """
+        return self.enterprise_catalog.get_content_version()
+
+    def get_serializer_context(self):
+        """
+        Adds the catalog and the optional ``fields`` / ``exclude_fields`` projection of the request
+        to the context of the content metadata serializer.
+        """
+        context = super().get_serializer_context()
+        context['enterprise_catalog'] = self.enterprise_catalog
+        context['fields'] = get_comma_separated_query_param(self.request.query_params, 'fields')
+        context['exclude_fields'] = get_comma_separated_query_param(self.request.query_params, 'exclude_fields')
+        return context
+
     def get_queryset(self, **kwargs):
         """
         Returns all of the json of content metadata associated with the catalog.
@@ -68,8 +114,20 @@ class EnterpriseCatalogGetContentMetadata(BaseViewSet, GenericAPIView):
         if content_filter:
             queryset = self.enterprise_catalog.get_matching_content(content_keys=content_filter)
 
+        queryset = queryset.filter(self.get_content_status_filter(content_filter))
         return queryset.order_by('catalog_queries')
 
+    def get_content_status_filter(self, content_keys_filter):
+        """
+        Returns the filter which excludes unpublished courses (no published runs) and, when no
+        content keys filter is given, inactive courses, using the status flags precomputed when
+        the content metadata was saved.
+        """
+        status_filter = Q(is_published=True)
+        if not content_keys_filter:
+            status_filter &= Q(is_active=True)
+        return status_filter
+
     def get_response_with_enterprise_fields(self, response):
         """
         Add on the enterprise fields to the top level of the DRF response
@@ -90,11 +148,7 @@ class EnterpriseCatalogGetContentMetadata(BaseViewSet, GenericAPIView):
             "Returns paginated content metadata for a catalog. "
             "Unpublished courses (no published runs) are always excluded from `results`. "
             "Inactive courses are also excluded unless `content_keys` is provided. "
-            "\n\n"
-            "**Note on `count`:** in the default paginated path, `count` reflects a SQL COUNT of all "
-            "catalog rows before the unpublished/inactive filters are applied, so it may be slightly "
-            "higher than the number of items actually returned across all pages. "
-            "Use `traverse_pagination=true` to get an exact filtered count on a single page."
+            "`count` is the exact number of items returned across all pages."
         ),
         parameters=[
             OpenApiParameter(
@@ -112,9 +166,53 @@ class EnterpriseCatalogGetContentMetadata(BaseViewSet, GenericAPIView):
                 type=bool,
                 location=OpenApiParameter.QUERY,
                 description=(
-                    "If true, all results are collected onto a single page and `count` is exact "
-                    "(filtered). If false or omitted, standard pagination applies and `count` may "
-                    "be slightly inflated by unpublished or inactive courses."
+                    "If true, all results are collected onto a single page. "
+                    "If false or omitted, standard pagination applies."
+                ),
+            ),
+            OpenApiParameter(
+                name="stream",
+                type=bool,
+                location=OpenApiParameter.QUERY,
+                description=(
+                    "Only used with `traverse_pagination=true` and JSON responses. If true, the single page "
+                    "of results is fetched, serialized, and written to the response incrementally. "
+                    "The response body is the same, except that `count` comes after `results`."
+                ),
+            ),
+            OpenApiParameter(
+                name="cursor_pagination",
+                type=bool,
+                location=OpenApiParameter.QUERY,
+                description=(
+                    "If true, pages are fetched by keyset (cursor) instead of page number. Every page costs "
+                    "the same regardless of depth, and the response omits `count`. Follow the `next` link "
+                    "to fetch subsequent pages; the `page` param is ignored."
+                ),
+            ),
+            OpenApiParameter(
+                name="fields",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description=(
+                    "A comma separated list of the only fields to include in each item of `results`, "
+                    "e.g. `key,title,course_runs`. Computed fields that are left out, such as `enrollment_url`, "
+                    "are not computed at all."
+                ),
+            ),
+            OpenApiParameter(
+                name="exclude_fields",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="A comma separated list of fields to leave out of each item of `results`.",
+            ),
+            OpenApiParameter(
+                name="If-None-Match",
+                type=str,
+                location=OpenApiParameter.HEADER,
+                description=(
+                    "The `ETag` of a previous response. If the catalog's content has not changed since, "
+                    "an empty 304 response is returned. `If-Modified-Since` is supported as well."
                 ),
             ),
             OpenApiParameter(
@@ -214,6 +312,12 @@ class EnterpriseCatalogGetContentMetadata(BaseViewSet, GenericAPIView):
         Query params:
             (Optional) content_keys (list): list of content keys for which to fetch content metadata for. If no content
             keys are provided then all content under the catalog will be fetched.
+            (Optional) fields (str): comma separated list of the only fields to serialize for each item.
+            (Optional) exclude_fields (str): comma separated list of fields to leave out of each item.
+
+        Supports conditional requests: the response carries `ETag` and `Last-Modified` headers derived from the
+        catalog's content version, and a 304 is returned without loading any content metadata if the client
+        already has the current version.
         """
         content_keys_filter = request.query_params.getlist('content_keys')
         if content_keys_filter == "[]":
@@ -226,92 +330,44 @@ class EnterpriseCatalogGetContentMetadata(BaseViewSet, GenericAPIView):
                     status=HTTP_400_BAD_REQUEST
                 )
 
-        traverse_pagination = request.query_params.get('traverse_pagination', False)
+        return self.respond_with_content_metadata(request, content_keys_filter)
 
-        return self.get_content_metadata(request, traverse_pagination, content_keys_filter)
-
-    def is_unpublished(self, item):
+    @conditional_on_content_version
+    def respond_with_content_metadata(self, request, content_keys_filter):
         """
-        Determines if a course is unpublished (has no published course runs).
-        Args:
-            item (ContentMetadata): The content metadata item to check.
-        Returns:
-            bool: True if the course is unpublished, False otherwise.
-                For courses, checks if any course run has published status.
-                For other content types, always returns False (not unpublished).
+        Returns the content metadata response appropriate for the request's query params, unless the
+        client already has the current version of the catalog's content.
         """
-        if item.content_type == 'course':
-            course_runs = item.json_metadata.get('course_runs', [])
-
-            # If no course runs, check top-level status
-            if not course_runs:
-                status = item.json_metadata.get('status', '').lower()
-                is_unpublished = status == 'unpublished'
-                if is_unpublished:
-                    logger.debug(f'[get_content_metadata]: Content item {item.content_key} is unpublished (no runs).')
-                return is_unpublished
-            # Check if ANY run is published
-            has_published_run = any(
-                run.get('status', '').lower() == 'published'
-                for run in course_runs
-            )
-
-            if not has_published_run:
-                logger.debug(f'[get_content_metadata]: Content item {item.content_key} has no published runs.')
-
-            return not has_published_run
-        return False
+        traverse_pagination = request.query_params.get('traverse_pagination', False)
+        stream = request.query_params.get('stream', '').lower() in ('1', 'true')
+        if traverse_pagination and stream and request.accepted_renderer.format == 'json':
+            return self.stream_content_metadata(content_keys_filter)
 
-    def is_active(self, item):
-        """
-        Determines if a content item is active.
-        Args:
-            item (ContentMetadata): The content metadata item to check.
-        Returns:
-            bool: True if the item is active, False otherwise.
-                For courses, checks if any course run is active.
-                For other content types, always returns True.
-        """
-        if item.content_type == 'course':
-            active = is_any_course_run_active(
-                item.json_metadata.get('course_runs', []))
-            if not active:
-                logger.debug(f'[get_content_metadata]: Content item {item.content_key} is not active.')
-            return active
-        return True
-
-    def _apply_content_filters(self, items, content_keys_filter):
-        """
-        Remove unpublished courses and, when no content_keys filter is active, inactive courses.
-        Reads json_metadata only for the given items, not the whole catalog.
-        """
-        items = [item for item in items if not self.is_unpublished(item)]
-        if not content_keys_filter:
-            items = [item for item in items if self.is_active(item)]
-        return items
+        return self.get_content_metadata(request, traverse_pagination, content_keys_filter)
 
     def get_content_metadata(self, request, traverse_pagination, content_keys_filter):
         """
         Returns content metadata associated with the enterprise catalog, excluding unpublished courses.
 
-        `traverse_pagination`: if true, materializes and filters the full result set onto one page;
-        `count` in the response is exact. If false, uses SQL COUNT + LIMIT/OFFSET so `count` may
-        be slightly inflated by unpublished or inactive courses that exist in the catalog but are
-        filtered from `results`.
+        `traverse_pagination`: if true, materializes the full result set onto one page. If false,
+        uses SQL COUNT + LIMIT/OFFSET. Unpublished and inactive courses are filtered out in SQL,
+        so `count` is exact either way.
 
         `content_keys_filter`: if provided, only content matching those keys is returned and the
         inactive-course filter is skipped.
+
+        If the client opted into cursor pagination, pages are fetched by primary key instead of
+        LIMIT/OFFSET, and no COUNT is issued.
         """
         queryset = self.filter_queryset(self.get_queryset(content_keys_filter=content_keys_filter))
         # paginate_queryset issues SQL COUNT + LIMIT/OFFSET; no json_metadata loaded yet
         page = self.paginate_queryset(queryset)
 
         context = self.get_serializer_context()
-        context['enterprise_catalog'] = self.enterprise_catalog
 
-        # Traverse pagination: materialize and filter the full result set so count is exact
+        # Traverse pagination: materialize the full result set onto a single page
         if page is None or traverse_pagination:
-            results = self._apply_content_filters(queryset, content_keys_filter)
+            results = list(queryset)
             serializer = ContentMetadataSerializer(results, context=context, many=True)
             ordered_data = OrderedDict([
                 ('previous', None),
@@ -321,9 +377,43 @@ class EnterpriseCatalogGetContentMetadata(BaseViewSet, GenericAPIView):
             ])
             return self.get_response_with_enterprise_fields(Response(ordered_data))
 
-        # Normal paginated path: filter the page only (page_size rows, not the whole catalog).
-        # The paginator's COUNT is slightly inflated when inactive/unpublished items exist,
-        # but next/previous links navigate correctly and the serialization cost is bounded.
-        page = self._apply_content_filters(page, content_keys_filter)
         serializer = ContentMetadataSerializer(page, context=context, many=True)
         return self.get_response_with_enterprise_fields(self.get_paginated_response(serializer.data))
+
+    def stream_content_metadata(self, content_keys_filter):
+        """
+        Returns the same payload as a traversed `get_content_metadata` response, but as a
+        `StreamingHttpResponse`. Records are read from the database and serialized
+        `GET_CONTENT_METADATA_STREAMING_CHUNK_SIZE` at a time, so memory use doesn't grow
+        with the size of the catalog. Because the count is only known once every record has been
+        read, it is written after the results.
+
+        Each chunk is a separate query for the records after the last id of the previous chunk,
+        since MySQL clients otherwise buffer the whole result set of a single query.
+        """
+        queryset = self.filter_queryset(
+            self.get_queryset(content_keys_filter=content_keys_filter)
+        ).order_by('id')
+        context = self.get_serializer_context()
+        chunk_size = settings.GET_CONTENT_METADATA_STREAMING_CHUNK_SIZE
+        encoder = JSONEncoder()
+
+        def generate_content():
+            header = encoder.encode({
+                'uuid': self.enterprise_catalog.uuid,
+                'title': self.enterprise_catalog.title,
+                'enterprise_customer': self.enterprise_catalog.enterprise_uuid,
+                'previous': None,
+                'next': None,
+            })
+            yield header[:-1] + ', "results": ['
+            count = 0
+            last_id = 0
+            while chunk := list(queryset.filter(id__gt=last_id)[:chunk_size]):
+                for item in ContentMetadataSerializer(chunk, context=context, many=True).data:
+                    yield (', ' if count else '') + encoder.encode(item)
+                    count += 1
+                last_id = chunk[-1].id
+            yield f'], "count": {count}}}'
+
+        return StreamingHttpResponse(generate_content(), content_type='application/json')
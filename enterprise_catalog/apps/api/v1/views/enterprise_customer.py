@@ -22,7 +22,13 @@ from enterprise_catalog.apps.api.v1.serializers import (
 from enterprise_catalog.apps.api.v1.utils import unquote_course_keys
 from enterprise_catalog.apps.api.v1.views.base import BaseViewSet
 from enterprise_catalog.apps.api_client.algolia import AlgoliaSearchClient
-from enterprise_catalog.apps.catalog.models import EnterpriseCatalog
+from enterprise_catalog.apps.catalog.models import (
+    EnterpriseCatalog,
+    EnterpriseCatalogContentMembership,
+)
+from enterprise_catalog.apps.catalog.waffle import (
+    USE_CATALOG_CONTENT_MEMBERSHIP_SWITCH,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -72,12 +78,15 @@ class EnterpriseCustomerViewSet(BaseViewSet):
         """
         return self.kwargs.get('enterprise_uuid')
 
-    def filter_content_keys(self, catalog, content_keys):
-        return catalog.filter_content_keys(content_keys)
+    def filter_content_keys(self, catalogs, content_keys):
+        return EnterpriseCatalog.filter_content_keys_for_catalogs(catalogs, content_keys)
 
     def contains_content_keys(self, catalog, content_keys):
         return catalog.contains_content_keys(content_keys)
 
+    def get_matching_content_memberships(self, enterprise_uuid, content_keys):
+        return EnterpriseCatalogContentMembership.objects.matching_content_keys(enterprise_uuid, content_keys)
+
     def get_metadata_by_uuid(self, catalog, content_uuid):
         return catalog.content_metadata.filter(content_uuid=content_uuid).first()
 
@@ -121,18 +130,30 @@ class EnterpriseCustomerViewSet(BaseViewSet):
                 f'Error: invalid enterprice customer uuid: "{enterprise_uuid}" provided.',
                 status=status.HTTP_400_BAD_REQUEST
             )
-        customer_catalogs = EnterpriseCatalog.objects.filter(enterprise_uuid=enterprise_uuid)
-
         any_catalog_contains_content_items = False
         catalogs_that_contain_course = []
         content_keys = requested_course_or_run_keys + program_uuids
-        for catalog in customer_catalogs:
-            if self.contains_content_keys(catalog, content_keys):
-                any_catalog_contains_content_items = True
-                if not (get_catalogs_containing_specified_content_ids or get_catalog_list):
-                    # Break as soon as we find a catalog that contains the specified content
-                    break
-                catalogs_that_contain_course.append(catalog.uuid)
+        if USE_CATALOG_CONTENT_MEMBERSHIP_SWITCH.is_enabled():
+            # Answer containment for all of the customer's catalogs at once.
+            matching_memberships = self.get_matching_content_memberships(enterprise_uuid, content_keys)
+            if get_catalogs_containing_specified_content_ids or get_catalog_list:
+                catalogs_that_contain_course = list(
+                    matching_memberships.order_by('enterprise_catalog_id').values_list(
+                        'enterprise_catalog_id', flat=True,
+                    ).distinct()
+                )
+                any_catalog_contains_content_items = bool(catalogs_that_contain_course)
+            else:
+                any_catalog_contains_content_items = matching_memberships.exists()
+        else:
+            customer_catalogs = EnterpriseCatalog.objects.filter(enterprise_uuid=enterprise_uuid)
+            for catalog in customer_catalogs:
+                if self.contains_content_keys(catalog, content_keys):
+                    any_catalog_contains_content_items = True
+                    if not (get_catalogs_containing_specified_content_ids or get_catalog_list):
+                        # Break as soon as we find a catalog that contains the specified content
+                        break
+                    catalogs_that_contain_course.append(catalog.uuid)
 
         response_data = {
             'contains_content_items': any_catalog_contains_content_items,
@@ -154,10 +175,7 @@ class EnterpriseCustomerViewSet(BaseViewSet):
         else:
             customer_catalogs = EnterpriseCatalog.objects.filter(enterprise_uuid=enterprise_uuid)
 
-        filtered_content_keys = set()
-        for catalog in customer_catalogs:
-            if items_included := self.filter_content_keys(catalog, content_keys):
-                filtered_content_keys = filtered_content_keys.union(items_included)
+        filtered_content_keys = self.filter_content_keys(customer_catalogs, content_keys)
 
         response_data = {
             'filtered_content_keys': list(filtered_content_keys),
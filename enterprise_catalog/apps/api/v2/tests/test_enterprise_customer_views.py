@@ -6,6 +6,7 @@ import ddt
 import pytest
 import pytz
 from rest_framework import status
+from waffle.testutils import override_switch
 
 from enterprise_catalog.apps.api.base.tests.enterprise_customer_views import (
     BaseEnterpriseCustomerViewSetTests,
@@ -15,6 +16,9 @@ from enterprise_catalog.apps.catalog.constants import (
     COURSE_RUN,
     RESTRICTED_RUNS_ALLOWED_KEY,
 )
+from enterprise_catalog.apps.catalog.models import (
+    EnterpriseCatalogContentMembership,
+)
 from enterprise_catalog.apps.catalog.tests.factories import (
     ContentMetadataFactory,
     EnterpriseCatalogFactory,
@@ -22,6 +26,9 @@ from enterprise_catalog.apps.catalog.tests.factories import (
     RestrictedRunAllowedForRestrictedCourseFactory,
 )
 from enterprise_catalog.apps.catalog.utils import localized_utcnow
+from enterprise_catalog.apps.catalog.waffle import (
+    USE_CATALOG_CONTENT_MEMBERSHIP_SWITCH,
+)
 
 
 @ddt.ddt
@@ -176,6 +183,34 @@ class EnterpriseCustomerViewSetTests(BaseEnterpriseCustomerViewSetTests):
         self.assertFalse(response_payload.get('contains_content_items'))
         self.assertEqual(response_payload['catalog_list'], [])
 
+    @override_switch(USE_CATALOG_CONTENT_MEMBERSHIP_SWITCH.name, active=True)
+    def test_contains_catalog_key_restricted_runs_allowed_from_membership(self):
+        """
+        Tests that a customer is considered to contain a restricted run allowed by one of its
+        catalogs when containment is answered from the content membership table, and that
+        the v1 endpoint still treats the restricted run as non-existent.
+        """
+        catalog = EnterpriseCatalogFactory(enterprise_uuid=self.enterprise_uuid)
+        catalog_b = EnterpriseCatalogFactory(enterprise_uuid=self.enterprise_uuid)
+
+        content_one, _, restricted_run = self._create_restricted_course_and_run(catalog)
+        self.add_metadata_to_catalog(catalog, [content_one])
+        self.add_metadata_to_catalog(catalog_b, [content_one])
+        for enterprise_catalog in (catalog, catalog_b):
+            EnterpriseCatalogContentMembership.refresh_for_catalog_query(enterprise_catalog.catalog_query)
+
+        query_string = \
+            f'?course_run_ids={restricted_run.content_key}&get_catalogs_containing_specified_content_ids=true'
+        response_payload = self.client.get(self._get_contains_content_base_url() + query_string).json()
+        self.assertTrue(response_payload.get('contains_content_items'))
+        # catalog_b doesn't allow the restricted run
+        self.assertEqual(response_payload['catalog_list'], [str(catalog.uuid)])
+
+        self.VERSION = 'v1'
+        response_payload = self.client.get(self._get_contains_content_base_url() + query_string).json()
+        self.assertFalse(response_payload.get('contains_content_items'))
+        self.assertEqual(response_payload['catalog_list'], [])
+
     def test_filter_content_items_restricted_runs_allowed(self):
         """
         Tests that restricted runs are filtered in/out.
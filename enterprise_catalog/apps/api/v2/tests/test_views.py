@@ -8,12 +8,14 @@ from rest_framework.reverse import reverse
 
 from enterprise_catalog.apps.api.v1.tests.mixins import APITestMixin
 from enterprise_catalog.apps.catalog.constants import (
+    COURSE_RUN,
     COURSE_RUN_RESTRICTION_TYPE_KEY,
     RESTRICTION_FOR_B2B,
 )
 from enterprise_catalog.apps.catalog.models import ContentMetadata
 from enterprise_catalog.apps.catalog.tests import test_utils
 from enterprise_catalog.apps.catalog.tests.factories import (
+    ContentMetadataFactory,
     EnterpriseCatalogFactory,
 )
 
@@ -53,6 +55,30 @@ class EnterpriseCatalogGetContentMetadataTests(APITestMixin):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.json()['results'], [])
 
+    @mock.patch('enterprise_catalog.apps.api_client.enterprise_cache.EnterpriseApiClient')
+    def test_get_content_metadata_cursor_pagination(self, mock_api_client):
+        """
+        Verify the v2 get_content_metadata endpoint supports cursor pagination.
+        """
+        mock_api_client.return_value.get_enterprise_customer.return_value = {
+            'slug': self.enterprise_slug,
+            'enable_learner_portal': True,
+            'modified': str(datetime.now().replace(tzinfo=pytz.UTC)),
+        }
+        metadata = ContentMetadataFactory.create_batch(3, content_type=COURSE_RUN)
+        self.enterprise_catalog.catalog_query.contentmetadata_set.add(*metadata)
+
+        url = self._get_content_metadata_url(self.enterprise_catalog) + '?cursor_pagination=true&page_size=2'
+        first_page = self.client.get(url).json()
+        second_page = self.client.get(first_page['next']).json()
+
+        assert 'count' not in first_page
+        self.assertEqual(
+            [item['key'] for item in first_page['results'] + second_page['results']],
+            [item.content_key for item in metadata],
+        )
+        self.assertIsNone(second_page['next'])
+
     @mock.patch('enterprise_catalog.apps.api_client.enterprise_cache.EnterpriseApiClient')
     @ddt.data(
         # Create a course with both an unrestricted (run1) and restricted run (run2), and the restricted run is allowed
@@ -483,3 +509,67 @@ class EnterpriseCatalogGetContentMetadataTests(APITestMixin):
 
         for course_run in course_runs:
             self.assertIn(course_run.get('key'), filtered_content_keys)
+
+    @mock.patch('enterprise_catalog.apps.api_client.enterprise_cache.EnterpriseApiClient')
+    def test_get_content_metadata_course_only_published_with_restricted_runs(self, mock_api_client):
+        """
+        Test that a course whose only published and active run is a restricted run allowed by the catalog
+        is returned (and counted), even though the unrestricted version of the course is unpublished.
+        """
+        mock_api_client.return_value.get_enterprise_customer.return_value = {
+            'slug': self.enterprise_slug,
+            'enable_learner_portal': True,
+            'modified': str(datetime.now().replace(tzinfo=pytz.UTC)),
+        }
+        unpublished_run = {
+            'key': 'course-v1:edX+course+run1',
+            'status': 'unpublished',
+            'is_enrollable': True,
+            'is_marketable': True,
+        }
+        restricted_run = {
+            'key': 'course-v1:edX+course+run2',
+            'status': 'published',
+            'is_enrollable': True,
+            'is_marketable': True,
+            COURSE_RUN_RESTRICTION_TYPE_KEY: RESTRICTION_FOR_B2B,
+        }
+        main_catalog, _, content_metadata, _ = test_utils.setup_scaffolding(
+            create_catalog_query={
+                '11111111-1111-1111-1111-111111111111': {
+                    'content_filter': {
+                        'restricted_runs_allowed': {
+                            'course:edX+course': ['course-v1:edX+course+run2'],
+                        },
+                    },
+                },
+            },
+            create_content_metadata={
+                'edX+course': {
+                    'create_runs': {
+                        'course-v1:edX+course+run1': {'is_restricted': False},
+                        'course-v1:edX+course+run2': {'is_restricted': True},
+                    },
+                    'json_metadata': {'key': 'edX+course', 'course_runs': [unpublished_run]},
+                    'associate_with_catalog_query': '11111111-1111-1111-1111-111111111111',
+                },
+            },
+            create_restricted_courses={
+                1: {
+                    'content_key': 'edX+course',
+                    'catalog_query': '11111111-1111-1111-1111-111111111111',
+                    'json_metadata': {'key': 'edX+course', 'course_runs': [unpublished_run, restricted_run]},
+                },
+            },
+            create_restricted_run_allowed_for_restricted_course=[
+                {'course': 1, 'run': 'course-v1:edX+course+run2'},
+            ],
+        )
+        main_catalog.enterprise_uuid = self.enterprise_uuid
+        main_catalog.save()
+        self.assertFalse(content_metadata['edX+course'].is_published)
+
+        response = self.client.get(self._get_content_metadata_url(main_catalog))
+
+        self.assertEqual(response.data.get('count'), 1)
+        self.assertEqual(response.data.get('results')[0].get('key'), 'edX+course')
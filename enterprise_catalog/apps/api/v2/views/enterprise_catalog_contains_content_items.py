@@ -13,11 +13,4 @@ class EnterpriseCatalogContainsContentItemsV2(EnterpriseCatalogContainsContentIt
     Viewset to indicate if given content keys are contained by a catalog, with
     restricted content taken into account.
     """
-    def catalog_contains_content_items(self, content_keys):
-        """
-        Returns a boolean indicating whether all of the provided content_keys
-        are contained by the catalog record associated with the current request.
-        Takes restricted content into account.
-        """
-        enterprise_catalog = self.get_object()
-        return enterprise_catalog.contains_content_keys(content_keys, include_restricted=True)
+    include_restricted = True
@@ -1,8 +1,11 @@
 import logging
 
+from django.db.models import Exists, OuterRef, Q
+
 from enterprise_catalog.apps.api.v1.views.enterprise_catalog_get_content_metadata import (
     EnterpriseCatalogGetContentMetadata,
 )
+from enterprise_catalog.apps.catalog.models import RestrictedCourseMetadata
 
 
 logger = logging.getLogger(__name__)
@@ -25,4 +28,27 @@ class EnterpriseCatalogGetContentMetadataV2(EnterpriseCatalogGetContentMetadata)
                 include_restricted=True
             )
 
+        queryset = queryset.filter(self.get_content_status_filter(content_filter))
         return queryset.order_by('catalog_queries')
+
+    def get_content_status_filter(self, content_keys_filter):
+        """
+        Same as the v1 filter, but a course also passes when the version of it which includes the
+        restricted runs allowed by this catalog's query is published (and active), since that is
+        the json metadata this view serves for it.
+        """
+        catalog_query = self.enterprise_catalog.catalog_query
+        if not catalog_query or not self.enterprise_catalog.restricted_runs_allowed:
+            return super().get_content_status_filter(content_keys_filter)
+
+        def restricted_override_exists(**status_flags):
+            return Exists(RestrictedCourseMetadata.objects.filter(
+                unrestricted_parent=OuterRef('pk'),
+                catalog_query=catalog_query,
+                **status_flags,
+            ))
+
+        status_filter = Q(is_published=True) | restricted_override_exists(is_published=True)
+        if not content_keys_filter:
+            status_filter &= Q(is_active=True) | restricted_override_exists(is_active=True)
+        return status_filter
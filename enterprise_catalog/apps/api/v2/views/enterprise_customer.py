@@ -5,7 +5,11 @@ from rest_framework.decorators import action
 from enterprise_catalog.apps.api.v1.views.enterprise_customer import (
     EnterpriseCustomerViewSet,
 )
-from enterprise_catalog.apps.catalog.models import ContentMetadata
+from enterprise_catalog.apps.catalog.models import (
+    ContentMetadata,
+    EnterpriseCatalog,
+    EnterpriseCatalogContentMembership,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -35,12 +39,19 @@ class EnterpriseCustomerViewSetV2(EnterpriseCustomerViewSet):
             include_restricted=True,
         ).first()
 
-    def filter_content_keys(self, catalog, content_keys):
-        return catalog.filter_content_keys(content_keys, include_restricted=True)
+    def filter_content_keys(self, catalogs, content_keys):
+        return EnterpriseCatalog.filter_content_keys_for_catalogs(catalogs, content_keys, include_restricted=True)
 
     def contains_content_keys(self, catalog, content_keys):
         return catalog.contains_content_keys(content_keys, include_restricted=True)
 
+    def get_matching_content_memberships(self, enterprise_uuid, content_keys):
+        return EnterpriseCatalogContentMembership.objects.matching_content_keys(
+            enterprise_uuid,
+            content_keys,
+            include_restricted=True,
+        )
+
     @action(detail=False, methods=['get'], url_path='secured-algolia-api-key')
     def secured_algolia_api_key(self, request, enterprise_uuid, **kwargs):
         """
@@ -7,7 +7,13 @@ class BaseOAuthClient:
     Base class for OAuth API clients.
     """
     def __init__(self):
-        self.client = OAuthAPIClient(
+        self.client = self.create_client()
+
+    def create_client(self):
+        """
+        Returns a new OAuth API client, which fetches (or reuses the cached) access token on its first request.
+        """
+        return OAuthAPIClient(
             settings.SOCIAL_AUTH_EDX_OAUTH2_URL_ROOT.strip('/'),
             self.oauth2_client_id,
             self.oauth2_client_secret
@@ -16,6 +16,7 @@ DISCOVERY_JOBS_SKILLS_ENDPOINT = urljoin(settings.DISCOVERY_SERVICE_URL, 'taxono
 DISCOVERY_OFFSET_SIZE = 200
 DISCOVERY_CATALOG_QUERY_CACHE_KEY_TPL = 'catalog_query:{id}'
 DISCOVERY_AVERAGE_COURSE_REVIEW_CACHE_KEY = 'average_course_review'
+DISCOVERY_COURSE_REVIEWS_CACHE_KEY = 'course_reviews'
 DISCOVERY_AVERAGE_COURSE_REVIEW_CACHE_TTL = 60 * 120  # 2 hours
 
 COURSE_REVIEW_BAYESIAN_CONFIDENCE_NUMBER = 15
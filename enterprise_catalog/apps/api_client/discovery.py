@@ -1,12 +1,17 @@
 """
 Discovery service api client code.
 """
+import collections
 import logging
+import math
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from celery.exceptions import SoftTimeLimitExceeded
 from django.conf import settings
+from django.core.cache import cache
 
 from enterprise_catalog.apps.catalog.constants import (
     DISCOVERY_COURSE_KEY_BATCH_SIZE,
@@ -19,6 +24,7 @@ from enterprise_catalog.apps.catalog.utils import batch
 
 from .base_oauth import BaseOAuthClient
 from .constants import (
+    DISCOVERY_COURSE_REVIEWS_CACHE_KEY,
     DISCOVERY_COURSE_REVIEWS_ENDPOINT,
     DISCOVERY_COURSES_ENDPOINT,
     DISCOVERY_JOBS_SKILLS_ENDPOINT,
@@ -27,6 +33,7 @@ from .constants import (
     DISCOVERY_SEARCH_ALL_ENDPOINT,
     DISCOVERY_VIDEO_SKILLS_ENDPOINT,
 )
+from .discovery_recording import RecordingClient, get_recording_settings
 
 
 LOGGER = logging.getLogger(__name__)
@@ -43,6 +50,25 @@ class DiscoveryApiClient(BaseOAuthClient):
     BACKOFF_FACTOR = getattr(settings, "ENTERPRISE_DISCOVERY_CLIENT_BACKOFF_FACTOR", 2)
     # the number of seconds to wait for a response
     HTTP_TIMEOUT = getattr(settings, "ENTERPRISE_DISCOVERY_CLIENT_TIMEOUT", 15)
+    # the maximum number of /search/all/ pages to fetch concurrently once the total count is known
+    SEARCH_ALL_PAGE_CONCURRENCY = getattr(settings, "ENTERPRISE_DISCOVERY_CLIENT_SEARCH_ALL_PAGE_CONCURRENCY", 4)
+    # the number of results per page requested from /search/all/
+    SEARCH_ALL_PAGE_SIZE = 100
+    # the query params sent to /search/all/ when fetching the content of catalog queries
+    SEARCH_ALL_QUERY_PARAMS = {
+        # Omit non-active course runs from the course-discovery results
+        'exclude_expired_course_run': True,
+        # Ensure to fetch learner pathways as part of search/all endpoint response.
+        'include_learner_pathways': True,
+    }
+
+    def create_client(self):
+        client = super().create_client()
+        recording_mode, recording_dir = get_recording_settings()
+        if recording_mode:
+            # Record responses to, or replay them from, a corpus on disk (see discovery_recording).
+            client = RecordingClient(client, recording_mode, recording_dir)
+        return client
 
     def _calculate_backoff(self, attempt_count):
         """
@@ -50,11 +76,17 @@ class DiscoveryApiClient(BaseOAuthClient):
         """
         return (self.BACKOFF_FACTOR * (2 ** (attempt_count - 1)))
 
-    def _retrieve_metadata_page_for_content_filter(self, content_filter, page, request_params):
+    def _retrieve_metadata_page_for_content_filter(
+        self, content_filter, page, request_params, allow_missing_page=False, client=None,
+    ):
         """
         Makes a request to discovery's /search/all/ endpoint with the specified
         content_filter, page, and request_params
+
+        With ``allow_missing_page``, returns None without retrying when the page doesn't exist.
+        The request is sent with ``client`` if given, rather than with this object's client.
         """
+        client = client or self.client
         LOGGER.info(f'Retrieving results from course-discovery for page {page}...')
         attempts = 0
         request_params_with_page = request_params | {'page': page}
@@ -63,12 +95,15 @@ class DiscoveryApiClient(BaseOAuthClient):
             successful = True
             exception = None
             try:
-                response = self.client.post(
+                response = client.post(
                     DISCOVERY_SEARCH_ALL_ENDPOINT,
                     json=content_filter,
                     params=request_params_with_page,
                     timeout=self.HTTP_TIMEOUT,
                 )
+                if allow_missing_page and response.status_code == 404:
+                    LOGGER.info(f'Page {page} is past the end of the results from course-discovery.')
+                    return None
                 successful = response.status_code < 400
                 elapsed_seconds = response.elapsed.total_seconds()
                 LOGGER.info(
@@ -101,35 +136,56 @@ class DiscoveryApiClient(BaseOAuthClient):
             )
             raise err
 
-    def retrieve_metadata_for_content_filter(self, content_filter, request_params):
+    def iter_metadata_pages_for_content_filter(self, content_filter, request_params):
         """
         Given a content filter and query params dict, makes one or more requests to the
-        discovery service to fetch search results based on the filter and concatenates
-        all results into a returned list.
+        discovery service to fetch search results based on the filter, and yields the
+        list of results of each page, in page order.
+
+        Once the first page reveals the total count of results, the following pages are fetched
+        concurrently by up to ``SEARCH_ALL_PAGE_CONCURRENCY`` workers, each with the same retry
+        behavior as a sequential fetch. At most that many pages are fetched ahead of the page
+        being consumed, so pages keep being fetched while the caller processes earlier ones,
+        without buffering the whole result set. Should the results change while they're fetched,
+        pages keep being followed one at a time past the last counted page, and a counted page
+        that no longer exists ends the results.
         """
         base_params = dict(request_params.items())
         request_params_customized = base_params | {
             # Increase number of results per page for the course-discovery response
-            'page_size': 100,
+            'page_size': self.SEARCH_ALL_PAGE_SIZE,
             # Ensure paginated results are consistently ordered by `aggregation_key` and `start`
             'ordering': 'aggregation_key,start',
             # Ensure the course run `modified` field is included in response payloads
             'include_modified': 'true',
         }
         page = 1
-        results = []
         try:
             response = self._retrieve_metadata_page_for_content_filter(
                 content_filter, page, request_params_customized,
             )
-            results += response.get('results', [])
-            # Traverse all pages and concatenate results
+            yield response.get('results', [])
+            count = response.get('count')
+            if response.get('next') and count and self.SEARCH_ALL_PAGE_CONCURRENCY > 1:
+                num_pages = math.ceil(count / self.SEARCH_ALL_PAGE_SIZE)
+                for page, page_response in self._iter_metadata_pages_concurrently(
+                    content_filter, range(2, num_pages + 1), request_params_customized,
+                ):
+                    if page_response is None:
+                        # The results shrank since they were counted, leaving this page past their end.
+                        response = {}
+                        break
+                    response = page_response
+                    yield response.get('results', [])
+                    if not response.get('next'):
+                        break
+            # Traverse all (remaining) pages, as the results may have grown since they were counted
             while response.get('next'):
                 page += 1
                 response = self._retrieve_metadata_page_for_content_filter(
                     content_filter, page, request_params_customized,
                 )
-                results += response.get('results', [])
+                yield response.get('results', [])
         except Exception as exc:
             LOGGER.exception(
                 'Could not retrieve content items from course-discovery (page %s): %s',
@@ -137,6 +193,58 @@ class DiscoveryApiClient(BaseOAuthClient):
                 exc,
             )
             raise exc
+
+    def _iter_metadata_pages_concurrently(self, content_filter, pages, request_params):
+        """
+        Fetches the given pages of discovery's /search/all/ endpoint with a bounded pool of workers,
+        and yields a ``(page, response)`` pair for each of them, in page order, with a None response
+        for pages that don't exist. No more than ``SEARCH_ALL_PAGE_CONCURRENCY`` pages are in flight
+        or waiting to be consumed at a time.
+
+        An OAuth client is a ``requests.Session`` that updates its token as it sends requests, so it
+        isn't shared between workers: each of them sends its requests with its own client. These reuse
+        the access token cached when this object's client fetched the first page, rather than each
+        fetching a new one.
+        """
+        pages = iter(pages)
+        executor = ThreadPoolExecutor(max_workers=self.SEARCH_ALL_PAGE_CONCURRENCY)
+        in_flight = collections.deque()
+        worker_state = threading.local()
+
+        def retrieve_page(page):
+            if not hasattr(worker_state, 'client'):
+                worker_state.client = self.create_client()
+            return self._retrieve_metadata_page_for_content_filter(
+                content_filter, page, request_params, allow_missing_page=True, client=worker_state.client,
+            )
+
+        def submit_next_page():
+            page = next(pages, None)
+            if page is not None:
+                in_flight.append((page, executor.submit(retrieve_page, page)))
+
+        try:
+            for _ in range(self.SEARCH_ALL_PAGE_CONCURRENCY):
+                submit_next_page()
+            while in_flight:
+                page, future = in_flight.popleft()
+                response = future.result()
+                submit_next_page()
+                yield page, response
+        finally:
+            # Don't start fetching any more pages if one of them ultimately failed,
+            # or if the caller stopped consuming them.
+            executor.shutdown(cancel_futures=True)
+
+    def retrieve_metadata_for_content_filter(self, content_filter, request_params):
+        """
+        Given a content filter and query params dict, makes one or more requests to the
+        discovery service to fetch search results based on the filter and concatenates
+        all results into a returned list, in page order.
+        """
+        results = []
+        for page_results in self.iter_metadata_pages_for_content_filter(content_filter, request_params):
+            results += page_results
         return results
 
     def _retrieve_course_reviews(self, request_params):
@@ -217,6 +325,27 @@ class DiscoveryApiClient(BaseOAuthClient):
 
         return results
 
+    def get_all_course_reviews(self):
+        """
+        Return every course review from the discovery service's /course_review endpoint as an object of
+        key = course key, value = course review. Meant to be fetched once and shared by all the batches
+        of a full metadata update, since the endpoint can't be filtered by course key.
+
+        The reviews are cached for ``settings.DISCOVERY_COURSE_REVIEWS_CACHE_TIMEOUT`` seconds, if set.
+        """
+        cache_timeout = getattr(settings, 'DISCOVERY_COURSE_REVIEWS_CACHE_TIMEOUT', 0)
+        if cache_timeout:
+            course_reviews = cache.get(DISCOVERY_COURSE_REVIEWS_CACHE_KEY)
+            if course_reviews is not None:
+                LOGGER.info(f'Using {len(course_reviews)} cached course reviews from course-discovery.')
+                return course_reviews
+
+        course_reviews = self.get_course_reviews()
+        LOGGER.info(f'Retrieved {len(course_reviews)} course reviews from course-discovery.')
+        if cache_timeout:
+            cache.set(DISCOVERY_COURSE_REVIEWS_CACHE_KEY, course_reviews, cache_timeout)
+        return course_reviews
+
     def _retrieve_video_skills(self, request_params):
         """
         Makes a request to discovery's taxonomy/api/v1/xblocks paginated endpoint
@@ -354,27 +483,22 @@ class DiscoveryApiClient(BaseOAuthClient):
             LOGGER.exception(f'Could not retrieve jobs and skills from course-discovery (page {page}) {exc}')
             raise exc
 
-    def get_metadata_by_query(self, catalog_query, extra_query_params=None):
+    def iter_metadata_pages_by_query(self, catalog_query, extra_query_params=None):
         """
-        Return results from the discovery service's search/all endpoint.
+        Yield the results from the discovery service's search/all endpoint one page at a time,
+        followed by any courses force-included by the catalog query.
 
         Arguments:
             catalog_query (CatalogQuery): Catalog Query object to retrieve metadata for
 
-        Returns:
-            list: a list of the results, or None if there was an error calling the discovery service.
+        Yields:
+            list: the results of each page.
         """
-        request_params = {
-            # Omit non-active course runs from the course-discovery results
-            'exclude_expired_course_run': True,
-            # Ensure to fetch learner pathways as part of search/all endpoint response.
-            'include_learner_pathways': True,
-        } | (extra_query_params or {})
-        results = []
+        request_params = self.SEARCH_ALL_QUERY_PARAMS | (extra_query_params or {})
 
         try:
             content_filter = catalog_query.content_filter
-            results.extend(self.retrieve_metadata_for_content_filter(content_filter, request_params))
+            yield from self.iter_metadata_pages_for_content_filter(content_filter, request_params)
         except Exception as exc:
             LOGGER.exception(
                 'Could not retrieve content items for catalog query %s: %s',
@@ -391,15 +515,61 @@ class DiscoveryApiClient(BaseOAuthClient):
                     f'attempting to force-include: {forced_aggregation_keys}'
                 )
                 forced_courses = self.fetch_courses_by_keys(forced_aggregation_keys)
-                results += tansform_force_included_courses(forced_courses)
+                forced_results = tansform_force_included_courses(forced_courses)
+            else:
+                forced_results = []
         except Exception as exc:
             LOGGER.exception(
                 f'unable to add unlisted courses for catalog_id: {catalog_query.id}'
             )
             raise exc
+        if forced_results:
+            yield forced_results
+
+    def get_metadata_by_query(self, catalog_query, extra_query_params=None):
+        """
+        Return results from the discovery service's search/all endpoint.
 
+        Arguments:
+            catalog_query (CatalogQuery): Catalog Query object to retrieve metadata for
+
+        Returns:
+            list: a list of the results, or None if there was an error calling the discovery service.
+        """
+        results = []
+        for page_results in self.iter_metadata_pages_by_query(catalog_query, extra_query_params):
+            results += page_results
         return results
 
+    def get_metadata_by_content_filter(self, content_filter):
+        """
+        Return results from the discovery service's search/all endpoint for a content filter that
+        doesn't belong to a single catalog query, e.g. the shared filter of a group of catalog queries.
+        Unlike ``get_metadata_by_query()``, no courses are force-included.
+
+        Arguments:
+            content_filter (dict): The content filter to search for.
+
+        Returns:
+            list: a list of the results.
+        """
+        return self.retrieve_metadata_for_content_filter(content_filter, self.SEARCH_ALL_QUERY_PARAMS)
+
+    def get_content_count_by_content_filter(self, content_filter):
+        """
+        Return the number of results of the discovery service's search/all endpoint for a content filter,
+        requesting a single result rather than every page of them.
+
+        Arguments:
+            content_filter (dict): The content filter to search for.
+
+        Returns:
+            int: the number of results.
+        """
+        request_params = self.SEARCH_ALL_QUERY_PARAMS | {'page_size': 1}
+        response = self._retrieve_metadata_page_for_content_filter(content_filter, 1, request_params)
+        return response.get('count') or 0
+
     def _retrieve_courses(self, offset, request_params):
         """
         Makes a request to discovery's /api/v1/courses/ endpoint with the specified offset and request_params
@@ -412,6 +582,17 @@ class DiscoveryApiClient(BaseOAuthClient):
         ).json()
         return response
 
+    def get_courses_request_params(self, query_params=None):
+        """
+        Returns the params of the requests made to discovery's /api/v1/courses/ endpoint, with ``query_params``.
+        """
+        request_params = {
+            'ordering': 'key',
+            'limit': DISCOVERY_OFFSET_SIZE,
+        }
+        request_params.update(query_params or {})
+        return request_params
+
     def get_courses(self, query_params=None):
         """
         Return results from the discovery service's /courses endpoint.
@@ -423,11 +604,7 @@ class DiscoveryApiClient(BaseOAuthClient):
         Returns:
             list: a list of the results, or None if there was an error calling the discovery service.
         """
-        request_params = {
-            'ordering': 'key',
-            'limit': DISCOVERY_OFFSET_SIZE,
-        }
-        request_params.update(query_params or {})
+        request_params = self.get_courses_request_params(query_params)
 
         courses = []
         offset = 0
@@ -469,6 +646,18 @@ class DiscoveryApiClient(BaseOAuthClient):
         ).json()
         return response
 
+    def get_programs_request_params(self, query_params=None):
+        """
+        Returns the params of the requests made to discovery's /api/v1/programs/ endpoint, with ``query_params``.
+        """
+        request_params = {
+            'ordering': 'key',
+            'limit': DISCOVERY_OFFSET_SIZE,
+            'extended': 'True',
+        }
+        request_params.update(query_params or {})
+        return request_params
+
     def get_programs(self, query_params=None):
         """
         Return results from the discovery service's /programs endpoint.
@@ -480,12 +669,7 @@ class DiscoveryApiClient(BaseOAuthClient):
         Returns:
             list: a list of the results, or None if there was an error calling the discovery service.
         """
-        request_params = {
-            'ordering': 'key',
-            'limit': DISCOVERY_OFFSET_SIZE,
-            'extended': 'True',
-        }
-        request_params.update(query_params or {})
+        request_params = self.get_programs_request_params(query_params)
 
         programs = []
         offset = 0
@@ -0,0 +1,138 @@
+"""
+Asyncio variant of the discovery service api client, for fetches that fan out over many requests.
+"""
+import asyncio
+import logging
+
+import httpx
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+
+from enterprise_catalog.apps.catalog.constants import (
+    DISCOVERY_COURSE_KEY_BATCH_SIZE,
+    DISCOVERY_PROGRAM_KEY_BATCH_SIZE,
+)
+from enterprise_catalog.apps.catalog.utils import batch
+
+from .constants import (
+    DISCOVERY_COURSES_ENDPOINT,
+    DISCOVERY_OFFSET_SIZE,
+    DISCOVERY_PROGRAMS_ENDPOINT,
+)
+from .discovery import DiscoveryApiClient
+from .discovery_recording import RecordingClient
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class AsyncDiscoveryApiClient(DiscoveryApiClient):
+    """
+    A ``DiscoveryApiClient`` whose ``fetch_courses_by_keys()`` and ``fetch_programs_by_keys()`` request
+    every key batch, and every offset page of each batch, concurrently over one pool of keep-alive
+    connections. Responses are compressed with any encoding httpx can decode (gzip and deflate, plus
+    brotli when a brotli package is installed).
+
+    The fetch methods keep their synchronous signatures and results, so callers can swap in this
+    client as is. Coroutine versions are available as ``afetch_courses_by_keys()`` and
+    ``afetch_programs_by_keys()``.
+    """
+
+    # the maximum number of concurrent requests, which is also the size of the connection pool
+    ASYNC_MAX_CONNECTIONS = getattr(settings, "ENTERPRISE_DISCOVERY_CLIENT_ASYNC_MAX_CONNECTIONS", 8)
+    # the number of seconds an idle pooled connection is kept alive for
+    ASYNC_KEEPALIVE_EXPIRY = getattr(settings, "ENTERPRISE_DISCOVERY_CLIENT_ASYNC_KEEPALIVE_EXPIRY", 30)
+
+    def fetch_courses_by_keys(self, course_keys, extra_query_params=None):
+        if isinstance(self.client, RecordingClient):
+            # Recorded responses are only served to the synchronous client.
+            return super().fetch_courses_by_keys(course_keys, extra_query_params)
+        return async_to_sync(self.afetch_courses_by_keys)(course_keys, extra_query_params)
+
+    def fetch_programs_by_keys(self, program_keys):
+        if isinstance(self.client, RecordingClient):
+            return super().fetch_programs_by_keys(program_keys)
+        return async_to_sync(self.afetch_programs_by_keys)(program_keys)
+
+    async def afetch_courses_by_keys(self, course_keys, extra_query_params=None):
+        """
+        Fetches course data from discovery's /api/v1/courses endpoint for the provided course keys.
+        """
+        query_params_list = []
+        for course_keys_chunk in batch(course_keys, batch_size=DISCOVERY_COURSE_KEY_BATCH_SIZE):
+            # Discovery expects the keys param to be in the format ?keys=course1,course2,...
+            query_params = {'keys': ','.join(course_keys_chunk)}
+            if extra_query_params:
+                query_params.update(extra_query_params)
+            query_params_list.append(self.get_courses_request_params(query_params))
+        return await self._afetch_all(DISCOVERY_COURSES_ENDPOINT, 'courses', query_params_list)
+
+    async def afetch_programs_by_keys(self, program_keys):
+        """
+        Fetches program data from discovery's /api/v1/programs endpoint for the provided program keys.
+        """
+        query_params_list = [
+            # Discovery expects the uuids param to be in the format ?uuids=program1,program2,...
+            self.get_programs_request_params({'uuids': ','.join(program_keys_chunk)})
+            for program_keys_chunk in batch(program_keys, batch_size=DISCOVERY_PROGRAM_KEY_BATCH_SIZE)
+        ]
+        return await self._afetch_all(DISCOVERY_PROGRAMS_ENDPOINT, 'programs', query_params_list)
+
+    async def _afetch_all(self, endpoint, content_name, request_params_list):
+        """
+        Concurrently gets every result of ``endpoint`` for each of ``request_params_list``, and returns
+        them in the same order as fetching them one batch at a time would.
+        """
+        if not request_params_list:
+            return []
+        access_token = await sync_to_async(self.client.get_jwt_access_token)()
+        limits = httpx.Limits(
+            max_connections=self.ASYNC_MAX_CONNECTIONS,
+            max_keepalive_connections=self.ASYNC_MAX_CONNECTIONS,
+            keepalive_expiry=self.ASYNC_KEEPALIVE_EXPIRY,
+        )
+        async with httpx.AsyncClient(
+            headers={'Authorization': f'JWT {access_token}'},
+            limits=limits,
+            # Requests beyond the size of the pool wait for a free connection rather than time out.
+            timeout=httpx.Timeout(self.HTTP_TIMEOUT, pool=None),
+        ) as async_client:
+            batched_results = await asyncio.gather(*(
+                self._aget_batch(async_client, endpoint, content_name, request_params)
+                for request_params in request_params_list
+            ))
+        return [result for batch_results in batched_results for result in batch_results]
+
+    async def _aget_batch(self, async_client, endpoint, content_name, request_params):
+        """
+        Gets every offset page of ``endpoint`` for ``request_params``, which are built the same way as
+        ``get_courses()`` and ``get_programs()`` build theirs. Like them, logs errors and returns the results
+        retrieved before the error.
+        """
+        results = []
+        try:
+            response = await self._aget_page(async_client, endpoint, content_name, request_params, offset=0)
+            results += response.get('results', [])
+            if response.get('next'):
+                # The total count is known from the first page, so the remaining pages are requested at once.
+                pages = await asyncio.gather(*(
+                    self._aget_page(async_client, endpoint, content_name, request_params, offset=offset)
+                    for offset in range(DISCOVERY_OFFSET_SIZE, response.get('count') or 0, DISCOVERY_OFFSET_SIZE)
+                ))
+                for page in pages:
+                    results += page.get('results', [])
+        except Exception as exc:  # pylint: disable=broad-except
+            LOGGER.error(
+                'Could not get %s from course-discovery with query params %s: %s',
+                content_name,
+                request_params,
+                exc,
+            )
+        return results
+
+    async def _aget_page(self, async_client, endpoint, content_name, request_params, offset):
+        LOGGER.info('Retrieving %s from course-discovery for offset %s...', content_name, offset)
+        page_params = request_params | {'offset': offset} if offset else request_params
+        response = await async_client.get(endpoint, params=page_params)
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,165 @@
+"""
+Record/replay of course-discovery API responses.
+
+When ``settings.DISCOVERY_RECORDING_MODE`` is ``'record'``, every response received by
+``DiscoveryApiClient`` is also written to a gzipped JSON file under
+``settings.DISCOVERY_RECORDING_DIR``, keyed by the request's method, endpoint, query params
+and JSON body. When it is ``'replay'``, requests are answered from those files instead of
+course-discovery, so that a slow sync can be reproduced, or a change benchmarked, offline.
+Code that records or replays on its own, like the replay_discovery_sync command, uses
+``recording_override()`` rather than changing the settings.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+# The (mode, directory) that responses are recorded or replayed with while ``recording_override()`` is active.
+_recording_override = None
+
+
+def get_recording_settings():
+    """
+    Returns the ``(mode, directory)`` that ``DiscoveryApiClient`` records its responses to, or replays
+    them from, with a mode of None when it talks to course-discovery as usual.
+    """
+    if _recording_override:
+        return _recording_override
+    return settings.DISCOVERY_RECORDING_MODE, settings.DISCOVERY_RECORDING_DIR
+
+
+@contextmanager
+def recording_override(mode, directory):
+    """
+    Makes every ``DiscoveryApiClient`` created within the context record its responses to, or replay
+    them from, ``directory``, regardless of the DISCOVERY_RECORDING_* settings.
+    """
+    global _recording_override  # pylint: disable=global-statement
+    previous_override = _recording_override
+    _recording_override = (mode, directory)
+    try:
+        yield
+    finally:
+        _recording_override = previous_override
+
+
+class RecordedResponseMissingError(LookupError):
+    """
+    Raised when replaying a request for which no response was recorded.
+    """
+
+
+class RecordedResponse:
+    """
+    A response replayed from disk, with the subset of the ``requests.Response`` interface
+    that ``DiscoveryApiClient`` relies on.
+    """
+
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+        # Replayed responses don't wait on the network.
+        self.elapsed = timedelta(0)
+
+    def json(self):
+        try:
+            return json.loads(self.text)
+        except json.JSONDecodeError as exc:
+            raise requests.exceptions.JSONDecodeError(exc.msg, exc.doc, exc.pos) from exc
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(
+                f'{self.status_code} error replayed from a recorded course-discovery response',
+                response=self,
+            )
+
+
+class RecordingClient:
+    """
+    Wraps the OAuth client of ``DiscoveryApiClient``, recording its responses to, or
+    replaying them from, the files of a corpus directory.
+    """
+
+    def __init__(self, client, mode, directory):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f'Unknown course-discovery recording mode {mode!r}')
+        if not directory:
+            raise ValueError('A directory is required to record or replay course-discovery responses')
+        self.client = client
+        self.mode = mode
+        self.directory = directory
+
+    def get(self, url, **kwargs):
+        return self._request('GET', url, kwargs)
+
+    def post(self, url, **kwargs):
+        return self._request('POST', url, kwargs)
+
+    def get_recording_path(self, method, url, params=None, body=None):
+        """
+        Returns the path of the file that holds the response to the given request. Only the
+        path of ``url`` is part of the key, so that a corpus can be replayed against any host.
+        """
+        endpoint = urlparse(url).path.strip('/')
+        request_key = json.dumps(
+            {'method': method, 'endpoint': endpoint, 'params': params or {}, 'body': body},
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha256(request_key.encode()).hexdigest()
+        return os.path.join(self.directory, endpoint.replace('/', '_'), f'{method.lower()}-{digest}.json.gz')
+
+    def _request(self, method, url, kwargs):
+        path = self.get_recording_path(method, url, kwargs.get('params'), kwargs.get('json'))
+        if self.mode == REPLAY:
+            return self._replay(path, method, url)
+
+        send = self.client.post if method == 'POST' else self.client.get
+        response = send(url, **kwargs)
+        self._record(path, method, url, kwargs, response)
+        return response
+
+    def _replay(self, path, method, url):
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as recording_file:
+                recording = json.load(recording_file)
+        except FileNotFoundError as exc:
+            raise RecordedResponseMissingError(
+                f'No course-discovery response was recorded for {method} {url} at {path}'
+            ) from exc
+        return RecordedResponse(recording['status_code'], recording['text'])
+
+    def _record(self, path, method, url, kwargs, response):
+        recording = {
+            'request': {
+                'method': method,
+                'url': url,
+                'params': kwargs.get('params'),
+                'body': kwargs.get('json'),
+            },
+            'status_code': response.status_code,
+            'text': response.text,
+        }
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file first, so that concurrent page fetches never replay a partial recording.
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(file_descriptor, 'wb') as raw_file, gzip.open(raw_file, 'wt', encoding='utf-8') as gzip_file:
+            json.dump(recording, gzip_file, default=str)
+        os.replace(temporary_path, path)
+        logger.debug('Recorded course-discovery response for %s %s to %s', method, url, path)
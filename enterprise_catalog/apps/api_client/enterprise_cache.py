@@ -1,7 +1,16 @@
 """
 Interface to Enterprise Customer details from edx-enterprise API using a volatile cache.
+
+Customer data is cached in two tiers: a small in-process LRU in front of the shared
+Django cache. Entries older than ``settings.ENTERPRISE_CUSTOMER_CACHE_TIMEOUT`` are
+still served for up to ``settings.ENTERPRISE_CUSTOMER_CACHE_STALE_TIMEOUT`` seconds
+while a single background thread refreshes them, so a slow edx-enterprise API only
+blocks requests for customers that have never been cached.
 """
 import logging
+import threading
+import time
+from collections import OrderedDict
 
 from dateutil import parser
 from django.conf import settings
@@ -13,12 +22,23 @@ from .enterprise import EnterpriseApiClient
 
 logger = logging.getLogger(__name__)
 
+# In-process LRU of cache_key -> (fetched_at, customer_data), guarded by a lock
+# because gunicorn/celery threads share the module.
+_local_cache = OrderedDict()
+_local_cache_lock = threading.Lock()
+
+# Per-customer locks used to coalesce concurrent fetches of the same customer, as
+# cache_key -> [lock, number of threads using it]. A lock is dropped once unused.
+_refresh_locks = {}
+_refresh_locks_guard = threading.Lock()
+
 
 class EnterpriseCustomerDetails:
     """
     Details about an Enterprise Customer from the edx-enterprise API.
 
-    Data is cached for 'settings.ENTERPRISE_CUSTOMER_CACHE_TIMEOUT' seconds.
+    Data is considered fresh for 'settings.ENTERPRISE_CUSTOMER_CACHE_TIMEOUT' seconds,
+    after which it is served stale while being refreshed in the background.
     """
 
     def __init__(self, uuid):
@@ -59,7 +79,10 @@ class EnterpriseCustomerDetails:
 def _get_enterprise_customer_data(uuid):
     """
     Retrieve JSON data containing Enterprise Customer details for given uuid.
-    Look in cache first, make call to Enterprise API Client if not found.
+    Look in the in-process and shared caches first, make call to Enterprise API Client if not found.
+
+    Stale cached data is returned as-is while one background refresh runs. Concurrent
+    misses for the same customer are coalesced so only one of them calls the API.
 
     Arguments:
         uuid (str): UUID of the Enterprise Customer
@@ -69,17 +92,157 @@ def _get_enterprise_customer_data(uuid):
             Empty dictionary if no data found in cache or from API.
     """
     cache_key = ENTERPRISE_CUSTOMER_CACHE_KEY_TPL.format(uuid=uuid)
-    customer_data = cache.get(cache_key)
+    entry = _get_cached_entry(cache_key)
+
+    if entry is None:
+        lock = _get_refresh_lock(cache_key)
+        try:
+            with lock:
+                # Another thread may have populated the cache while we waited on the lock.
+                entry = _get_cached_entry(cache_key)
+                if entry is None:
+                    entry = _fetch_and_cache_customer_data(uuid, cache_key)
+        finally:
+            _put_refresh_lock(cache_key)
+    elif _is_stale(entry):
+        _refresh_in_background(uuid, cache_key)
+
+    _, customer_data = entry
+    return customer_data
+
+
+def clear_local_enterprise_customer_cache():
+    """
+    Drop every entry from the in-process tier of the Enterprise Customer cache.
+    """
+    with _local_cache_lock:
+        _local_cache.clear()
+
+
+def _get_cached_entry(cache_key):
+    """
+    Return the ``(fetched_at, customer_data)`` entry for the given key from the
+    in-process LRU, falling back to the shared cache, or None if neither has it.
+    """
+    entry = _local_cache_get(cache_key)
+    if entry is not None:
+        return entry
+
+    entry = cache.get(cache_key)
+    if isinstance(entry, dict):
+        # Entries written before the (fetched_at, customer_data) format carry no
+        # timestamp, so serve them but refresh right away. They are not kept in
+        # the in-process cache, which could not tell when they expire.
+        return (0, entry)
+    if not isinstance(entry, tuple) or _is_expired(entry):
+        return None
+
+    _local_cache_set(cache_key, entry)
+    return entry
+
+
+def _fetch_and_cache_customer_data(uuid, cache_key):
+    """
+    Fetch customer data from the Enterprise API and store it in both cache tiers.
+    """
+    enterprise_client = EnterpriseApiClient()
+    customer_data = enterprise_client.get_enterprise_customer(uuid)
 
     if not isinstance(customer_data, dict):
-        enterprise_client = EnterpriseApiClient()
-        customer_data = enterprise_client.get_enterprise_customer(uuid)
+        # TODO: This check should be removed after verifying that the scenario never happens
+        logger.warning('Received unexpected customer_data for enterprise customer %s', uuid)
+        customer_data = {}
 
-        if not isinstance(customer_data, dict):
-            # TODO: This check should be removed after verifying that the scenario never happens
-            logger.warning('Received unexpected customer_data for enterprise customer %s', uuid)
-            customer_data = {}
+    entry = (time.time(), customer_data)
+    cache.set(
+        cache_key,
+        entry,
+        settings.ENTERPRISE_CUSTOMER_CACHE_TIMEOUT + settings.ENTERPRISE_CUSTOMER_CACHE_STALE_TIMEOUT,
+    )
+    _local_cache_set(cache_key, entry)
+    return entry
 
-        cache.set(cache_key, customer_data, settings.ENTERPRISE_CUSTOMER_CACHE_TIMEOUT)
 
-    return customer_data
+def _refresh_in_background(uuid, cache_key):
+    """
+    Start a thread that refreshes the customer's cached data, unless a refresh
+    for that customer is already in flight.
+    """
+    lock = _get_refresh_lock(cache_key)
+    if not lock.acquire(blocking=False):
+        _put_refresh_lock(cache_key)
+        return
+
+    def _refresh():
+        try:
+            entry = cache.get(cache_key)
+            if isinstance(entry, tuple) and not _is_stale(entry):
+                # Another process already refreshed the shared cache.
+                _local_cache_set(cache_key, entry)
+            else:
+                _fetch_and_cache_customer_data(uuid, cache_key)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception('Failed to refresh cached data for enterprise customer %s', uuid)
+        finally:
+            lock.release()
+            _put_refresh_lock(cache_key)
+
+    try:
+        threading.Thread(target=_refresh, daemon=True).start()
+    except RuntimeError:
+        lock.release()
+        _put_refresh_lock(cache_key)
+        logger.exception('Could not start cache refresh for enterprise customer %s', uuid)
+
+
+def _get_refresh_lock(cache_key):
+    """
+    Return the refresh lock of the given key. Every call must be paired with a ``_put_refresh_lock()``
+    call once the caller is done with the lock.
+    """
+    with _refresh_locks_guard:
+        lock_and_users = _refresh_locks.setdefault(cache_key, [threading.Lock(), 0])
+        lock_and_users[1] += 1
+        return lock_and_users[0]
+
+
+def _put_refresh_lock(cache_key):
+    with _refresh_locks_guard:
+        lock_and_users = _refresh_locks[cache_key]
+        lock_and_users[1] -= 1
+        if not lock_and_users[1]:
+            del _refresh_locks[cache_key]
+
+
+def _is_stale(entry):
+    fetched_at, _ = entry
+    return time.time() - fetched_at > settings.ENTERPRISE_CUSTOMER_CACHE_TIMEOUT
+
+
+def _is_expired(entry):
+    fetched_at, _ = entry
+    max_age = settings.ENTERPRISE_CUSTOMER_CACHE_TIMEOUT + settings.ENTERPRISE_CUSTOMER_CACHE_STALE_TIMEOUT
+    return time.time() - fetched_at > max_age
+
+
+def _local_cache_get(cache_key):
+    with _local_cache_lock:
+        entry = _local_cache.get(cache_key)
+        if entry is None:
+            return None
+        if _is_expired(entry):
+            del _local_cache[cache_key]
+            return None
+        _local_cache.move_to_end(cache_key)
+        return entry
+
+
+def _local_cache_set(cache_key, entry):
+    max_size = settings.ENTERPRISE_CUSTOMER_LOCAL_CACHE_MAX_SIZE
+    if max_size <= 0:
+        return
+    with _local_cache_lock:
+        _local_cache[cache_key] = entry
+        _local_cache.move_to_end(cache_key)
+        while len(_local_cache) > max_size:
+            _local_cache.popitem(last=False)
@@ -1,8 +1,10 @@
 """ Tests for discovery api client. """
+import threading
 from unittest import mock
 
 import requests
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from simplejson import JSONDecodeError
 
 from enterprise_catalog.apps.api_client.constants import (
@@ -51,6 +53,155 @@ class TestDiscoveryApiClient(TestCase):
         self.assertEqual(called_params.get('include_modified'), 'true')
         self.assertNotIn('detail_fields', called_params)
 
+    @mock.patch('enterprise_catalog.apps.api_client.base_oauth.OAuthAPIClient')
+    def test_get_content_count_by_content_filter(self, mock_oauth_client):
+        """
+        get_content_count_by_content_filter should request a single result, and return the total count.
+        """
+        mock_oauth_client.return_value.post.return_value.status_code = 200
+        mock_oauth_client.return_value.post.return_value.json.return_value = {
+            'count': 250,
+            'results': [{'key': 'fakeX'}],
+        }
+
+        count = DiscoveryApiClient().get_content_count_by_content_filter({'content_type': 'course'})
+
+        self.assertEqual(count, 250)
+        mock_oauth_client.return_value.post.assert_called_once()
+        call_kwargs = mock_oauth_client.return_value.post.call_args[1]
+        self.assertEqual(call_kwargs['json'], {'content_type': 'course'})
+        self.assertEqual(call_kwargs['params']['page_size'], 1)
+
+    @mock.patch('enterprise_catalog.apps.api_client.base_oauth.OAuthAPIClient')
+    def test_retrieve_metadata_fetches_remaining_pages_concurrently(self, mock_oauth_client):
+        """
+        retrieve_metadata_for_content_filter fetches every page after the first one, using the count
+        from the first page, and returns the results in page order.
+        """
+        def post(*args, **kwargs):  # pylint: disable=unused-argument
+            page = kwargs['params']['page']
+            response = mock.Mock(status_code=200)
+            response.json.return_value = {
+                'count': 250,
+                'next': f'https://discovery/search/all/?page={page + 1}' if page < 3 else None,
+                'results': [{'key': f'page{page}X'}],
+            }
+            return response
+        mock_oauth_client.return_value.post.side_effect = post
+
+        client = DiscoveryApiClient()
+        results = client.retrieve_metadata_for_content_filter({}, {})
+
+        self.assertEqual(results, [{'key': 'page1X'}, {'key': 'page2X'}, {'key': 'page3X'}])
+        requested_pages = sorted(
+            call[1]['params']['page'] for call in mock_oauth_client.return_value.post.call_args_list
+        )
+        self.assertEqual(requested_pages, [1, 2, 3])
+
+    @mock.patch('enterprise_catalog.apps.api_client.base_oauth.OAuthAPIClient')
+    def test_retrieve_metadata_workers_do_not_share_clients(self, mock_oauth_client):
+        """
+        Each worker fetching the remaining pages sends its requests with its own OAuth client, rather than
+        with the client that fetched the first page.
+        """
+        threads_by_client = {}
+        pages_by_client = {}
+
+        def create_client(*args, **kwargs):
+            oauth_client = mock.Mock()
+
+            def post(*args, **kwargs):
+                page = kwargs['params']['page']
+                threads_by_client.setdefault(id(oauth_client), set()).add(threading.get_ident())
+                pages_by_client.setdefault(id(oauth_client), []).append(page)
+                response = mock.Mock(status_code=200)
+                response.json.return_value = {
+                    'count': 1000,
+                    'next': f'https://discovery/search/all/?page={page + 1}' if page < 10 else None,
+                    'results': [{'key': f'page{page}X'}],
+                }
+                return response
+            oauth_client.post.side_effect = post
+            return oauth_client
+        mock_oauth_client.side_effect = create_client
+
+        client = DiscoveryApiClient()
+        results = client.retrieve_metadata_for_content_filter({}, {})
+
+        self.assertEqual(results, [{'key': f'page{page}X'} for page in range(1, 11)])
+        self.assertEqual(pages_by_client[id(client.client)], [1])
+        self.assertLessEqual(mock_oauth_client.call_count, 1 + DiscoveryApiClient.SEARCH_ALL_PAGE_CONCURRENCY)
+        for threads in threads_by_client.values():
+            self.assertEqual(len(threads), 1)
+
+    @mock.patch('enterprise_catalog.apps.api_client.base_oauth.OAuthAPIClient')
+    def test_retrieve_metadata_results_grow_while_fetched(self, mock_oauth_client):
+        """
+        retrieve_metadata_for_content_filter keeps following the next pages past those of the count
+        from the first page, should the results have grown since.
+        """
+        def post(*args, **kwargs):  # pylint: disable=unused-argument
+            page = kwargs['params']['page']
+            response = mock.Mock(status_code=200)
+            response.json.return_value = {
+                'count': 200 if page == 1 else 300,
+                'next': f'https://discovery/search/all/?page={page + 1}' if page < 3 else None,
+                'results': [{'key': f'page{page}X'}],
+            }
+            return response
+        mock_oauth_client.return_value.post.side_effect = post
+
+        results = DiscoveryApiClient().retrieve_metadata_for_content_filter({}, {})
+
+        self.assertEqual(results, [{'key': 'page1X'}, {'key': 'page2X'}, {'key': 'page3X'}])
+
+    @mock.patch('enterprise_catalog.apps.api_client.base_oauth.OAuthAPIClient')
+    def test_retrieve_metadata_results_shrink_while_fetched(self, mock_oauth_client):
+        """
+        retrieve_metadata_for_content_filter ends the results at the first page of the count from the first
+        page that no longer exists, without retrying it, should the results have shrunk since.
+        """
+        def post(*args, **kwargs):  # pylint: disable=unused-argument
+            page = kwargs['params']['page']
+            if page > 2:
+                return mock.Mock(status_code=404)
+            response = mock.Mock(status_code=200)
+            response.json.return_value = {
+                'count': 400 if page == 1 else 200,
+                'next': 'https://discovery/search/all/?page=2' if page == 1 else None,
+                'results': [{'key': f'page{page}X'}],
+            }
+            return response
+        mock_oauth_client.return_value.post.side_effect = post
+
+        results = DiscoveryApiClient().retrieve_metadata_for_content_filter({}, {})
+
+        self.assertEqual(results, [{'key': 'page1X'}, {'key': 'page2X'}])
+        requested_pages = [call[1]['params']['page'] for call in mock_oauth_client.return_value.post.call_args_list]
+        self.assertEqual(len(requested_pages), len(set(requested_pages)))
+
+    @mock.patch('enterprise_catalog.apps.api_client.base_oauth.OAuthAPIClient')
+    def test_retrieve_metadata_concurrent_page_error(self, mock_oauth_client):
+        """
+        retrieve_metadata_for_content_filter retries a failing page fetched concurrently,
+        and raises its error once the retries are exhausted.
+        """
+        def post(*args, **kwargs):  # pylint: disable=unused-argument
+            if kwargs['params']['page'] == 2:
+                raise requests.exceptions.ChunkedEncodingError()
+            response = mock.Mock(status_code=200)
+            response.json.return_value = {'count': 200, 'next': 'https://discovery/search/all/?page=2', 'results': []}
+            return response
+        mock_oauth_client.return_value.post.side_effect = post
+
+        client = DiscoveryApiClient()
+        client.BACKOFF_FACTOR = 0
+
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            client.retrieve_metadata_for_content_filter({}, {})
+        # the first page, plus the initial try and the retries of the second page
+        assert mock_oauth_client.return_value.post.call_count == 1 + 1 + client.MAX_RETRIES
+
     @mock.patch('enterprise_catalog.apps.api_client.base_oauth.OAuthAPIClient')
     def test_get_metadata_by_query_with_extra_query_params(self, mock_oauth_client):
         """
@@ -232,6 +383,30 @@ class TestDiscoveryApiClient(TestCase):
         })
         mock_sleep.assert_not_called()
 
+    @mock.patch('enterprise_catalog.apps.api_client.base_oauth.OAuthAPIClient')
+    def test_get_all_course_reviews_cached(self, mock_oauth_client):
+        """
+        get_all_course_reviews only pages through /course_review once while its cached index is fresh.
+        """
+        mock_oauth_client.return_value.get.return_value.status_code = 200
+        mock_oauth_client.return_value.get.return_value.json.return_value = {
+            'results': [{'course_key': 'edX+DemoX', 'reviews_count': 150}],
+        }
+        client = DiscoveryApiClient()
+
+        with override_settings(DISCOVERY_COURSE_REVIEWS_CACHE_TIMEOUT=60):
+            first_reviews = client.get_all_course_reviews()
+            second_reviews = client.get_all_course_reviews()
+
+        assert first_reviews == second_reviews == {'edX+DemoX': {'course_key': 'edX+DemoX', 'reviews_count': 150}}
+        mock_oauth_client.return_value.get.assert_called_once()
+
+        # Without a cache timeout, every call fetches the reviews.
+        cache.clear()
+        client.get_all_course_reviews()
+        client.get_all_course_reviews()
+        assert mock_oauth_client.return_value.get.call_count == 3
+
     @mock.patch('enterprise_catalog.apps.api_client.discovery.time.sleep')
     @mock.patch('enterprise_catalog.apps.api_client.discovery.LOGGER')
     @mock.patch('enterprise_catalog.apps.api_client.base_oauth.OAuthAPIClient')
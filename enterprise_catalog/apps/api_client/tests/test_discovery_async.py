@@ -0,0 +1,103 @@
+""" Tests for the asyncio discovery api client. """
+from unittest import mock
+
+import ddt
+import httpx
+from django.test import TestCase
+
+from ..discovery import DiscoveryApiClient
+from ..discovery_async import AsyncDiscoveryApiClient
+
+
+@ddt.ddt
+class TestAsyncDiscoveryApiClient(TestCase):
+    """ AsyncDiscoveryApiClient tests. """
+
+    def setUp(self):
+        super().setUp()
+        oauth_client_patcher = mock.patch('enterprise_catalog.apps.api_client.base_oauth.OAuthAPIClient')
+        self.mock_oauth_client = oauth_client_patcher.start()
+        self.addCleanup(oauth_client_patcher.stop)
+        self.mock_oauth_client.return_value.get_jwt_access_token.return_value = 'test-token'
+        self.requests = []
+
+    def _mock_transport(self, handler):
+        """
+        Makes the client send its requests to ``handler`` rather than over the network.
+        """
+        async_client_class = httpx.AsyncClient
+
+        def recording_handler(request):
+            self.requests.append(request)
+            return handler(request)
+
+        return mock.patch(
+            'enterprise_catalog.apps.api_client.discovery_async.httpx.AsyncClient',
+            side_effect=lambda **kwargs: async_client_class(transport=httpx.MockTransport(recording_handler), **kwargs),
+        )
+
+    @mock.patch('enterprise_catalog.apps.api_client.discovery.DISCOVERY_OFFSET_SIZE', 2)
+    @mock.patch('enterprise_catalog.apps.api_client.discovery_async.DISCOVERY_OFFSET_SIZE', 2)
+    @mock.patch('enterprise_catalog.apps.api_client.discovery_async.DISCOVERY_COURSE_KEY_BATCH_SIZE', 3)
+    def test_fetch_courses_by_keys(self):
+        """
+        Every key batch, and every page of each batch, is requested concurrently, and the results are
+        returned in the same order as when fetched one request at a time.
+        """
+        course_keys = ['edX+aX', 'edX+bX', 'edX+cX', 'edX+dX']
+
+        def handler(request):
+            batch_keys = request.url.params['keys'].split(',')
+            offset = int(request.url.params.get('offset', 0))
+            page_keys = batch_keys[offset:offset + 2]
+            return httpx.Response(200, json={
+                'count': len(batch_keys),
+                'next': 'next-page' if offset + 2 < len(batch_keys) else None,
+                'results': [{'key': key} for key in page_keys],
+            })
+
+        with self._mock_transport(handler):
+            courses = AsyncDiscoveryApiClient().fetch_courses_by_keys(course_keys, extra_query_params={'foo': 'bar'})
+
+        assert [course['key'] for course in courses] == course_keys
+        assert len(self.requests) == 3
+        for request in self.requests:
+            assert request.headers['Authorization'] == 'JWT test-token'
+            assert request.url.params['foo'] == 'bar'
+            assert request.url.params['ordering'] == 'key'
+            assert request.url.params['limit'] == '2'
+        self.mock_oauth_client.return_value.get.assert_not_called()
+
+    def test_fetch_programs_by_keys_error(self):
+        """
+        Errors are logged, like the synchronous client does, rather than raised.
+        """
+        with self._mock_transport(lambda request: httpx.Response(500, text='Server Error')):
+            with self.assertLogs('enterprise_catalog.apps.api_client.discovery_async', level='ERROR'):
+                programs = AsyncDiscoveryApiClient().fetch_programs_by_keys(['program-uuid'])
+
+        assert programs == []
+        assert self.requests[0].url.params['uuids'] == 'program-uuid'
+
+    @ddt.data(
+        ('fetch_courses_by_keys', ['edX+aX', 'edX+bX']),
+        ('fetch_programs_by_keys', ['program-uuid']),
+    )
+    @ddt.unpack
+    def test_request_params_match_sync_client(self, fetch_method_name, content_keys):
+        """
+        Each endpoint is requested with the same params as the synchronous client requests it with.
+        """
+        self.mock_oauth_client.return_value.get.return_value.json.return_value = {
+            'count': 0,
+            'next': None,
+            'results': [],
+        }
+        getattr(DiscoveryApiClient(), fetch_method_name)(content_keys)
+        sync_params = self.mock_oauth_client.return_value.get.call_args.kwargs['params']
+
+        with self._mock_transport(lambda request: httpx.Response(200, json={'count': 0, 'results': []})):
+            getattr(AsyncDiscoveryApiClient(), fetch_method_name)(content_keys)
+
+        assert len(self.requests) == 1
+        assert dict(self.requests[0].url.params) == {key: str(value) for key, value in sync_params.items()}
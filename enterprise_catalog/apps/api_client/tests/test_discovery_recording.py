@@ -0,0 +1,73 @@
+""" Tests for the record/replay of course-discovery responses. """
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+import requests
+from django.test import TestCase, override_settings
+
+from ..discovery import DiscoveryApiClient
+from ..discovery_recording import RECORD, REPLAY, RecordedResponseMissingError
+
+
+class TestDiscoveryRecording(TestCase):
+    """ Record/replay tests for DiscoveryApiClient. """
+
+    def setUp(self):
+        super().setUp()
+        corpus_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(corpus_dir.cleanup)
+        self.corpus_dir = corpus_dir.name
+
+    def _get_client(self, mode):
+        with override_settings(DISCOVERY_RECORDING_MODE=mode, DISCOVERY_RECORDING_DIR=self.corpus_dir):
+            return DiscoveryApiClient()
+
+    @mock.patch('enterprise_catalog.apps.api_client.base_oauth.OAuthAPIClient')
+    def test_replay_recorded_responses(self, mock_oauth_client):
+        """
+        Responses recorded from course-discovery are replayed for the same requests, without course-discovery.
+        """
+        mock_response = mock_oauth_client.return_value.post.return_value
+        mock_response.status_code = 200
+        mock_response.elapsed = timedelta(seconds=3)
+        mock_response.text = '{"results": [{"key": "fakeX"}], "next": null}'
+        mock_response.json.return_value = {'results': [{'key': 'fakeX'}], 'next': None}
+
+        content_filter = {'content_type': 'course'}
+        recorded_metadata = self._get_client(RECORD).get_metadata_by_content_filter(content_filter)
+        assert mock_oauth_client.return_value.post.call_count == 1
+
+        replayed_metadata = self._get_client(REPLAY).get_metadata_by_content_filter(content_filter)
+        assert replayed_metadata == recorded_metadata == [{'key': 'fakeX'}]
+        assert mock_oauth_client.return_value.post.call_count == 1
+
+    @mock.patch('enterprise_catalog.apps.api_client.base_oauth.OAuthAPIClient')
+    def test_replay_error_responses(self, mock_oauth_client):
+        """
+        Error responses are replayed with their status code.
+        """
+        mock_response = mock_oauth_client.return_value.get.return_value
+        mock_response.status_code = 500
+        mock_response.text = 'Server Error'
+
+        recording_client = self._get_client(RECORD).client
+        recording_client.get('https://edx.test.discovery/api/v1/courses/', params={'keys': 'edX+fakeX'})
+        replayed_response = self._get_client(REPLAY).client.get(
+            'https://other.test.discovery/api/v1/courses/', params={'keys': 'edX+fakeX'},
+        )
+
+        assert replayed_response.status_code == 500
+        with self.assertRaises(requests.exceptions.HTTPError):
+            replayed_response.raise_for_status()
+        with self.assertRaises(requests.exceptions.JSONDecodeError):
+            replayed_response.json()
+
+    @mock.patch('enterprise_catalog.apps.api_client.base_oauth.OAuthAPIClient')
+    def test_replay_unrecorded_request(self, mock_oauth_client):
+        """
+        Replaying a request that wasn't recorded raises, rather than falling back to course-discovery.
+        """
+        with self.assertRaises(RecordedResponseMissingError):
+            self._get_client(REPLAY).client.get('https://edx.test.discovery/api/v1/programs/', params={'page': 1})
+        mock_oauth_client.return_value.get.assert_not_called()
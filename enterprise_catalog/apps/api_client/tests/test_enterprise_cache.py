@@ -0,0 +1,142 @@
+import threading
+import time
+from unittest import mock
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .. import enterprise_cache
+from ..constants import ENTERPRISE_CUSTOMER_CACHE_KEY_TPL
+from ..enterprise_cache import (
+    EnterpriseCustomerDetails,
+    clear_local_enterprise_customer_cache,
+)
+
+
+@override_settings(
+    ENTERPRISE_CUSTOMER_CACHE_TIMEOUT=60,
+    ENTERPRISE_CUSTOMER_CACHE_STALE_TIMEOUT=60,
+)
+@mock.patch('enterprise_catalog.apps.api_client.enterprise_cache.EnterpriseApiClient')
+class TestEnterpriseCustomerDetails(TestCase):
+    """
+    Tests for the two-tier Enterprise Customer details cache.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        clear_local_enterprise_customer_cache()
+        self.customer_uuid = str(uuid4())
+        self.cache_key = ENTERPRISE_CUSTOMER_CACHE_KEY_TPL.format(uuid=self.customer_uuid)
+
+    def test_local_cache_hit_skips_shared_cache(self, mock_client):
+        """
+        Once fetched, customer data is served from the in-process cache.
+        """
+        mock_client.return_value.get_enterprise_customer.return_value = {'slug': 'sluggy'}
+
+        assert EnterpriseCustomerDetails(self.customer_uuid).slug == 'sluggy'
+        with mock.patch.object(enterprise_cache, 'cache') as mock_cache:
+            assert EnterpriseCustomerDetails(self.customer_uuid).slug == 'sluggy'
+        mock_cache.get.assert_not_called()
+        assert mock_client.return_value.get_enterprise_customer.call_count == 1
+
+    def test_shared_cache_populates_local_cache(self, mock_client):
+        """
+        Data written to the shared cache by another process is picked up without calling the API.
+        """
+        cache.set(self.cache_key, (time.time(), {'slug': 'shared'}))
+
+        assert EnterpriseCustomerDetails(self.customer_uuid).slug == 'shared'
+        cache.clear()
+        assert EnterpriseCustomerDetails(self.customer_uuid).slug == 'shared'
+        mock_client.return_value.get_enterprise_customer.assert_not_called()
+
+    @mock.patch('enterprise_catalog.apps.api_client.enterprise_cache.threading.Thread')
+    def test_stale_data_served_while_refreshing_once(self, mock_thread, mock_client):
+        """
+        Stale data is returned immediately and only one background refresh is started.
+        """
+        mock_client.return_value.get_enterprise_customer.return_value = {'slug': 'fresh'}
+        cache.set(self.cache_key, (time.time() - 90, {'slug': 'stale'}))
+
+        assert EnterpriseCustomerDetails(self.customer_uuid).slug == 'stale'
+        assert EnterpriseCustomerDetails(self.customer_uuid).slug == 'stale'
+        assert mock_thread.call_count == 1
+        mock_client.return_value.get_enterprise_customer.assert_not_called()
+
+        # Run the refresh the request path handed off.
+        mock_thread.call_args.kwargs['target']()
+
+        assert EnterpriseCustomerDetails(self.customer_uuid).slug == 'fresh'
+        assert mock_client.return_value.get_enterprise_customer.call_count == 1
+        assert not enterprise_cache._refresh_locks  # pylint: disable=protected-access
+
+    @mock.patch('enterprise_catalog.apps.api_client.enterprise_cache.threading.Thread')
+    def test_legacy_data_served_while_refreshing(self, mock_thread, mock_client):
+        """
+        Data cached without a timestamp is served and refreshed right away, but never kept in-process.
+        """
+        mock_client.return_value.get_enterprise_customer.return_value = {'slug': 'fresh'}
+        cache.set(self.cache_key, {'slug': 'legacy'})
+
+        assert EnterpriseCustomerDetails(self.customer_uuid).slug == 'legacy'
+        assert mock_thread.call_count == 1
+        assert self.cache_key not in enterprise_cache._local_cache  # pylint: disable=protected-access
+
+        mock_thread.call_args.kwargs['target']()
+
+        assert EnterpriseCustomerDetails(self.customer_uuid).slug == 'fresh'
+
+    def test_expired_data_is_refetched(self, mock_client):
+        """
+        Data older than the stale window is never served.
+        """
+        mock_client.return_value.get_enterprise_customer.return_value = {'slug': 'fresh'}
+        cache.set(self.cache_key, (time.time() - 150, {'slug': 'expired'}))
+
+        assert EnterpriseCustomerDetails(self.customer_uuid).slug == 'fresh'
+
+    def test_concurrent_misses_are_coalesced(self, mock_client):
+        """
+        Concurrent misses for the same customer make a single API call.
+        """
+        release_fetch = threading.Event()
+
+        def slow_get_enterprise_customer(uuid):
+            release_fetch.wait(timeout=5)
+            return {'slug': 'sluggy', 'uuid': uuid}
+        mock_client.return_value.get_enterprise_customer.side_effect = slow_get_enterprise_customer
+
+        slugs = []
+        threads = [
+            threading.Thread(target=lambda: slugs.append(EnterpriseCustomerDetails(self.customer_uuid).slug))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        release_fetch.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert slugs == ['sluggy'] * 5
+        assert mock_client.return_value.get_enterprise_customer.call_count == 1
+        # Refresh locks are dropped once no thread uses them.
+        assert not enterprise_cache._refresh_locks  # pylint: disable=protected-access
+
+    @override_settings(ENTERPRISE_CUSTOMER_LOCAL_CACHE_MAX_SIZE=1)
+    def test_local_cache_evicts_least_recently_used(self, mock_client):
+        """
+        The in-process cache holds at most the configured number of customers.
+        """
+        mock_client.return_value.get_enterprise_customer.return_value = {'slug': 'sluggy'}
+        other_uuid = str(uuid4())
+
+        EnterpriseCustomerDetails(self.customer_uuid)
+        EnterpriseCustomerDetails(other_uuid)
+
+        assert list(enterprise_cache._local_cache) == [  # pylint: disable=protected-access
+            ENTERPRISE_CUSTOMER_CACHE_KEY_TPL.format(uuid=other_uuid),
+        ]
@@ -85,6 +85,9 @@ PERMISSION_HAS_PROVISIONING_ADMIN_ACCESS = 'catalog.has_provisioning_admin_acces
 DISCOVERY_COURSE_KEY_BATCH_SIZE = 50
 DISCOVERY_PROGRAM_KEY_BATCH_SIZE = 50
 
+# Cache key of the content version token of a CatalogQuery
+CATALOG_QUERY_CONTENT_VERSION_CACHE_KEY_TPL = 'catalog_query_content_version:{id}'
+
 # Async task constants
 REINDEX_TASK_BATCH_SIZE = 10
 TASK_BATCH_SIZE = 250
@@ -125,6 +128,8 @@ FORCE_INCLUSION_METADATA_TAG_KEY = 'enterprise_force_included'
 LATE_ENROLLMENT_THRESHOLD_DAYS = 30
 
 RESTRICTED_RUNS_ALLOWED_KEY = 'restricted_runs_allowed'
+# Content filter lookup that limits discovery's /search/all results to content modified since a given time
+DISCOVERY_MODIFIED_SINCE_FILTER_KEY = 'modified__gte'
 COURSE_RUN_RESTRICTION_TYPE_KEY = 'restriction_type'
 RESTRICTION_FOR_B2B = 'custom-b2b-enterprise'
 QUERY_FOR_RESTRICTED_RUNS = {'include_restricted': RESTRICTION_FOR_B2B}
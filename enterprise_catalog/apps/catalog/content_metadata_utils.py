@@ -6,7 +6,12 @@ from logging import getLogger
 
 from enterprise_catalog.apps.catalog.utils import get_content_key
 
-from .constants import FORCE_INCLUSION_METADATA_TAG_KEY
+from .constants import (
+    COURSE,
+    FORCE_INCLUSION_METADATA_TAG_KEY,
+    LEARNER_PATHWAY,
+    PROGRAM,
+)
 
 
 LOGGER = getLogger(__name__)
@@ -43,6 +48,27 @@ def transform_course_metadata_to_visible(course_metadata):
     return course_metadata
 
 
+def get_child_content_keys(content_type, json_metadata):
+    """
+    Find the content referenced by the metadata of a program (its courses) or of
+    a learner pathway (the courses and programs of its steps).
+    Arguments:
+        content_type (str): The content type of the metadata.
+        json_metadata (dict): The metadata of a program or learner pathway.
+    Returns:
+        list: Distinct (child content type, child content key) tuples, in order of appearance.
+    """
+    json_metadata = json_metadata or {}
+    child_content_keys = []
+    if content_type == PROGRAM:
+        child_content_keys.extend((COURSE, course.get('key')) for course in json_metadata.get('courses') or [])
+    elif content_type == LEARNER_PATHWAY:
+        for step in json_metadata.get('steps') or []:
+            child_content_keys.extend((COURSE, course.get('key')) for course in step.get('courses') or [])
+            child_content_keys.extend((PROGRAM, program.get('uuid')) for program in step.get('programs') or [])
+    return [child for child in dict.fromkeys(child_content_keys) if child[1]]
+
+
 def get_course_run_by_uuid(course, course_run_uuid):
     """
     Find a course_run based on uuid
@@ -85,6 +111,24 @@ def is_course_run_active(course_run):
     return is_enrollable and (is_marketable_internal or is_marketable_external)
 
 
+def is_course_published(course):
+    """
+    Checks whether a course is published. That is, whether any of its course runs is published,
+    or, for a course without any runs, whether the course itself is not marked unpublished.
+    Arguments:
+        course (dict): The metadata about a course.
+    Returns:
+        bool: True if course is "published"
+    """
+    course_runs = course.get('course_runs') or []
+    if not course_runs:
+        return (course.get('status') or '').lower() != 'unpublished'
+    return any(
+        (course_run.get('status') or '').lower() == 'published'
+        for course_run in course_runs
+    )
+
+
 def get_course_first_paid_enrollable_seat_price(course):
     """
     Arguments:
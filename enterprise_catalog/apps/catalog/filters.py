@@ -1,6 +1,7 @@
 """
 Utility functions for catalog query filtering without elasticsearch
 """
+import json
 import logging
 
 
@@ -136,3 +137,99 @@ def does_query_match_content(query_dict, content_metadata_dict):
         results[field] = field_result
     logger.debug(results)
     return all(results.values())
+
+
+# Content filter keys that course-discovery can be asked to match against the union of several
+# queries' values, and whose values we can then re-apply locally with ``does_query_match_content()``.
+LOCALLY_EVALUATED_FILTER_KEYS = (
+    'aggregation_key',
+)
+
+
+def _get_locally_evaluated_filter(content_filter):
+    """
+    Returns the part of ``content_filter`` that can be evaluated locally after a shared fetch,
+    or None if the query can't share a fetch with other queries.
+    """
+    # Force-included courses are fetched separately for each query.
+    if content_filter.get('enterprise_force_include_aggregation_keys'):
+        return None
+    local_filter = {}
+    for key in LOCALLY_EVALUATED_FILTER_KEYS:
+        if key not in content_filter:
+            continue
+        value = content_filter[key]
+        values = [value] if isinstance(value, str) else value
+        if not isinstance(values, list) or not values or not all(isinstance(item, str) for item in values):
+            return None
+        local_filter[key] = values
+    return local_filter
+
+
+def get_shared_content_filter(content_filters):
+    """
+    Returns a content filter whose discovery results are a superset of the results of each
+    of the given content filters, or None if they don't share a filter structure.
+
+    Filters share a structure when they are identical apart from their ``LOCALLY_EVALUATED_FILTER_KEYS``.
+    The shared filter matches the union of their values for those keys, and drops a key altogether
+    if any of the filters doesn't restrict it.
+    """
+    local_filters = [_get_locally_evaluated_filter(content_filter) for content_filter in content_filters]
+    if not content_filters or None in local_filters:
+        return None
+
+    base_filters = [
+        {key: value for key, value in content_filter.items() if key not in LOCALLY_EVALUATED_FILTER_KEYS}
+        for content_filter in content_filters
+    ]
+    if any(base_filter != base_filters[0] for base_filter in base_filters):
+        return None
+
+    shared_filter = dict(base_filters[0])
+    for key in LOCALLY_EVALUATED_FILTER_KEYS:
+        if all(key in local_filter for local_filter in local_filters):
+            shared_filter[key] = sorted({value for local_filter in local_filters for value in local_filter[key]})
+    return shared_filter
+
+
+def filter_shared_content(content_filter, metadata):
+    """
+    Returns the entries of ``metadata``, fetched with the shared content filter of a group of
+    queries that includes ``content_filter``, that ``content_filter`` itself matches.
+    """
+    local_filter = _get_locally_evaluated_filter(content_filter)
+    if local_filter is None:
+        raise QueryFilterException(f'content filter {content_filter} cannot be evaluated locally')
+    return [entry for entry in metadata if does_query_match_content(local_filter, entry)]
+
+
+def plan_shared_content_fetches(catalog_queries):
+    """
+    Groups catalog queries whose content filters share a structure, so that each group's content
+    can be fetched from course-discovery once, with the group's shared content filter.
+
+    Returns:
+        tuple: A list of ``(shared_content_filter, catalog_queries)`` pairs for groups of two or more
+            queries, and the list of remaining catalog queries that must be fetched individually.
+    """
+    queries_by_base_filter = {}
+    individual_queries = []
+    for catalog_query in catalog_queries:
+        content_filter = catalog_query.content_filter
+        if _get_locally_evaluated_filter(content_filter) is None:
+            individual_queries.append(catalog_query)
+            continue
+        base_filter = {
+            key: value for key, value in content_filter.items() if key not in LOCALLY_EVALUATED_FILTER_KEYS
+        }
+        queries_by_base_filter.setdefault(json.dumps(base_filter, sort_keys=True), []).append(catalog_query)
+
+    shared_fetches = []
+    for grouped_queries in queries_by_base_filter.values():
+        if len(grouped_queries) < 2:
+            individual_queries.extend(grouped_queries)
+            continue
+        shared_filter = get_shared_content_filter([catalog_query.content_filter for catalog_query in grouped_queries])
+        shared_fetches.append((shared_filter, grouped_queries))
+    return shared_fetches, individual_queries
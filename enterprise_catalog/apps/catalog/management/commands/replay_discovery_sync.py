@@ -0,0 +1,105 @@
+import logging
+import time
+
+from celery import group
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from enterprise_catalog.apps.api.tasks import (
+    fetch_missing_course_metadata_task,
+    fetch_missing_pathway_metadata_task,
+    update_full_content_metadata_task,
+)
+from enterprise_catalog.apps.api_client.discovery_recording import (
+    RECORD,
+    REPLAY,
+    recording_override,
+)
+from enterprise_catalog.apps.catalog.management.commands.update_content_metadata import \
+    Command as UpdateContentMetadataCommand
+from enterprise_catalog.apps.catalog.models import CatalogQuery
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs the content metadata sync pipeline of the update_content_metadata command in-process, against '
+        'course-discovery responses recorded on disk, and reports how long each stage took. Unless --commit '
+        'is given, every change the pipeline makes to the database is rolled back once it has run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corpus-dir',
+            dest='corpus_dir',
+            required=True,
+            help='The directory that course-discovery responses are recorded to, and replayed from.',
+        )
+        parser.add_argument(
+            '--record',
+            default=False,
+            action='store_true',
+            help='Sync against the live course-discovery service, recording its responses to the corpus.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            dest='dry_run',
+            default=False,
+            action='store_true',
+            help='Log rather than commit content metadata changes.',
+        )
+        parser.add_argument(
+            '--commit',
+            default=False,
+            action='store_true',
+            help='Keep the changes the pipeline makes to the database, rather than rolling them back.',
+        )
+
+    def _run_stage(self, stage_timings, stage_name, signature):
+        """
+        Runs the celery ``signature`` in-process, raising any error, and records how long it took.
+        """
+        logger.info('replay_discovery_sync starting stage %s', stage_name)
+        start_time = time.perf_counter()
+        signature.apply().get()
+        stage_timings.append((stage_name, time.perf_counter() - start_time))
+
+    def handle(self, *args, **options):
+        mode = RECORD if options['record'] else REPLAY
+        # Every run should go through the whole pipeline, regardless of when its tasks last ran.
+        flags = {'force': True, 'dry_run': options['dry_run']}
+        catalog_queries = CatalogQuery.objects.filter(enterprise_catalogs__isnull=False).distinct()
+
+        stage_timings = []
+        # The whole pipeline is rolled back at once, rather than stage by stage, since each stage reads
+        # the content metadata written by the previous ones.
+        with transaction.atomic(), recording_override(mode, options['corpus_dir']):
+            self._run_stage(
+                stage_timings, 'fetch_missing_pathway_metadata_task', fetch_missing_pathway_metadata_task.si(**flags),
+            )
+            self._run_stage(
+                stage_timings, 'fetch_missing_course_metadata_task', fetch_missing_course_metadata_task.si(**flags),
+            )
+            # Plan the catalog query updates just as the update_content_metadata command does.
+            update_command = UpdateContentMetadataCommand()
+            catalog_metadata_tasks = update_command._update_catalog_metadata_tasks(  # pylint: disable=protected-access
+                catalog_queries, True, **flags
+            )
+            self._run_stage(
+                stage_timings,
+                f'update_catalog_metadata_task ({len(catalog_queries)} catalog queries)',
+                group(catalog_metadata_tasks),
+            )
+            self._run_stage(
+                stage_timings, 'update_full_content_metadata_task', update_full_content_metadata_task.si(**flags),
+            )
+            if not options['commit']:
+                logger.info('replay_discovery_sync rolling back the changes of the sync pipeline')
+                transaction.set_rollback(True)
+
+        self.stdout.write(f'Sync pipeline stage timings ({mode} of {options["corpus_dir"]}):')
+        for stage_name, seconds in stage_timings:
+            self.stdout.write(f'  {stage_name:<65} {seconds:10.2f}s')
+        self.stdout.write(f'  {"total":<65} {sum(seconds for _, seconds in stage_timings):10.2f}s')
@@ -0,0 +1,93 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from enterprise_catalog.apps.api_client.discovery_recording import (
+    get_recording_settings,
+)
+from enterprise_catalog.apps.catalog.models import ContentMetadata
+from enterprise_catalog.apps.catalog.tests.factories import (
+    CatalogQueryFactory,
+    ContentMetadataFactory,
+    EnterpriseCatalogFactory,
+)
+
+
+class ReplayDiscoverySyncCommandTests(TestCase):
+    command_name = 'replay_discovery_sync'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.catalog_query = CatalogQueryFactory()
+        cls.enterprise_catalog = EnterpriseCatalogFactory(catalog_query=cls.catalog_query)
+
+    @mock.patch('enterprise_catalog.apps.catalog.management.commands.replay_discovery_sync.group')
+    @mock.patch('enterprise_catalog.apps.catalog.management.commands.replay_discovery_sync.update_full_content_metadata_task')
+    @mock.patch(
+        'enterprise_catalog.apps.catalog.management.commands.replay_discovery_sync.fetch_missing_course_metadata_task')
+    @mock.patch(
+        'enterprise_catalog.apps.catalog.management.commands.replay_discovery_sync.fetch_missing_pathway_metadata_task')
+    def test_replay_discovery_sync(
+        self, mock_fetch_missing_pathway, mock_fetch_missing_course, mock_full_metadata_task, mock_group,
+    ):
+        """
+        Verify that the command runs every stage of the sync pipeline while replaying the corpus, reports
+        the timing of each stage, and rolls back the changes the pipeline made.
+        """
+        replay_settings = []
+
+        def record_replay_settings():
+            replay_settings.append(get_recording_settings())
+            ContentMetadataFactory(content_key='edX+replayedX')
+            return mock.DEFAULT
+
+        mock_full_metadata_task.si.return_value.apply.side_effect = record_replay_settings
+        out = StringIO()
+
+        call_command(self.command_name, corpus_dir='/tmp/corpus', stdout=out)
+
+        flags = {'force': True, 'dry_run': False}
+        mock_fetch_missing_pathway.si.assert_called_once_with(**flags)
+        mock_fetch_missing_course.si.assert_called_once_with(**flags)
+        mock_full_metadata_task.si.assert_called_once_with(**flags)
+        assert len(mock_group.call_args.args[0]) == 1
+        mock_group.return_value.apply.assert_called_once_with()
+        assert replay_settings == [('replay', '/tmp/corpus')]
+        assert get_recording_settings() == (None, None)
+        assert not ContentMetadata.objects.filter(content_key='edX+replayedX').exists()
+
+        output = out.getvalue()
+        assert 'replay of /tmp/corpus' in output
+        for stage_name in (
+            'fetch_missing_pathway_metadata_task',
+            'fetch_missing_course_metadata_task',
+            'update_catalog_metadata_task (1 catalog queries)',
+            'update_full_content_metadata_task',
+            'total',
+        ):
+            assert stage_name in output
+
+    @mock.patch('enterprise_catalog.apps.catalog.management.commands.replay_discovery_sync.group')
+    @mock.patch('enterprise_catalog.apps.catalog.management.commands.replay_discovery_sync.update_full_content_metadata_task')
+    @mock.patch(
+        'enterprise_catalog.apps.catalog.management.commands.replay_discovery_sync.fetch_missing_course_metadata_task')
+    @mock.patch(
+        'enterprise_catalog.apps.catalog.management.commands.replay_discovery_sync.fetch_missing_pathway_metadata_task')
+    def test_replay_discovery_sync_commit(
+        self, mock_fetch_missing_pathway, mock_fetch_missing_course, mock_full_metadata_task, mock_group,
+    ):
+        """
+        Verify that the changes the pipeline made are kept with --commit.
+        """
+        def create_content_metadata():
+            ContentMetadataFactory(content_key='edX+replayedX')
+            return mock.DEFAULT
+
+        mock_full_metadata_task.si.return_value.apply.side_effect = create_content_metadata
+
+        call_command(self.command_name, corpus_dir='/tmp/corpus', commit=True, stdout=StringIO())
+
+        assert ContentMetadata.objects.filter(content_key='edX+replayedX').exists()
@@ -1,7 +1,9 @@
 from unittest import mock
 
 from django.core.management import call_command
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from edx_django_utils.cache import RequestCache
+from waffle.testutils import override_switch
 
 from enterprise_catalog.apps.api.tasks import TaskRecentlyRunError
 from enterprise_catalog.apps.catalog.models import (
@@ -13,6 +15,11 @@ from enterprise_catalog.apps.catalog.tests.factories import (
     ContentMetadataFactory,
     EnterpriseCatalogFactory,
 )
+from enterprise_catalog.apps.catalog.waffle import (
+    SCHEDULE_CATALOG_QUERY_UPDATES_SWITCH,
+    SHARD_FULL_COURSE_METADATA_UPDATE_SWITCH,
+    SHARE_DISCOVERY_FETCHES_ACROSS_QUERIES_SWITCH,
+)
 
 
 class UpdateContentMetadataCommandTests(TestCase):
@@ -30,6 +37,8 @@ class UpdateContentMetadataCommandTests(TestCase):
 
     def setUp(self):
         super().setUp()
+        # Waffle switches memoize their state in the request cache, which would otherwise outlive each test.
+        RequestCache.clear_all_namespaces()
         self.command_config_mock = mock.patch('enterprise_catalog.apps.catalog.models.CatalogUpdateCommandConfig')
         mock_config = self.command_config_mock.start()
         mock_config.current_config.return_value = {
@@ -99,6 +108,132 @@ class UpdateContentMetadataCommandTests(TestCase):
         ])
         mock_full_metadata_task.apply.assert_called_once_with(kwargs={"force": False, "dry_run": False})
 
+    @override_switch(SHARD_FULL_COURSE_METADATA_UPDATE_SWITCH.name, active=True)
+    @mock.patch('enterprise_catalog.apps.catalog.management.commands.update_content_metadata.dispatch_algolia_indexing')
+    @mock.patch(
+        'enterprise_catalog.apps.catalog.management.commands.update_content_metadata.fetch_missing_course_metadata_task')
+    @mock.patch(
+        'enterprise_catalog.apps.catalog.management.commands.update_content_metadata.fetch_missing_pathway_metadata_task')
+    @mock.patch('enterprise_catalog.apps.catalog.management.commands.update_content_metadata.group')
+    @mock.patch('enterprise_catalog.apps.catalog.management.commands.update_content_metadata.update_catalog_metadata_task')
+    @mock.patch('enterprise_catalog.apps.catalog.management.commands.update_content_metadata.update_full_content_metadata_task')
+    def test_update_content_metadata_shards_full_course_update(
+        self, mock_full_metadata_task, mock_catalog_task, mock_group, mock_fetch_missing_pathway,
+        mock_fetch_missing_course, mock_dispatch
+    ):
+        """
+        Verify that the full course metadata update is sharded across workers when enabled,
+        unless the command runs without celery.
+        """
+        call_command(self.command_name)
+        mock_full_metadata_task.apply.assert_called_once_with(
+            kwargs={"force": False, "dry_run": False, "shard_courses": True}
+        )
+
+        mock_full_metadata_task.reset_mock()
+        call_command(self.command_name, no_async=True)
+        mock_full_metadata_task.apply.assert_called_once_with(kwargs={"force": False, "dry_run": False})
+
+    @override_switch(SHARE_DISCOVERY_FETCHES_ACROSS_QUERIES_SWITCH.name, active=True)
+    @mock.patch('enterprise_catalog.apps.catalog.management.commands.update_content_metadata.dispatch_algolia_indexing')
+    @mock.patch(
+        'enterprise_catalog.apps.catalog.management.commands.update_content_metadata.fetch_missing_course_metadata_task')
+    @mock.patch(
+        'enterprise_catalog.apps.catalog.management.commands.update_content_metadata.fetch_missing_pathway_metadata_task')
+    @mock.patch('enterprise_catalog.apps.catalog.management.commands.update_content_metadata.group')
+    @mock.patch(
+        'enterprise_catalog.apps.catalog.management.commands.update_content_metadata.'
+        'update_catalog_metadata_shared_fetch_task'
+    )
+    @mock.patch('enterprise_catalog.apps.catalog.management.commands.update_content_metadata.update_catalog_metadata_task')
+    @mock.patch('enterprise_catalog.apps.catalog.management.commands.update_content_metadata.update_full_content_metadata_task')
+    def test_update_content_metadata_shared_fetches(
+        self, mock_full_metadata_task, mock_catalog_task, mock_shared_fetch_task, mock_group,
+        mock_fetch_missing_pathway, mock_fetch_missing_course, mock_dispatch
+    ):
+        """
+        Verify that catalog queries sharing a content filter structure are updated by a single task.
+        """
+        shared_query_a = CatalogQueryFactory(content_filter={'org': 'edX', 'aggregation_key': ['course:edX+A']})
+        shared_query_b = CatalogQueryFactory(content_filter={'org': 'edX', 'aggregation_key': ['course:edX+B']})
+        EnterpriseCatalogFactory(catalog_query=shared_query_a)
+        EnterpriseCatalogFactory(catalog_query=shared_query_b)
+
+        call_command(self.command_name)
+
+        mock_shared_fetch_task.s.assert_called_once_with(
+            [shared_query_a.id, shared_query_b.id], force=False, dry_run=False,
+        )
+        mock_group.assert_called_once_with([
+            mock_shared_fetch_task.s.return_value,
+            mock_catalog_task.s(catalog_query_id=self.catalog_query_a, force=False, dry_run=False),
+            mock_catalog_task.s(catalog_query_id=self.catalog_query_b, force=False, dry_run=False),
+        ])
+
+    # pylint: disable=unused-argument
+    @override_switch(SCHEDULE_CATALOG_QUERY_UPDATES_SWITCH.name, active=True)
+    @override_settings(CATALOG_QUERY_UPDATE_MAX_CONCURRENCY=2)
+    @mock.patch(
+        'enterprise_catalog.apps.catalog.management.commands.update_content_metadata.'
+        'estimate_catalog_query_update_seconds'
+    )
+    @mock.patch(
+        'enterprise_catalog.apps.catalog.management.commands.update_content_metadata.get_unchanged_catalog_queries')
+    @mock.patch('enterprise_catalog.apps.catalog.management.commands.update_content_metadata.dispatch_algolia_indexing')
+    @mock.patch(
+        'enterprise_catalog.apps.catalog.management.commands.update_content_metadata.fetch_missing_course_metadata_task')
+    @mock.patch(
+        'enterprise_catalog.apps.catalog.management.commands.update_content_metadata.fetch_missing_pathway_metadata_task')
+    @mock.patch('enterprise_catalog.apps.catalog.management.commands.update_content_metadata.group')
+    @mock.patch('enterprise_catalog.apps.catalog.management.commands.update_content_metadata.update_catalog_metadata_task')
+    @mock.patch('enterprise_catalog.apps.catalog.management.commands.update_content_metadata.update_full_content_metadata_task')
+    def test_update_content_metadata_scheduled(
+        self, mock_full_metadata_task, mock_catalog_task, mock_group, mock_fetch_missing_pathway,
+        mock_fetch_missing_course, mock_dispatch, mock_get_unchanged_queries, mock_estimate_seconds,
+    ):
+        """
+        Verify that catalog queries with unchanged content are skipped, and the rest are updated longest first,
+        a limited number at a time.
+        """
+        catalog_query_c = CatalogQueryFactory()
+        catalog_query_d = CatalogQueryFactory()
+        EnterpriseCatalogFactory(catalog_query=catalog_query_c)
+        EnterpriseCatalogFactory(catalog_query=catalog_query_d)
+        mock_get_unchanged_queries.return_value = [self.catalog_query_a]
+        mock_estimate_seconds.return_value = {
+            self.catalog_query_b.id: 5,
+            catalog_query_c.id: 20,
+            catalog_query_d.id: 10,
+        }
+
+        started_query_ids = []
+        running_query_ids = []
+
+        def update_catalog_metadata_signature(catalog_query_id, **kwargs):
+            def apply_async():
+                started_query_ids.append(catalog_query_id)
+                running_query_ids.append(catalog_query_id)
+                assert len(running_query_ids) <= 2
+                result = mock.Mock()
+                # Every task has finished by the time it's first checked on.
+                result.ready.side_effect = lambda: running_query_ids.remove(catalog_query_id) or True
+                if catalog_query_id == catalog_query_c.id:
+                    result.get.side_effect = TaskRecentlyRunError('dedup')
+                return result
+
+            signature = mock.Mock()
+            signature.apply_async.side_effect = apply_async
+            return signature
+
+        mock_catalog_task.s.side_effect = update_catalog_metadata_signature
+
+        call_command(self.command_name)
+
+        mock_group.assert_not_called()
+        assert started_query_ids == [catalog_query_c.id, catalog_query_d.id, self.catalog_query_b.id]
+        assert not running_query_ids
+        mock_full_metadata_task.apply.assert_called_once_with(kwargs={"force": False, "dry_run": False})
+
     @mock.patch('enterprise_catalog.apps.catalog.management.commands.update_content_metadata.dispatch_algolia_indexing')
     @mock.patch(
         'enterprise_catalog.apps.catalog.management.commands.update_content_metadata.fetch_missing_course_metadata_task')
@@ -1,17 +1,33 @@
 import logging
+import time
+from collections import deque
 
 from celery import group
+from celery.exceptions import TimeoutError as CeleryTimeoutError
+from django.conf import settings
 from django.core.management.base import BaseCommand
 
 from enterprise_catalog.apps.api.tasks import (
     TaskRecentlyRunError,
     fetch_missing_course_metadata_task,
     fetch_missing_pathway_metadata_task,
+    update_catalog_metadata_shared_fetch_task,
     update_catalog_metadata_task,
     update_full_content_metadata_task,
 )
 from enterprise_catalog.apps.catalog.constants import TASK_TIMEOUT
+from enterprise_catalog.apps.catalog.filters import plan_shared_content_fetches
 from enterprise_catalog.apps.catalog.models import CatalogQuery
+from enterprise_catalog.apps.catalog.scheduling import (
+    estimate_catalog_query_update_seconds,
+    get_unchanged_catalog_queries,
+    order_catalog_query_updates,
+)
+from enterprise_catalog.apps.catalog.waffle import (
+    SCHEDULE_CATALOG_QUERY_UPDATES_SWITCH,
+    SHARD_FULL_COURSE_METADATA_UPDATE_SWITCH,
+    SHARE_DISCOVERY_FETCHES_ACROSS_QUERIES_SWITCH,
+)
 from enterprise_catalog.apps.search.tasks import dispatch_algolia_indexing
 
 
@@ -32,6 +48,118 @@ class Command(BaseCommand):
             logger.info(async_message, catalog_query)
         return update_catalog_metadata_task.s(catalog_query.id, **kwargs)
 
+    def _update_catalog_metadata_shared_fetch_task(self, catalog_queries, no_async, **kwargs):
+        if not no_async:
+            logger.info(
+                'Spinning off update_catalog_metadata_shared_fetch_task from update_content_metadata command'
+                ' to update content_metadata for catalog queries %s.',
+                catalog_queries,
+            )
+        return update_catalog_metadata_shared_fetch_task.s(
+            [catalog_query.id for catalog_query in catalog_queries], **kwargs
+        )
+
+    def _update_catalog_metadata_tasks(self, catalog_queries, no_async, **kwargs):
+        """
+        Returns the tasks that update the content metadata of `catalog_queries`. When enabled, catalog queries
+        that share a content filter structure are updated together, from a single course-discovery fetch.
+        """
+        return [task for task, _ in self._plan_catalog_metadata_tasks(catalog_queries, no_async, **kwargs)]
+
+    def _plan_catalog_metadata_tasks(self, catalog_queries, no_async, **kwargs):
+        """
+        Same as `_update_catalog_metadata_tasks`, but returns `(task, catalog_queries)` pairs of each task
+        and the catalog queries it updates.
+        """
+        if not SHARE_DISCOVERY_FETCHES_ACROSS_QUERIES_SWITCH.is_enabled():
+            return [
+                (self._update_catalog_metadata_task(catalog_query, no_async, **kwargs), [catalog_query])
+                for catalog_query in catalog_queries
+            ]
+
+        shared_fetches, individual_queries = plan_shared_content_fetches(catalog_queries)
+        logger.info(
+            'Planned %d shared course-discovery fetches for %d catalog queries and %d individual fetches, '
+            'saving %d of %d /search/all traversals.',
+            len(shared_fetches),
+            sum(len(grouped_queries) for _, grouped_queries in shared_fetches),
+            len(individual_queries),
+            sum(len(grouped_queries) - 1 for _, grouped_queries in shared_fetches),
+            len(catalog_queries),
+        )
+        return [
+            (self._update_catalog_metadata_shared_fetch_task(grouped_queries, no_async, **kwargs), grouped_queries)
+            for _, grouped_queries in shared_fetches
+        ] + [
+            (self._update_catalog_metadata_task(catalog_query, no_async, **kwargs), [catalog_query])
+            for catalog_query in individual_queries
+        ]
+
+    def _scheduled_catalog_metadata_tasks(self, catalog_queries, no_async, **kwargs):
+        """
+        Returns the tasks that update the content metadata of `catalog_queries` longest first, leaving out the
+        catalog queries whose content course-discovery hasn't modified since their last sync.
+        """
+        unchanged_catalog_queries = get_unchanged_catalog_queries(catalog_queries)
+        logger.info(
+            'Skipping the update of %d of %d CatalogQueries, whose content is unchanged since their last sync: %s',
+            len(unchanged_catalog_queries),
+            len(catalog_queries),
+            unchanged_catalog_queries,
+        )
+        unchanged_catalog_query_ids = {catalog_query.id for catalog_query in unchanged_catalog_queries}
+        catalog_queries = [
+            catalog_query for catalog_query in catalog_queries if catalog_query.id not in unchanged_catalog_query_ids
+        ]
+        return order_catalog_query_updates(
+            self._plan_catalog_metadata_tasks(catalog_queries, no_async, **kwargs),
+            estimate_catalog_query_update_seconds(catalog_queries),
+        )
+
+    def _run_scheduled_catalog_metadata_tasks(self, catalog_queries, no_async, **kwargs):
+        """
+        Runs the scheduled tasks that update the content metadata of `catalog_queries` in order, rather than
+        all at once in a group, and waits for them to finish.
+        """
+        scheduled_tasks = self._scheduled_catalog_metadata_tasks(catalog_queries, no_async, **kwargs)
+        if no_async:
+            for task in scheduled_tasks:
+                task.apply()
+        else:
+            self._apply_async_with_concurrency_limit(scheduled_tasks)
+        logger.info('Finished doing catalog metadata update related to %d scheduled tasks', len(scheduled_tasks))
+
+    def _apply_async_with_concurrency_limit(self, tasks):
+        """
+        Runs `tasks` in order, with at most `CATALOG_QUERY_UPDATE_MAX_CONCURRENCY` of them running at a time,
+        and waits for all of them to finish.
+
+        Unlike in a group, a task that was recently run doesn't keep the command from waiting on the others.
+        """
+        pending_tasks = deque(tasks)
+        running_results = []
+        deadline = time.monotonic() + TASK_TIMEOUT
+        while pending_tasks or running_results:
+            while pending_tasks and len(running_results) < settings.CATALOG_QUERY_UPDATE_MAX_CONCURRENCY:
+                running_results.append(pending_tasks.popleft().apply_async())
+
+            finished_results = [result for result in running_results if result.ready()]
+            if not finished_results:
+                if time.monotonic() > deadline:
+                    raise CeleryTimeoutError('The operation timed out.')
+                time.sleep(settings.CATALOG_QUERY_UPDATE_POLL_INTERVAL)
+                continue
+
+            for result in finished_results:
+                running_results.remove(result)
+                try:
+                    result.get(propagate=True)
+                except TaskRecentlyRunError:
+                    logger.info(
+                        'An update_catalog_metadata_task was recently run prior to this command, '
+                        'and was thus skipped during the execution of this command.'
+                    )
+
     def _fetch_missing_course_metadata_task_async(self, **kwargs):
         logger.info(
             'Spinning off fetch_missing_course_metadata_task from update_content_metadata command'
@@ -52,16 +180,19 @@ class Command(BaseCommand):
             propagate=True,
         )
 
-    def _update_full_content_metadata_task_sync(self, **kwargs):
+    def _update_full_content_metadata_task_sync(self, no_async=False, **kwargs):
         """
         Runs `update_full_content_metadata_task` synchronously via `.apply()`.
 
-        Runs in-process to avoid Celery worker timeouts on large datasets.
+        Runs in-process to avoid Celery worker timeouts on large datasets. When enabled, and the command
+        isn't run with --no-async, the task shards the course updates across Celery workers.
         """
         logger.info(
             'Running update_full_content_metadata_task synchronously from update_content_metadata command'
             ' to replace minimal json_metadata from /search/all/ with full json_metadata from /courses/.'
         )
+        if not no_async and SHARD_FULL_COURSE_METADATA_UPDATE_SWITCH.is_enabled():
+            kwargs['shard_courses'] = True
         return update_full_content_metadata_task.apply(kwargs=kwargs)
 
     def add_arguments(self, parser):
@@ -118,49 +249,49 @@ class Command(BaseCommand):
 
         # find all CatalogQuery records used by at least one EnterpriseCatalog to avoid
         # calling /search/all/ for a CatalogQuery that is not currently used by any catalogs.
-        catalog_queries = CatalogQuery.objects.filter(enterprise_catalogs__isnull=False).distinct()
+        catalog_queries = CatalogQuery.objects.filter(enterprise_catalogs__isnull=False).distinct().order_by('id')
 
         if not catalog_queries:
             logger.error('No matching CatalogQuery objects found. Exiting.')
             return
 
-        # First, we create a group of celery tasks that run in parallel to create/update ContentMetadata records
-        # and associate those with the appropriate CatalogQuery(s).
-        # It's possible that one of the tasks in the group will fail with a TaskRecentlyRunError.
-        # Note that a failed task in a group does not stop the rest of the tasks in the group from running.
-        # We consider this error innocuous, and don't want an occurrence(s) of it to prevent
-        # update_full_content_metadata_task from being run.
-        # Thus we run the update_catalog_metadata_tasks in their own group, wait
-        # for the entire group to finish, and then execute update_full_content_metadata_task
-        # asynchronously.  This is functionally equivalent to building a celery chord from this entire set of tasks.
-        # We use this strategy instead because celery.chord() won't execute the trailing task if a failure occurs
-        # in the set of parent tasks.
-        # https://docs.celeryproject.org/en/v5.0.5/userguide/canvas.html
-        update_group = group(
-            [
-                self._update_catalog_metadata_task(catalog_query, no_async, **flags)
-                for catalog_query in catalog_queries
-            ]
-        )
-        try:
-            if no_async:
-                update_group_result = update_group.apply(kwargs=flags)
-            else:
-                update_group_result = update_group.apply_async().get(
-                    timeout=TASK_TIMEOUT,
-                    propagate=True,
+        if SCHEDULE_CATALOG_QUERY_UPDATES_SWITCH.is_enabled():
+            self._run_scheduled_catalog_metadata_tasks(catalog_queries, no_async, **flags)
+        else:
+            # First, we create a group of celery tasks that run in parallel to create/update ContentMetadata records
+            # and associate those with the appropriate CatalogQuery(s).
+            # It's possible that one of the tasks in the group will fail with a TaskRecentlyRunError.
+            # Note that a failed task in a group does not stop the rest of the tasks in the group from running.
+            # We consider this error innocuous, and don't want an occurrence(s) of it to prevent
+            # update_full_content_metadata_task from being run.
+            # Thus we run the update_catalog_metadata_tasks in their own group, wait
+            # for the entire group to finish, and then execute update_full_content_metadata_task
+            # asynchronously.  This is functionally equivalent to building a celery chord from this entire set of tasks.
+            # We use this strategy instead because celery.chord() won't execute the trailing task if a failure occurs
+            # in the set of parent tasks.
+            # https://docs.celeryproject.org/en/v5.0.5/userguide/canvas.html
+            update_group = group(self._update_catalog_metadata_tasks(catalog_queries, no_async, **flags))
+            try:
+                if no_async:
+                    update_group_result = update_group.apply(kwargs=flags)
+                else:
+                    update_group_result = update_group.apply_async().get(
+                        timeout=TASK_TIMEOUT,
+                        propagate=True,
+                    )
+                logger.info(
+                    'Finished doing catalog metadata update related to {} CatalogQueries'.format(
+                        len(update_group_result)
+                    )
+                )
+            except TaskRecentlyRunError:
+                logger.info(
+                    'One or more update_catalog_metadata_task was recently run prior to this command, '
+                    'and those particular tasks were thus skipped during the execution of this command.'
                 )
-            logger.info(
-                'Finished doing catalog metadata update related to {} CatalogQueries'.format(len(update_group_result))
-            )
-        except TaskRecentlyRunError:
-            logger.info(
-                'One or more update_catalog_metadata_task was recently run prior to this command, '
-                'and those particular tasks were thus skipped during the execution of this command.'
-            )
 
         try:
-            self._update_full_content_metadata_task_sync(**flags)
+            self._update_full_content_metadata_task_sync(no_async=no_async, **flags)
             logger.info('Finished doing full update of metadata records.')
         except TaskRecentlyRunError:
             logger.info(
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:35
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0045_add_content_translation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnterpriseCatalogContentMembership',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('enterprise_uuid', models.UUIDField()),
+                ('content_key', models.CharField(max_length=255)),
+                ('parent_content_key', models.CharField(blank=True, max_length=255, null=True)),
+                ('is_restricted_run', models.BooleanField(default=False, help_text='Whether this row represents a restricted course run. Restricted runs are only visible to callers that explicitly request restricted content.')),
+                ('catalog_query', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='content_memberships', to='catalog.catalogquery')),
+                ('enterprise_catalog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='content_memberships', to='catalog.enterprisecatalog')),
+            ],
+            options={
+                'verbose_name': 'Enterprise Catalog Content Membership',
+                'verbose_name_plural': 'Enterprise Catalog Content Memberships',
+                'indexes': [models.Index(fields=['enterprise_uuid', 'content_key'], name='catalog_ent_enterpr_bd92ea_idx'), models.Index(fields=['enterprise_uuid', 'parent_content_key'], name='catalog_ent_enterpr_f98a17_idx')],
+                'unique_together': {('enterprise_catalog', 'content_key')},
+            },
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:47
+
+from django.db import migrations, models
+
+from enterprise_catalog.apps.api.v1.utils import is_any_course_run_active
+from enterprise_catalog.apps.catalog.content_metadata_utils import (
+    is_course_published,
+)
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_status_flags(apps, schema_editor):
+    """
+    Computes is_published and is_active for existing courses, which are
+    the only content type for which either flag can be False.
+    """
+    for model_name in ('ContentMetadata', 'RestrictedCourseMetadata'):
+        model = apps.get_model('catalog', model_name)
+        records_to_update = []
+        for record in model.objects.filter(content_type='course').iterator(chunk_size=BACKFILL_BATCH_SIZE):
+            json_metadata = record._json_metadata or {}  # pylint: disable=protected-access
+            record.is_published = is_course_published(json_metadata)
+            record.is_active = is_any_course_run_active(json_metadata.get('course_runs') or [])
+            records_to_update.append(record)
+            if len(records_to_update) >= BACKFILL_BATCH_SIZE:
+                model.objects.bulk_update(records_to_update, ['is_published', 'is_active'])
+                records_to_update = []
+        if records_to_update:
+            model.objects.bulk_update(records_to_update, ['is_published', 'is_active'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0046_enterprisecatalogcontentmembership'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentmetadata',
+            name='is_active',
+            field=models.BooleanField(db_index=True, default=True, help_text='Whether this content is active, derived from its json metadata when saved. A course is active if any of its runs is published, enrollable, and marketable; other content types are always considered active.'),
+        ),
+        migrations.AddField(
+            model_name='contentmetadata',
+            name='is_published',
+            field=models.BooleanField(db_index=True, default=True, help_text='Whether this content is published, derived from its json metadata when saved. A course is published if any of its runs is published; other content types are always considered published.'),
+        ),
+        migrations.AddField(
+            model_name='historicalcontentmetadata',
+            name='is_active',
+            field=models.BooleanField(db_index=True, default=True, help_text='Whether this content is active, derived from its json metadata when saved. A course is active if any of its runs is published, enrollable, and marketable; other content types are always considered active.'),
+        ),
+        migrations.AddField(
+            model_name='historicalcontentmetadata',
+            name='is_published',
+            field=models.BooleanField(db_index=True, default=True, help_text='Whether this content is published, derived from its json metadata when saved. A course is published if any of its runs is published; other content types are always considered published.'),
+        ),
+        migrations.AddField(
+            model_name='historicalrestrictedcoursemetadata',
+            name='is_active',
+            field=models.BooleanField(db_index=True, default=True, help_text='Whether this content is active, derived from its json metadata when saved. A course is active if any of its runs is published, enrollable, and marketable; other content types are always considered active.'),
+        ),
+        migrations.AddField(
+            model_name='historicalrestrictedcoursemetadata',
+            name='is_published',
+            field=models.BooleanField(db_index=True, default=True, help_text='Whether this content is published, derived from its json metadata when saved. A course is published if any of its runs is published; other content types are always considered published.'),
+        ),
+        migrations.AddField(
+            model_name='restrictedcoursemetadata',
+            name='is_active',
+            field=models.BooleanField(db_index=True, default=True, help_text='Whether this content is active, derived from its json metadata when saved. A course is active if any of its runs is published, enrollable, and marketable; other content types are always considered active.'),
+        ),
+        migrations.AddField(
+            model_name='restrictedcoursemetadata',
+            name='is_published',
+            field=models.BooleanField(db_index=True, default=True, help_text='Whether this content is published, derived from its json metadata when saved. A course is published if any of its runs is published; other content types are always considered published.'),
+        ),
+        migrations.RunPython(backfill_status_flags, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:12
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0047_content_metadata_status_flags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiscoverySyncWatermark',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('endpoint', models.CharField(choices=[('search_all', 'search/all'), ('courses', 'courses')], max_length=32)),
+                ('synced_through', models.DateTimeField(help_text='Content modified since this time is requested by the next incremental sync.')),
+                ('last_full_sync', models.DateTimeField(blank=True, help_text='When the last full sync, which requests all content regardless of its modified time, was done.', null=True)),
+                ('catalog_query', models.ForeignKey(blank=True, help_text='The synced catalog query, if the endpoint is synced separately for each catalog query.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='discovery_sync_watermarks', to='catalog.catalogquery')),
+            ],
+            options={
+                'verbose_name': 'Discovery Sync Watermark',
+                'verbose_name_plural': 'Discovery Sync Watermarks',
+                'unique_together': {('catalog_query', 'endpoint')},
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:05
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+from enterprise_catalog.apps.catalog.content_metadata_utils import (
+    get_child_content_keys,
+)
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_child_keys(apps, schema_editor):
+    """
+    Indexes the child content keys of existing programs and learner pathways.
+    """
+    ContentMetadata = apps.get_model('catalog', 'ContentMetadata')
+    ContentMetadataChildKey = apps.get_model('catalog', 'ContentMetadataChildKey')
+    child_keys = []
+    parent_metadata = ContentMetadata.objects.filter(
+        content_type__in=('program', 'learnerpathway'),
+    ).only('id', 'content_type', '_json_metadata')
+    for record in parent_metadata.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        child_keys.extend(
+            ContentMetadataChildKey(
+                parent_id=record.id,
+                child_content_type=child_content_type,
+                child_content_key=child_content_key,
+            )
+            for child_content_type, child_content_key in get_child_content_keys(
+                record.content_type, record._json_metadata,  # pylint: disable=protected-access
+            )
+        )
+        if len(child_keys) >= BACKFILL_BATCH_SIZE:
+            ContentMetadataChildKey.objects.bulk_create(child_keys)
+            child_keys = []
+    if child_keys:
+        ContentMetadataChildKey.objects.bulk_create(child_keys)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0048_discoverysyncwatermark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentMetadataChildKey',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('child_content_type', models.CharField(choices=[('course', 'Course'), ('courserun', 'Course Run'), ('program', 'Program'), ('learnerpathway', 'Learner Pathway')], max_length=255)),
+                ('child_content_key', models.CharField(max_length=255)),
+                ('parent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='child_keys', to='catalog.contentmetadata')),
+            ],
+            options={
+                'verbose_name': 'Content Metadata Child Key',
+                'verbose_name_plural': 'Content Metadata Child Keys',
+                'indexes': [models.Index(fields=['child_content_type', 'child_content_key'], name='catalog_con_child_c_d9a2d9_idx')],
+                'unique_together': {('parent', 'child_content_type', 'child_content_key')},
+            },
+        ),
+        migrations.RunPython(backfill_child_keys, reverse_code=migrations.RunPython.noop),
+    ]
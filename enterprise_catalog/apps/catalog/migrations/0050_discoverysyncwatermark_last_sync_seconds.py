@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0049_contentmetadatachildkey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='discoverysyncwatermark',
+            name='last_sync_seconds',
+            field=models.FloatField(blank=True, help_text='How many seconds the last sync took.', null=True),
+        ),
+    ]
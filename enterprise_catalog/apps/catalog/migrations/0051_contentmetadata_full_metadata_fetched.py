@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0050_discoverysyncwatermark_last_sync_seconds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentmetadata',
+            name='full_metadata_fetched',
+            field=models.DateTimeField(blank=True, help_text="When the full metadata of this course was last fetched from the discovery service's /courses endpoint. A course modified since then may have changed on discovery, and its full metadata needs fetching again.", null=True),
+        ),
+        migrations.AddField(
+            model_name='historicalcontentmetadata',
+            name='full_metadata_fetched',
+            field=models.DateTimeField(blank=True, help_text="When the full metadata of this course was last fetched from the discovery service's /courses endpoint. A course modified since then may have changed on discovery, and its full metadata needs fetching again.", null=True),
+        ),
+    ]
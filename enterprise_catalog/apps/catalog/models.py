@@ -1,12 +1,18 @@
 import collections
 import copy
+import hashlib
+import itertools
 import json
-from datetime import datetime
+import math
+import random
+import time
+from datetime import datetime, timedelta
 from logging import getLogger
 from uuid import uuid4
 
 from config_models.models import ConfigurationModel
 from django.conf import settings
+from django.core.cache import cache
 from django.db import (
     DatabaseError,
     IntegrityError,
@@ -14,9 +20,10 @@ from django.db import (
     models,
     transaction,
 )
-from django.db.models import Q
+from django.db.models import Count, Exists, Max, OuterRef, Q
 from django.utils.functional import cached_property
 from django.utils.translation import gettext as _
+from edx_django_utils.monitoring import set_custom_attribute
 from edx_rbac.models import UserRole, UserRoleAssignment
 from jsonfield.encoder import JSONEncoder
 from jsonfield.fields import JSONField
@@ -26,6 +33,7 @@ from simple_history.models import HistoricalRecords
 from enterprise_catalog.apps.api.v1.utils import (
     get_enterprise_utm_context,
     get_most_recent_modified_time,
+    is_any_course_run_active,
     update_query_parameters,
 )
 from enterprise_catalog.apps.api_client.discovery import (
@@ -35,17 +43,21 @@ from enterprise_catalog.apps.api_client.discovery import (
 from enterprise_catalog.apps.api_client.enterprise_cache import (
     EnterpriseCustomerDetails,
 )
+from enterprise_catalog.apps.catalog import filters
 from enterprise_catalog.apps.catalog.constants import (
     ACCESS_TO_ALL_ENTERPRISES_TOKEN,
     AGGREGATION_KEY_PREFIX,
+    CATALOG_QUERY_CONTENT_VERSION_CACHE_KEY_TPL,
     CONTENT_COURSE_TYPE_ALLOW_LIST,
     CONTENT_PRODUCT_SOURCE_ALLOW_LIST,
     CONTENT_TYPE_CHOICES,
     COURSE,
     COURSE_RUN,
     COURSE_RUN_RESTRICTION_TYPE_KEY,
+    DISCOVERY_MODIFIED_SINCE_FILTER_KEY,
     EXEC_ED_2U_COURSE_TYPE,
     EXEC_ED_2U_ENTITLEMENT_MODE,
+    LEARNER_PATHWAY,
     PROGRAM,
     QUERY_FOR_RESTRICTED_RUNS,
     RESTRICTED_RUNS_ALLOWED_KEY,
@@ -53,10 +65,16 @@ from enterprise_catalog.apps.catalog.constants import (
 )
 from enterprise_catalog.apps.catalog.content_metadata_utils import (
     get_advertised_course_run,
+    get_child_content_keys,
     get_course_first_paid_enrollable_seat_price,
+    is_course_published,
+)
+from enterprise_catalog.apps.catalog.signals import (
+    catalog_query_content_changed,
 )
 from enterprise_catalog.apps.catalog.utils import (
     batch,
+    batch_pages,
     enterprise_proxy_login_url,
     get_content_filter_hash,
     get_content_key,
@@ -65,6 +83,10 @@ from enterprise_catalog.apps.catalog.utils import (
     get_parent_content_key,
     localized_utcnow,
 )
+from enterprise_catalog.apps.catalog.waffle import (
+    INCREMENTAL_DISCOVERY_SYNC_SWITCH,
+    STREAM_DISCOVERY_CONTENT_INGEST_SWITCH,
+)
 
 
 LOGGER = getLogger(__name__)
@@ -122,6 +144,32 @@ class CatalogQuery(TimeStampedModel):
         """
         return json.dumps(self.content_filter, indent=4)
 
+    @property
+    def content_version(self):
+        """
+        Returns the current content version of this query, as a ``(token, bumped_at)`` pair.
+
+        The version is bumped whenever the content associated with this query is refreshed, so it can
+        be used in cache keys for results derived from that content: such cache entries can live for
+        a long time, and are invalidated as soon as the content changes. The version is kept in the
+        cache as well and starts from a random token, so if it is ever evicted from the cache, no
+        result cached under a previous version is reused.
+        """
+        cache_key = CATALOG_QUERY_CONTENT_VERSION_CACHE_KEY_TPL.format(id=self.id)
+        content_version = cache.get(cache_key)
+        if content_version is None:
+            cache.add(cache_key, (uuid4().hex, localized_utcnow()), timeout=None)
+            content_version = cache.get(cache_key)
+        return content_version
+
+    def bump_content_version(self):
+        """
+        Replaces the content version of this query with a new one, which invalidates any cached
+        results derived from its content.
+        """
+        cache_key = CATALOG_QUERY_CONTENT_VERSION_CACHE_KEY_TPL.format(id=self.id)
+        cache.set(cache_key, (uuid4().hex, localized_utcnow()), timeout=None)
+
     @cached_property
     def restricted_runs_allowed(self):
         """
@@ -258,6 +306,25 @@ class EnterpriseCatalog(TimeStampedModel):
             )
         )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Remembers the catalog query and customer the catalog was loaded with, without loading deferred fields,
+        # so that saving can tell whether they changed.
+        self._membership_values = self._get_membership_values()
+
+    def _get_membership_values(self):
+        return self.__dict__.get('catalog_query_id'), self.__dict__.get('enterprise_uuid')
+
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        super().save(*args, **kwargs)
+        # The catalog's denormalized content membership only depends on its query and customer,
+        # so it is only rebuilt when either of them changed.
+        membership_values = self._get_membership_values()
+        if is_new or membership_values != self._membership_values:
+            EnterpriseCatalogContentMembership.refresh_for_catalog(self)
+        self._membership_values = membership_values
+
     @property
     def content_metadata(self):
         """
@@ -268,9 +335,7 @@ class EnterpriseCatalog(TimeStampedModel):
         """
         if not self.catalog_query:
             return ContentMetadata.objects.none()
-        return self.catalog_query.contentmetadata_set.prefetch_related(
-            'restricted_run_allowed_for_restricted_course'
-        ).filter(
+        return self.catalog_query.contentmetadata_set.filter(
             # Exclude all restricted runs (heuristic is that a run is assumed
             # restricted if it is mapped to a restricted course via
             # RestrictedRunAllowedForRestrictedCourse).
@@ -323,6 +388,43 @@ class EnterpriseCatalog(TimeStampedModel):
         """
         return EnterpriseCustomerDetails(self.enterprise_uuid)
 
+    def get_content_version(self, include_customer_modified=True):
+        """
+        Returns a cheap "version" of the content served for this catalog, as a ``(last_modified, etag)`` pair,
+        computed with a few aggregate queries rather than by loading any content metadata.
+
+        ``last_modified`` is the most recent of the modified times of the catalog's content (including any
+        restricted course overrides for its query), of its content memberships, of the catalog itself and,
+        if ``include_customer_modified`` is set and the catalog has any content, of its enterprise customer,
+        as combined by ``get_most_recent_modified_time``. Responses that don't depend on the customer's details
+        can leave it unset to avoid fetching them. Since content removed from the catalog leaves no modified
+        time behind, ``etag`` also accounts for the number of content memberships.
+        """
+        content_modified_times = []
+        membership_count = 0
+        if self.catalog_query:
+            memberships = self.content_memberships.aggregate(count=Count('id'), last_created=Max('created'))
+            membership_count = memberships['count']
+            content_modified_times = [
+                memberships['last_created'],
+                self.catalog_query.contentmetadata_set.aggregate(last_modified=Max('modified'))['last_modified'],
+                self.catalog_query.restricted_content_metadata.aggregate(
+                    last_modified=Max('modified'),
+                )['last_modified'],
+            ]
+            content_modified_times = [modified for modified in content_modified_times if modified]
+
+        customer_modified = None
+        if include_customer_modified and content_modified_times:
+            customer_modified = self.enterprise_customer.last_modified_date
+        last_modified = get_most_recent_modified_time(
+            max(content_modified_times + [self.modified]),
+            customer_modified=customer_modified,
+        )
+        version = f'{self.uuid}:{self.catalog_query_id}:{membership_count}:{last_modified.isoformat()}'
+        etag = hashlib.md5(version.encode('utf-8')).hexdigest()
+        return last_modified, etag
+
     def get_catalog_content_diff(self, content_keys):
         """
         Generate a catalog diff based on a provided list of content keys and what currently exists with the catalog's
@@ -405,34 +507,31 @@ class EnterpriseCatalog(TimeStampedModel):
         #   - contains programs and the specified content_keys are program ids
         query = Q(content_key__in=content_keys) | Q(parent_content_key__in=content_keys)
 
-        # retrieve content metadata objects for the specified content keys to get a set of
-        # parent content keys, i.e. course ids associated with the specified content_keys
+        # match the parent content keys, i.e. course ids associated with the specified content_keys
         # (if any) to handle the following case:
         #   - catalog contains courses and the specified content_keys are course run ids.
-        searched_metadata = ContentMetadata.objects.filter(content_key__in=content_keys)
+        # The parent content keys are resolved by a subquery, so the whole lookup is a single SQL statement.
+        is_restricted_run = Exists(
+            RestrictedRunAllowedForRestrictedCourse.objects.filter(run=OuterRef('pk'))
+        )
+        searched_metadata = ContentMetadata.objects.filter(
+            content_key__in=content_keys,
+            parent_content_key__isnull=False,
+        )
         if include_restricted and self.catalog_query.restricted_runs_allowed:
-            # Only hide restricted runs that are not allowed by the current catalog.
-            searched_metadata = searched_metadata.prefetch_related(
-                'restricted_run_allowed_for_restricted_course'
-            ).exclude(
-                # Find all restricted runs allowed by a RestrictedCourseMetadata related to the
-                # current CatalogQuery. Do NOT exclude those.
-                ~Q(restricted_run_allowed_for_restricted_course__course__catalog_query=self.catalog_query)
-                # Exclude all other restricted runs. A run is assumed of type restricted if it
-                # is related to at least one RestrictedRunAllowedForRestrictedCourse.
-                & Q(restricted_run_allowed_for_restricted_course__isnull=False)
+            # Only hide restricted runs that are not allowed by the current catalog. A run is assumed of type
+            # restricted if it is related to at least one RestrictedRunAllowedForRestrictedCourse.
+            is_allowed_restricted_run = Exists(
+                RestrictedRunAllowedForRestrictedCourse.objects.filter(
+                    run=OuterRef('pk'),
+                    course__catalog_query=self.catalog_query,
+                )
             )
+            searched_metadata = searched_metadata.filter(~is_restricted_run | is_allowed_restricted_run)
         else:
             # Hide ALL restricted runs.
-            searched_metadata = searched_metadata.exclude(
-                restricted_run_allowed_for_restricted_course__isnull=False
-            )
-        parent_content_keys = {
-            metadata.parent_content_key
-            for metadata in searched_metadata
-            if metadata.parent_content_key
-        }
-        query |= Q(content_key__in=parent_content_keys)
+            searched_metadata = searched_metadata.filter(~is_restricted_run)
+        query |= Q(content_key__in=searched_metadata.values('parent_content_key'))
         if include_restricted:
             return self.content_metadata_with_restricted.filter(query)
         else:
@@ -477,28 +576,110 @@ class EnterpriseCatalog(TimeStampedModel):
         # query doesn't exist or no content keys are provided.
         if not self.catalog_query or not content_keys:
             return set()
+        return self.filter_content_keys_for_catalogs([self], content_keys, include_restricted=include_restricted)
+
+    @classmethod
+    def filter_content_keys_for_catalogs(cls, enterprise_catalogs, content_keys, include_restricted=False):
+        """
+        Determines which content_keys are part of any of the given catalogs.
+
+        Arguments:
+            enterprise_catalogs: (iterable or QuerySet) The EnterpriseCatalogs to filter against.
+            content_keys: (set) A set of string content keys to be filtered based on the catalogs.
+            include_restricted: (bool) Whether restricted runs should be considered part of the catalogs,
+                matching the semantics of ``content_metadata_with_restricted``.
+
+        Returns:
+            items_included: (set) A filtered set of content keys contained in at least one of the catalogs.
+
+        Handles the same scenarios as ``filter_content_keys()``, but resolves all of the catalogs
+        at once with a single query that only reads the content key columns.
+        """
+        if not content_keys:
+            return set()
 
         content_keys = set(content_keys)
 
-        # construct a query on the associated catalog's content metadata to return metadata
+        # construct a query on the catalogs' content metadata to return metadata
         # where content_key and parent_content_key matches the specified content_keys to
         # handle the following cases where the catalog:
         #   - contains courses and the specified content_keys are course ids
         #   - contains course runs and the specified content_keys are course ids
         query = Q(content_key__in=content_keys) | Q(parent_content_key__in=content_keys)
+        accessible_metadata_qs = ContentMetadata.objects.filter(
+            catalog_queries__enterprise_catalogs__in=enterprise_catalogs,
+        ).filter(query)
+        if not include_restricted:
+            # Exclude all restricted runs, same as ``content_metadata``.
+            accessible_metadata_qs = accessible_metadata_qs.filter(
+                restricted_run_allowed_for_restricted_course__isnull=True,
+            )
 
         items_included = set()
-        if include_restricted:
-            accessible_metadata_qs = self.content_metadata_with_restricted
-        else:
-            accessible_metadata_qs = self.content_metadata
-        for content in accessible_metadata_qs.filter(query).all():
-            if content.content_key in content_keys:
-                items_included.add(content.content_key)
-            elif content.parent_content_key in content_keys:
-                items_included.add(content.parent_content_key)
+        for content_key, parent_content_key in accessible_metadata_qs.values_list(
+            'content_key', 'parent_content_key',
+        ).distinct():
+            if content_key in content_keys:
+                items_included.add(content_key)
+            elif parent_content_key in content_keys:
+                items_included.add(parent_content_key)
         return items_included
 
+    @classmethod
+    def get_matching_content_keys_by_catalog(cls, enterprise_catalogs, content_keys):
+        """
+        Determines which of the given content_keys are contained by each of the given catalogs.
+
+        Arguments:
+            enterprise_catalogs: (iterable) The EnterpriseCatalogs to check the content keys against.
+            content_keys: (iterable) String content keys to look up in the catalogs.
+
+        Returns:
+            matching_keys_by_catalog: (dict) Maps the uuid of each catalog to the set of the given
+                content keys that it contains.
+
+        Follows the same containment rules as ``get_matching_content()``, with restricted runs
+        excluded, but resolves every catalog with a fixed number of queries no matter how many
+        catalogs or content keys are given.
+        """
+        enterprise_catalogs = list(enterprise_catalogs)
+        matching_keys_by_catalog = {catalog.uuid: set() for catalog in enterprise_catalogs}
+        catalog_uuids_by_query_id = collections.defaultdict(list)
+        for catalog in enterprise_catalogs:
+            if catalog.catalog_query_id:
+                catalog_uuids_by_query_id[catalog.catalog_query_id].append(catalog.uuid)
+
+        content_keys = set(content_keys)
+        if not content_keys or not catalog_uuids_by_query_id:
+            return matching_keys_by_catalog
+
+        # Requested course run keys also match catalogs that contain their (unrestricted) parent course.
+        requested_keys_by_parent_key = collections.defaultdict(set)
+        for content_key, parent_content_key in ContentMetadata.objects.filter(
+            content_key__in=content_keys,
+            parent_content_key__isnull=False,
+            restricted_run_allowed_for_restricted_course__isnull=True,
+        ).values_list('content_key', 'parent_content_key'):
+            requested_keys_by_parent_key[parent_content_key].add(content_key)
+
+        query = (
+            Q(contentmetadata__content_key__in=content_keys | set(requested_keys_by_parent_key))
+            | Q(contentmetadata__parent_content_key__in=content_keys)
+        )
+        associations = ContentMetadata.catalog_queries.through.objects.filter(
+            catalogquery_id__in=list(catalog_uuids_by_query_id),
+            # Exclude all restricted runs, same as ``content_metadata``.
+            contentmetadata__restricted_run_allowed_for_restricted_course__isnull=True,
+        ).filter(query).values_list(
+            'catalogquery_id', 'contentmetadata__content_key', 'contentmetadata__parent_content_key',
+        ).distinct()
+        for catalog_query_id, content_key, parent_content_key in associations:
+            matched_keys = set(requested_keys_by_parent_key.get(content_key, ()))
+            matched_keys.update({content_key, parent_content_key} & content_keys)
+            for catalog_uuid in catalog_uuids_by_query_id[catalog_query_id]:
+                matching_keys_by_catalog[catalog_uuid].update(matched_keys)
+        return matching_keys_by_catalog
+
     def get_content_enrollment_url(self, content_metadata):
         """
         Return an enrollment page url based on the catalog information for the given content metadata record.
@@ -652,21 +833,30 @@ class ContentMetadataQuerySet(models.QuerySet):
 class ContentMetadataManager(models.Manager):
     """
     Customer manager for ContentMetadata that forces the `modified` field
-    to be updated during `bulk_update()`.
+    to be updated during `bulk_update()`, and keeps the child content key
+    index of programs and pathways up to date with their json metadata.
     """
 
     def bulk_update(self, objs, fields, batch_size=None):
         """
         Updates the `modified` time of each object, and then
         does the usual bulk update, with `modified` as also
-        a field to save.
+        a field to save. When `_json_metadata` is being saved,
+        the status flags derived from it are refreshed and saved too.
         """
         last_modified = localized_utcnow()
+        refresh_status_flags = '_json_metadata' in fields
         for obj in objs:
             obj.modified = last_modified
-        fields += ['modified']
+            if refresh_status_flags:
+                obj.refresh_status_flags()
+        fields = list(fields) + ['modified']
+        if refresh_status_flags:
+            fields += BaseContentMetadata.STATUS_FLAG_FIELDS
 
         super().bulk_update(objs, fields, batch_size=batch_size)
+        if refresh_status_flags and self.model is ContentMetadata:
+            ContentMetadataChildKey.sync_for_metadata(objs)
 
 
 class BaseContentMetadata(TimeStampedModel):
@@ -723,9 +913,28 @@ class BaseContentMetadata(TimeStampedModel):
             "endpoint results, specified as a JSON object."
         )
     )
+    is_published = models.BooleanField(
+        default=True,
+        db_index=True,
+        help_text=_(
+            "Whether this content is published, derived from its json metadata when saved. A course is published "
+            "if any of its runs is published; other content types are always considered published."
+        )
+    )
+    is_active = models.BooleanField(
+        default=True,
+        db_index=True,
+        help_text=_(
+            "Whether this content is active, derived from its json metadata when saved. A course is active "
+            "if any of its runs is published, enrollable, and marketable; other content types are always "
+            "considered active."
+        )
+    )
 
     objects = ContentMetadataManager()
 
+    STATUS_FLAG_FIELDS = ['is_published', 'is_active']
+
     @property
     def is_exec_ed_2u_course(self):
         return self.content_type == COURSE and self.json_metadata.get('course_type') == EXEC_ED_2U_COURSE_TYPE
@@ -752,6 +961,23 @@ class BaseContentMetadata(TimeStampedModel):
         """
         return cls.objects.filter(parent_content_key=content_metadata.content_key)
 
+    @classmethod
+    def get_child_records_by_parent_key(cls, parent_content_keys):
+        """
+        Returns a dict mapping each of the given parent content keys to a list of its child records,
+        loaded with a single query per batch of keys. Only the key and type columns are loaded,
+        since the (potentially large) json metadata of the children is rarely needed.
+        """
+        child_records_by_parent_key = collections.defaultdict(list)
+        parent_content_keys = list(set(parent_content_keys))
+        for parent_keys_batch in batch(parent_content_keys, batch_size=settings.CHILD_RECORDS_QUERY_BATCH_SIZE):
+            child_records = cls.objects.filter(
+                parent_content_key__in=parent_keys_batch,
+            ).only('content_key', 'parent_content_key', 'content_type')
+            for child_record in child_records:
+                child_records_by_parent_key[child_record.parent_content_key].append(child_record)
+        return dict(child_records_by_parent_key)
+
     @property
     def json_metadata(self):
         return self._json_metadata
@@ -760,6 +986,26 @@ class BaseContentMetadata(TimeStampedModel):
     def json_metadata(self, new_json_metadata):
         self._json_metadata = new_json_metadata
 
+    def refresh_status_flags(self):
+        """
+        Recomputes ``is_published`` and ``is_active`` from the stored json metadata, so that
+        API reads can filter on them in SQL instead of decoding every record's course runs.
+        """
+        if self.content_type == COURSE:
+            json_metadata = self._json_metadata or {}
+            self.is_published = is_course_published(json_metadata)
+            self.is_active = is_any_course_run_active(json_metadata.get('course_runs') or [])
+        else:
+            self.is_published = True
+            self.is_active = True
+
+    def save(self, *args, **kwargs):
+        self.refresh_status_flags()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and '_json_metadata' in update_fields:
+            kwargs['update_fields'] = list(update_fields) + self.STATUS_FLAG_FIELDS
+        super().save(*args, **kwargs)
+
     def __str__(self):
         """
         Return human-readable string representation.
@@ -785,6 +1031,15 @@ class ContentMetadata(BaseContentMetadata):
     # one course can be part of many CatalogQueries and one CatalogQuery can contain many courses.
     catalog_queries = models.ManyToManyField(CatalogQuery)
 
+    full_metadata_fetched = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text=_(
+            "When the full metadata of this course was last fetched from the discovery service's /courses endpoint. "
+            "A course modified since then may have changed on discovery, and its full metadata needs fetching again."
+        ),
+    )
+
     history = HistoricalRecords()
 
     objects = ContentMetadataManager().from_queryset(ContentMetadataQuerySet)()
@@ -813,6 +1068,12 @@ class ContentMetadata(BaseContentMetadata):
     def json_metadata(self, new_json_metadata):
         self._json_metadata = new_json_metadata
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or '_json_metadata' in update_fields:
+            ContentMetadataChildKey.sync_for_metadata([self])
+
 
 class RestrictedCourseMetadata(BaseContentMetadata):
     """
@@ -1086,6 +1347,416 @@ class RestrictedRunAllowedForRestrictedCourse(TimeStampedModel):
     )
 
 
+class EnterpriseCatalogContentMembershipQuerySet(models.QuerySet):
+    """
+    Custom queryset for EnterpriseCatalogContentMembership providing customer-level containment lookups.
+    """
+
+    def matching_content_keys(self, enterprise_uuid, content_keys, include_restricted=False):
+        """
+        Returns the membership rows of the given customer's catalogs that match any of the
+        given ``content_keys``, following the same containment rules as
+        ``EnterpriseCatalog.get_matching_content()``:
+          - the row's ``content_key`` is one of the requested keys.
+          - the row's ``parent_content_key`` is one of the requested keys (the catalog contains
+            course runs, but course keys were requested).
+          - the row's ``content_key`` is the parent of a requested, unrestricted course run (the
+            catalog contains courses, but course run keys were requested).
+
+        Restricted runs allowed by a catalog's query are stored as their own rows, so they only
+        need to be filtered out when ``include_restricted`` is False. Everything is answered by
+        a single SQL statement, regardless of how many catalogs the customer has.
+        """
+        content_keys = set(content_keys)
+        if not content_keys:
+            return self.none()
+
+        parent_keys_of_requested_runs = ContentMetadata.objects.filter(
+            content_key__in=content_keys,
+            parent_content_key__isnull=False,
+            restricted_run_allowed_for_restricted_course__isnull=True,
+        ).values('parent_content_key')
+        queryset = self.filter(enterprise_uuid=enterprise_uuid).filter(
+            Q(content_key__in=content_keys)
+            | Q(parent_content_key__in=content_keys)
+            | Q(content_key__in=parent_keys_of_requested_runs)
+        )
+        if not include_restricted:
+            queryset = queryset.filter(is_restricted_run=False)
+        return queryset
+
+
+class EnterpriseCatalogContentMembership(TimeStampedModel):
+    """
+    Denormalized mapping of each enterprise catalog to the content keys it contains.
+
+    Rows are derived from the content metadata associated with a catalog's query, plus any
+    restricted runs allowed by that query, and are rebuilt whenever those associations are
+    refreshed. This lets customer-level containment checks run as one indexed query instead
+    of one ``get_matching_content()`` call per catalog.
+
+    .. no_pii:
+    """
+    enterprise_uuid = models.UUIDField(
+        blank=False,
+        null=False,
+    )
+    enterprise_catalog = models.ForeignKey(
+        EnterpriseCatalog,
+        blank=False,
+        null=False,
+        related_name='content_memberships',
+        on_delete=models.CASCADE,
+    )
+    catalog_query = models.ForeignKey(
+        CatalogQuery,
+        blank=False,
+        null=False,
+        related_name='content_memberships',
+        on_delete=models.CASCADE,
+    )
+    content_key = models.CharField(
+        max_length=255,
+        blank=False,
+        null=False,
+    )
+    parent_content_key = models.CharField(
+        max_length=255,
+        blank=True,
+        null=True,
+    )
+    is_restricted_run = models.BooleanField(
+        default=False,
+        help_text=_(
+            "Whether this row represents a restricted course run. Restricted runs are only visible to "
+            "callers that explicitly request restricted content."
+        ),
+    )
+
+    objects = models.Manager.from_queryset(EnterpriseCatalogContentMembershipQuerySet)()
+
+    class Meta:
+        verbose_name = _("Enterprise Catalog Content Membership")
+        verbose_name_plural = _("Enterprise Catalog Content Memberships")
+        app_label = 'catalog'
+        unique_together = ('enterprise_catalog', 'content_key')
+        indexes = [
+            models.Index(fields=['enterprise_uuid', 'content_key']),
+            models.Index(fields=['enterprise_uuid', 'parent_content_key']),
+        ]
+
+    def __str__(self):
+        """
+        Return human-readable string representation.
+        """
+        return f"<EnterpriseCatalogContentMembership: {self.enterprise_catalog_id} - {self.content_key}>"
+
+    @classmethod
+    def _desired_memberships_for_query(cls, catalog_query):
+        """
+        Returns a dict mapping each content key contained by ``catalog_query`` to a
+        ``(parent_content_key, is_restricted_run)`` tuple.
+        """
+        desired = {
+            content_key: (parent_content_key, is_restricted_run)
+            for content_key, parent_content_key, is_restricted_run in catalog_query.contentmetadata_set.annotate(
+                is_restricted_run=Exists(
+                    RestrictedRunAllowedForRestrictedCourse.objects.filter(run=OuterRef('pk')),
+                ),
+            ).values_list('content_key', 'parent_content_key', 'is_restricted_run')
+        }
+        # Read the content filter directly rather than the cached ``restricted_runs_allowed``
+        # property, which may have been cached on this instance before the filter changed.
+        if not catalog_query.content_filter.get(RESTRICTED_RUNS_ALLOWED_KEY):
+            return desired
+
+        # Restricted runs are not directly associated with the query, but a restricted run
+        # allowed by this query still resolves to its parent course, as long as the
+        # parent course is itself part of the query's content.
+        allowed_restricted_runs = RestrictedRunAllowedForRestrictedCourse.objects.filter(
+            course__catalog_query=catalog_query,
+            run__isnull=False,
+        ).values_list('run__content_key', 'run__parent_content_key')
+        for run_key, parent_content_key in allowed_restricted_runs:
+            if run_key not in desired and parent_content_key in desired:
+                desired[run_key] = (parent_content_key, True)
+        return desired
+
+    @classmethod
+    def _sync_catalog(cls, enterprise_catalog, desired):
+        """
+        Brings the membership rows of ``enterprise_catalog`` in line with ``desired``, only
+        deleting and inserting the rows that actually changed.
+        """
+        existing = {
+            content_key: (row_id, (str(enterprise_uuid), catalog_query_id, parent_content_key, is_restricted_run))
+            for row_id, content_key, enterprise_uuid, catalog_query_id, parent_content_key, is_restricted_run
+            in cls.objects.filter(enterprise_catalog=enterprise_catalog).values_list(
+                'id', 'content_key', 'enterprise_uuid', 'catalog_query_id', 'parent_content_key', 'is_restricted_run',
+            )
+        }
+        stale_row_ids = []
+        rows_to_create = []
+        for content_key, (parent_content_key, is_restricted_run) in desired.items():
+            wanted = (
+                str(enterprise_catalog.enterprise_uuid),
+                enterprise_catalog.catalog_query_id,
+                parent_content_key,
+                is_restricted_run,
+            )
+            existing_row = existing.pop(content_key, None)
+            if existing_row and existing_row[1] == wanted:
+                continue
+            if existing_row:
+                stale_row_ids.append(existing_row[0])
+            rows_to_create.append(cls(
+                enterprise_uuid=enterprise_catalog.enterprise_uuid,
+                enterprise_catalog=enterprise_catalog,
+                catalog_query_id=enterprise_catalog.catalog_query_id,
+                content_key=content_key,
+                parent_content_key=parent_content_key,
+                is_restricted_run=is_restricted_run,
+            ))
+        stale_row_ids.extend(row_id for row_id, _ in existing.values())
+
+        with transaction.atomic():
+            for stale_batch in batch(stale_row_ids, batch_size=settings.CATALOG_CONTENT_MEMBERSHIP_BATCH_SIZE):
+                cls.objects.filter(id__in=stale_batch).delete()
+            cls.objects.bulk_create(rows_to_create, batch_size=settings.CATALOG_CONTENT_MEMBERSHIP_BATCH_SIZE)
+        return len(stale_row_ids), len(rows_to_create)
+
+    @classmethod
+    def refresh_for_catalog(cls, enterprise_catalog):
+        """
+        Rebuilds the membership rows of a single enterprise catalog.
+        """
+        if not enterprise_catalog.catalog_query:
+            cls.objects.filter(enterprise_catalog=enterprise_catalog).delete()
+            return
+        desired = cls._desired_memberships_for_query(enterprise_catalog.catalog_query)
+        cls._sync_catalog(enterprise_catalog, desired)
+
+    @classmethod
+    def refresh_for_catalog_query(cls, catalog_query):
+        """
+        Rebuilds the membership rows of every enterprise catalog using ``catalog_query``.
+        The query's content is only read once, no matter how many catalogs share it.
+        """
+        enterprise_catalogs = list(catalog_query.enterprise_catalogs.all())
+        if not enterprise_catalogs:
+            return
+        desired = cls._desired_memberships_for_query(catalog_query)
+        for enterprise_catalog in enterprise_catalogs:
+            deleted_count, created_count = cls._sync_catalog(enterprise_catalog, desired)
+            LOGGER.info(
+                'Refreshed content membership of %s for %s: %d rows removed, %d rows added',
+                enterprise_catalog,
+                catalog_query,
+                deleted_count,
+                created_count,
+            )
+
+
+class DiscoverySyncWatermark(TimeStampedModel):
+    """
+    Records up to when content has been synced from a course-discovery endpoint, either for a single
+    catalog query (/search/all) or for all content at once (/courses).
+
+    Incremental syncs only request content modified since ``synced_through``, or, for /courses, content
+    modified since its own ``ContentMetadata.full_metadata_fetched`` time. Since they can't tell
+    when content stops matching a catalog query, a full sync is still done whenever the last one is
+    older than ``settings.DISCOVERY_FULL_SYNC_INTERVAL`` seconds.
+
+    How long the last sync of each catalog query took is kept as well, so that the update_content_metadata
+    command can schedule the longest catalog query updates first.
+
+    .. no_pii:
+    """
+    SEARCH_ALL = 'search_all'
+    COURSES = 'courses'
+    ENDPOINT_CHOICES = (
+        (SEARCH_ALL, 'search/all'),
+        (COURSES, 'courses'),
+    )
+
+    catalog_query = models.ForeignKey(
+        CatalogQuery,
+        blank=True,
+        null=True,
+        related_name='discovery_sync_watermarks',
+        on_delete=models.CASCADE,
+        help_text=_("The synced catalog query, if the endpoint is synced separately for each catalog query."),
+    )
+    endpoint = models.CharField(
+        max_length=32,
+        choices=ENDPOINT_CHOICES,
+    )
+    synced_through = models.DateTimeField(
+        help_text=_("Content modified since this time is requested by the next incremental sync."),
+    )
+    last_full_sync = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text=_("When the last full sync, which requests all content regardless of its modified time, was done."),
+    )
+    last_sync_seconds = models.FloatField(
+        blank=True,
+        null=True,
+        help_text=_("How many seconds the last sync took."),
+    )
+
+    class Meta:
+        verbose_name = _("Discovery Sync Watermark")
+        verbose_name_plural = _("Discovery Sync Watermarks")
+        app_label = 'catalog'
+        unique_together = ('catalog_query', 'endpoint')
+
+    def __str__(self):
+        """
+        Return human-readable string representation.
+        """
+        return f"<DiscoverySyncWatermark: {self.endpoint} - {self.catalog_query_id} - {self.synced_through}>"
+
+    @classmethod
+    def get_modified_since(cls, endpoint, catalog_query=None):
+        """
+        Returns the time since which content must be requested by an incremental sync of ``endpoint``,
+        or None if a full sync is due instead. A full sync is also due once ``catalog_query`` was edited
+        since its last sync, as content that no longer matches its content filter must be removed.
+        """
+        if not INCREMENTAL_DISCOVERY_SYNC_SWITCH.is_enabled():
+            return None
+        watermark = cls.objects.filter(catalog_query=catalog_query, endpoint=endpoint).first()
+        if not watermark or not watermark.last_full_sync:
+            return None
+        full_sync_interval = timedelta(seconds=settings.DISCOVERY_FULL_SYNC_INTERVAL)
+        if watermark.last_full_sync < localized_utcnow() - full_sync_interval:
+            return None
+        if catalog_query and catalog_query.modified > watermark.synced_through:
+            return None
+        return watermark.synced_through
+
+    @classmethod
+    def record_sync(cls, endpoint, synced_through, is_full_sync, catalog_query=None, sync_seconds=None):
+        """
+        Moves the watermark of ``endpoint`` forward once a sync has succeeded.
+        """
+        defaults = {'synced_through': synced_through}
+        if is_full_sync:
+            defaults['last_full_sync'] = synced_through
+        if sync_seconds is not None:
+            defaults['last_sync_seconds'] = sync_seconds
+        cls.objects.update_or_create(catalog_query=catalog_query, endpoint=endpoint, defaults=defaults)
+
+
+class ContentMetadataChildKey(TimeStampedModel):
+    """
+    Normalized index of the content referenced by the json metadata of each program (its courses)
+    and learner pathway (the courses and programs of its steps), whether or not that content has
+    ContentMetadata records of its own.
+
+    Rows are rewritten whenever the json metadata of a program or pathway is saved, so finding the
+    referenced content that is missing ContentMetadata is a single anti-join, instead of a walk over
+    the json metadata of every program and pathway.
+
+    .. no_pii:
+    """
+    parent = models.ForeignKey(
+        ContentMetadata,
+        blank=False,
+        null=False,
+        related_name='child_keys',
+        on_delete=models.CASCADE,
+    )
+    child_content_type = models.CharField(
+        max_length=255,
+        choices=CONTENT_TYPE_CHOICES,
+        blank=False,
+        null=False,
+    )
+    child_content_key = models.CharField(
+        max_length=255,
+        blank=False,
+        null=False,
+    )
+
+    class Meta:
+        verbose_name = _("Content Metadata Child Key")
+        verbose_name_plural = _("Content Metadata Child Keys")
+        app_label = 'catalog'
+        unique_together = ('parent', 'child_content_type', 'child_content_key')
+        indexes = [
+            models.Index(fields=['child_content_type', 'child_content_key']),
+        ]
+
+    def __str__(self):
+        """
+        Return human-readable string representation.
+        """
+        return f"<ContentMetadataChildKey: {self.parent_id} - {self.child_content_type} {self.child_content_key}>"
+
+    @classmethod
+    def sync_for_metadata(cls, content_metadata_records):
+        """
+        Rewrites the child keys of the programs and pathways among ``content_metadata_records`` from
+        their json metadata, only inserting and deleting the rows that changed.
+        """
+        parent_metadata = [
+            content_metadata for content_metadata in content_metadata_records
+            if content_metadata.id and content_metadata.content_type in (PROGRAM, LEARNER_PATHWAY)
+        ]
+        if not parent_metadata:
+            return
+
+        desired_child_keys = {
+            (content_metadata.id, child_content_type, child_content_key)
+            for content_metadata in parent_metadata
+            for child_content_type, child_content_key in get_child_content_keys(
+                content_metadata.content_type, content_metadata._json_metadata,  # pylint: disable=protected-access
+            )
+        }
+        existing_child_keys = {
+            (parent_id, child_content_type, child_content_key): child_key_id
+            for child_key_id, parent_id, child_content_type, child_content_key in cls.objects.filter(
+                parent_id__in=[content_metadata.id for content_metadata in parent_metadata],
+            ).values_list('id', 'parent_id', 'child_content_type', 'child_content_key')
+        }
+        stale_child_key_ids = [
+            child_key_id for child_key, child_key_id in existing_child_keys.items()
+            if child_key not in desired_child_keys
+        ]
+        batch_size = settings.CONTENT_METADATA_ASSOCIATION_BATCH_SIZE
+        for stale_ids_batch in batch(stale_child_key_ids, batch_size=batch_size):
+            cls.objects.filter(id__in=stale_ids_batch).delete()
+        cls.objects.bulk_create(
+            [
+                cls(parent_id=parent_id, child_content_type=child_content_type, child_content_key=child_content_key)
+                for parent_id, child_content_type, child_content_key in desired_child_keys
+                if (parent_id, child_content_type, child_content_key) not in existing_child_keys
+            ],
+            batch_size=batch_size,
+        )
+
+    @classmethod
+    def get_missing_child_content_keys(cls, parent_content_type, child_content_type):
+        """
+        Returns the set of keys of the content of ``child_content_type`` referenced by any content of
+        ``parent_content_type`` that has no ContentMetadata record of that type.
+        """
+        child_metadata = ContentMetadata.objects.filter(
+            content_type=child_content_type,
+            content_key=OuterRef('child_content_key'),
+        )
+        return set(
+            cls.objects.filter(
+                parent__content_type=parent_content_type,
+                child_content_type=child_content_type,
+            ).exclude(
+                Exists(child_metadata),
+            ).values_list('child_content_key', flat=True).distinct()
+        )
+
+
 def content_metadata_with_type_course():
     """
     Find all ContentMetadata records with a content type of "course".
@@ -1336,8 +2007,9 @@ def _update_existing_content_metadata(existing_metadata_defaults, existing_metad
 
 def _create_new_content_metadata(nonexisting_metadata_defaults, dry_run=False):
     """
-    Creates new ContentMetadata database objects based on the defaults provided. This is done through an atomic
-    database transaction.
+    Creates new ContentMetadata database objects, along with their history records, based on the
+    defaults provided. The objects are inserted in bulk; if that runs into an IntegrityError, only
+    the conflicting content keys are retried one at a time.
 
     Arguments:
         nonexisting_metadata_defaults (list): List of default values for various fields to create
@@ -1347,19 +2019,87 @@ def _create_new_content_metadata(nonexisting_metadata_defaults, dry_run=False):
     Returns:
         list: List of ContentMetadata objects that were created (or logged if dry_run=True).
     """
-    metadata_list = []
+    metadata_list = [ContentMetadata(**defaults) for defaults in nonexisting_metadata_defaults]
+    if dry_run:
+        for content_metadata in metadata_list:
+            LOGGER.info(f"Created {content_metadata}")
+        return metadata_list
+    if not metadata_list:
+        return []
+
     try:
-        with transaction.atomic():
-            for defaults in nonexisting_metadata_defaults:
-                if dry_run:
-                    content_metadata = ContentMetadata(**defaults)
-                    LOGGER.info(f"Created {content_metadata}")
-                else:
-                    content_metadata = ContentMetadata.objects.create(**defaults)
-                metadata_list.append(content_metadata)
+        return _bulk_create_content_metadata(metadata_list)
     except IntegrityError:
-        LOGGER.exception('_create_new_content_metadata ran into an issue while creating new ContentMetadata objects.')
-    return metadata_list
+        LOGGER.warning(
+            '_create_new_content_metadata ran into a conflict while bulk creating %d ContentMetadata objects, '
+            'retrying the conflicting content keys one at a time.',
+            len(metadata_list),
+        )
+
+    # Content keys that were created concurrently, or that appear more than once in the batch.
+    conflicting_keys = set(
+        ContentMetadata.objects.filter(
+            content_key__in=[content_metadata.content_key for content_metadata in metadata_list],
+        ).values_list('content_key', flat=True)
+    )
+    bulk_metadata_list, conflicting_metadata_list = [], []
+    for content_metadata in metadata_list:
+        if content_metadata.content_key in conflicting_keys:
+            conflicting_metadata_list.append(content_metadata)
+        else:
+            conflicting_keys.add(content_metadata.content_key)
+            bulk_metadata_list.append(content_metadata)
+
+    try:
+        created_metadata = _bulk_create_content_metadata(bulk_metadata_list)
+    except IntegrityError:
+        created_metadata = []
+        conflicting_metadata_list = metadata_list
+    return created_metadata + _create_content_metadata_one_by_one(conflicting_metadata_list)
+
+
+def _bulk_create_content_metadata(metadata_list):
+    """
+    Inserts the unsaved ContentMetadata objects in ``metadata_list`` and their history records
+    with a few bulk INSERTs, in a single transaction. Returns the created objects, re-read from
+    the database since not every database sets primary keys on bulk-created objects.
+    """
+    if not metadata_list:
+        return []
+    for content_metadata in metadata_list:
+        # bulk_create() doesn't call save(), which usually derives the status flags.
+        content_metadata.refresh_status_flags()
+    content_keys = [content_metadata.content_key for content_metadata in metadata_list]
+    batch_size = settings.CONTENT_METADATA_BULK_CREATE_BATCH_SIZE
+    with transaction.atomic():
+        ContentMetadata.objects.bulk_create(metadata_list, batch_size=batch_size)
+        created_metadata_by_key = ContentMetadata.objects.in_bulk(content_keys, field_name='content_key')
+        created_metadata = [created_metadata_by_key[content_key] for content_key in content_keys]
+        ContentMetadata.history.bulk_history_create(  # pylint: disable=no-member
+            created_metadata, batch_size=batch_size,
+        )
+        ContentMetadataChildKey.sync_for_metadata(created_metadata)
+    return created_metadata
+
+
+def _create_content_metadata_one_by_one(metadata_list):
+    """
+    Saves each of the unsaved ContentMetadata objects in ``metadata_list`` on its own, skipping
+    (and logging) any that conflicts with an existing content key.
+    """
+    created_metadata = []
+    for content_metadata in metadata_list:
+        try:
+            with transaction.atomic():
+                content_metadata.save()
+        except IntegrityError:
+            LOGGER.exception(
+                '_create_new_content_metadata ran into an issue while creating ContentMetadata for %s.',
+                content_metadata.content_key,
+            )
+            continue
+        created_metadata.append(content_metadata)
+    return created_metadata
 
 
 def _fetch_product_source(metadata_entry):
@@ -1411,10 +2151,59 @@ def create_content_metadata(metadata, catalog_query=None, dry_run=False):
     Returns:
         list: The list of ContentMetaData.
     """
+    return _create_content_metadata_from_batches(
+        batch(metadata, batch_size=settings.SELECT_EXISTING_CONTENT_METADATA_BATCH_SIZE),
+        catalog_query,
+        dry_run,
+    )
+
+
+# The id and content key of a written ContentMetadata record, all that's needed to associate it with a query.
+ContentMetadataReference = collections.namedtuple('ContentMetadataReference', ['id', 'content_key'])
+
+
+def create_content_metadata_from_pages(metadata_pages, catalog_query=None, dry_run=False):
+    """
+    Same as ``create_content_metadata()``, but for metadata that arrives in pages, e.g. from a
+    generator of course-discovery result pages. Each batch is written as soon as its pages
+    have been received, and only references to its records are kept once it's written, so
+    only one batch worth of pages and records is held in memory at a time.
+
+    Arguments:
+        metadata_pages (iterable of lists): Pages of content metadata dictionaries.
+        catalog_query (CatalogQuery): Catalog Query object.
+        dry_run (boolean): Logs rather than commits content metadata additions.
+
+    Returns:
+        list: A ContentMetadataReference for each written ContentMetaData.
+    """
+    return _create_content_metadata_from_batches(
+        batch_pages(metadata_pages, batch_size=settings.SELECT_EXISTING_CONTENT_METADATA_BATCH_SIZE),
+        catalog_query,
+        dry_run,
+        references_only=True,
+    )
+
+
+def _create_content_metadata_from_batches(metadata_batches, catalog_query=None, dry_run=False, references_only=False):
+    """
+    Creates or updates a ContentMetadata object for each entry of each batch of content metadata
+    dictionaries, then retries the batches that failed by bisecting them. With ``references_only``,
+    the written records are released once each batch is written, and a ContentMetadataReference
+    is returned for each of them instead.
+    """
     metadata_list = []
-    retry_list = []
+    failed_batches = []
+
+    def keep_written_metadata(written_metadata):
+        if references_only:
+            written_metadata = [
+                ContentMetadataReference(content_metadata.id, content_metadata.content_key)
+                for content_metadata in written_metadata
+            ]
+        metadata_list.extend(written_metadata)
 
-    for batched_metadata in batch(metadata, batch_size=settings.SELECT_EXISTING_CONTENT_METADATA_BATCH_SIZE):
+    for batched_metadata in metadata_batches:
         content_keys = []
         filtered_batched_metadata = []
         for entry in batched_metadata:
@@ -1423,46 +2212,105 @@ def create_content_metadata(metadata, catalog_query=None, dry_run=False):
                 content_keys.append(get_content_key(entry))
                 filtered_batched_metadata.append(entry)
 
+        written_metadata = []
         _update_or_create_content_metadata(
-            content_keys, filtered_batched_metadata, dry_run, metadata_list, retry_list,
+            content_keys, filtered_batched_metadata, dry_run, written_metadata, failed_batches,
         )
+        keep_written_metadata(written_metadata)
 
-    retry_count = 0
-    retry_max = getattr(settings, 'CATALOG_CONTENT_METADATA_RETRY_MAX', 1000)
+    if failed_batches:
+        written_metadata = []
+        _retry_failed_content_metadata_batches(failed_batches, dry_run, written_metadata)
+        keep_written_metadata(written_metadata)
+
+    return metadata_list
 
-    if not retry_list:
-        return metadata_list
 
-    retry_keys = [get_content_key(entry) for entry in retry_list]
+def _retry_failed_content_metadata_batches(failed_batches, dry_run, metadata_list):
+    """
+    Retries batches of content metadata whose update failed, e.g. due to a deadlock, by bisection:
+    a failed batch is split in half and each half is retried after a jittered backoff, so that only
+    the records that keep failing end up being retried one at a time. A record that still fails on its own
+    at ``CATALOG_CONTENT_METADATA_RETRY_MAX_DEPTH`` is given up on, and at most
+    ``CATALOG_CONTENT_METADATA_RETRY_MAX`` retries are made in total.
+    Called for side-effect: extends ``metadata_list`` with the records that were eventually written.
+    """
+    retry_max = getattr(settings, 'CATALOG_CONTENT_METADATA_RETRY_MAX', 1000)
+    retry_queue = collections.deque()
+    for failed_batch in failed_batches:
+        retry_queue.extend(_bisect_failed_content_metadata_batch(failed_batch, depth=1))
+
+    retry_keys = [get_content_key(entry) for failed_batch in failed_batches for entry in failed_batch]
     LOGGER.info(
         'Starting retry loop for %s keys: %s',
-        len(retry_list),
+        len(retry_keys),
         retry_keys,
     )
 
-    while retry_list and (retry_count < retry_max):
-        # in this second pass, we'll update one existing record at a time to avoid deadlocks
+    retry_count = 0
+    max_retry_depth = 0
+    abandoned_keys = []
+    while retry_queue and (retry_count < retry_max):
         retry_count += 1
-        metadata_record = retry_list.pop(0)
-        content_keys = [get_content_key(metadata_record)]
-        filtered_batched_metadata = [metadata_record]
+        retry_batch, depth = retry_queue.popleft()
+        max_retry_depth = max(max_retry_depth, depth)
+        _sleep_before_content_metadata_retry(depth)
+
+        still_failing = []
         _update_or_create_content_metadata(
-            content_keys, filtered_batched_metadata, dry_run, metadata_list, retry_list,
+            [get_content_key(entry) for entry in retry_batch], retry_batch, dry_run, metadata_list, still_failing,
         )
+        if not still_failing:
+            continue
+        if len(retry_batch) == 1 and depth >= settings.CATALOG_CONTENT_METADATA_RETRY_MAX_DEPTH:
+            LOGGER.warning('Giving up on retrying content key %s', get_content_key(retry_batch[0]))
+            abandoned_keys.append(get_content_key(retry_batch[0]))
+        else:
+            retry_queue.extend(_bisect_failed_content_metadata_batch(retry_batch, depth=depth + 1))
 
+    remaining_keys = abandoned_keys + [
+        get_content_key(entry) for retry_batch, _ in retry_queue for entry in retry_batch
+    ]
+    set_custom_attribute('content_metadata_retry_count', retry_count)
+    set_custom_attribute('content_metadata_max_retry_depth', max_retry_depth)
+    set_custom_attribute('content_metadata_retry_remaining_count', len(remaining_keys))
     LOGGER.info(
-        'End retry loop with remaining keys %s, retry_count %s',
-        retry_keys,
+        'End retry loop with remaining keys %s, retry_count %s, max_retry_depth %s',
+        remaining_keys,
         retry_count,
+        max_retry_depth,
     )
 
-    return metadata_list
+
+def _bisect_failed_content_metadata_batch(failed_batch, depth):
+    """
+    Returns the ``(batch, depth)`` retry entries for a failed batch: its two halves, or the
+    batch itself if it holds a single record.
+    """
+    if len(failed_batch) <= 1:
+        return [(failed_batch, depth)]
+    midpoint = len(failed_batch) // 2
+    return [(failed_batch[:midpoint], depth), (failed_batch[midpoint:], depth)]
 
 
-def _update_or_create_content_metadata(content_keys, filtered_batched_metadata, dry_run, metadata_list, retry_list):
+def _sleep_before_content_metadata_retry(depth):
+    """
+    Sleeps for a random ("full jitter") duration of up to an exponential backoff for the given
+    retry depth, so that concurrent retries of deadlocked batches don't collide again.
+    """
+    backoff_seconds = min(
+        settings.CATALOG_CONTENT_METADATA_RETRY_BACKOFF_SECONDS * (2 ** (depth - 1)),
+        settings.CATALOG_CONTENT_METADATA_RETRY_BACKOFF_MAX_SECONDS,
+    )
+    if backoff_seconds > 0:
+        time.sleep(random.uniform(0, backoff_seconds))
+
+
+def _update_or_create_content_metadata(content_keys, filtered_batched_metadata, dry_run, metadata_list, failed_batches):
     """
     Helper to do the updates of existing metadata and creation of new metadata.
-    Called for side-effect: modifies both ``metadata_list`` and ``retry_list``.
+    Called for side-effect: extends ``metadata_list`` with the written records, or appends
+    ``filtered_batched_metadata`` to ``failed_batches`` if its update failed.
     """
     nonexisting_metadata_defaults = None
     try:
@@ -1472,7 +2320,7 @@ def _update_or_create_content_metadata(content_keys, filtered_batched_metadata,
         metadata_list.extend(updated_metadata)
     except DatabaseError as exc:
         LOGGER.warning('Error during update of existing content keys %s: %s', content_keys, exc)
-        retry_list.extend(filtered_batched_metadata)
+        failed_batches.append(filtered_batched_metadata)
 
     if nonexisting_metadata_defaults:
         created_metadata = _create_new_content_metadata(nonexisting_metadata_defaults, dry_run)
@@ -1631,13 +2479,38 @@ def associate_content_metadata_with_query(metadata, catalog_query, dry_run=False
         list: The list of content_keys for the metadata associated with the query.
     """
     metadata_list = create_content_metadata(metadata, catalog_query, dry_run)
+    return _associate_metadata_list_with_query(metadata_list, catalog_query, dry_run)
+
+
+def associate_content_metadata_pages_with_query(metadata_pages, catalog_query, dry_run=False):
+    """
+    Same as ``associate_content_metadata_with_query()``, but for metadata that arrives in pages.
+    Content metadata is written while the pages are still arriving, and the content association
+    guardrails are applied once all pages have been written.
+
+    Arguments:
+        metadata_pages (iterable of lists): Pages of content metadata dictionaries.
+        catalog_query (CatalogQuery): CatalogQuery object
+        dry_run (boolean): Logs rather than commits updated content metadata.
+
+    Returns:
+        list: The list of content_keys for the metadata associated with the query.
+    """
+    metadata_list = create_content_metadata_from_pages(metadata_pages, catalog_query, dry_run)
+    return _associate_metadata_list_with_query(metadata_list, catalog_query, dry_run)
+
+
+def _associate_metadata_list_with_query(metadata_list, catalog_query, dry_run=False):
+    """
+    Sets the content metadata associated with `catalog_query` to the ContentMetadata objects (or
+    references) in `metadata_list`, unless that would change the query's content beyond the guardrails.
+
+    Returns:
+        list: The list of content_keys for the metadata associated with the query.
+    """
     # Stop gap if the new metadata list is extremely different from the current one
     if _check_content_association_threshold(catalog_query, metadata_list):
         return list(catalog_query.contentmetadata_set.values_list('content_key', flat=True))
-    # Setting `clear=True` will remove all prior relationships between
-    # the CatalogQuery's associated ContentMetadata objects
-    # before setting all new relationships from `metadata_list`.
-    # https://docs.djangoproject.com/en/2.2/ref/models/relations/#django.db.models.fields.related.RelatedManager.set
     if dry_run:
         old_metadata_count = catalog_query.contentmetadata_set.count()
         new_metadata_count = len(metadata_list)
@@ -1645,12 +2518,64 @@ def associate_content_metadata_with_query(metadata, catalog_query, dry_run=False
             LOGGER.info('[Dry Run] Updated metadata count ({} -> {}) for {}'.format(
                 old_metadata_count, new_metadata_count, catalog_query))
     else:
-        catalog_query.contentmetadata_set.set(metadata_list, clear=True)
+        _apply_content_metadata_association_delta(catalog_query, metadata_list)
+        EnterpriseCatalogContentMembership.refresh_for_catalog_query(catalog_query)
+        catalog_query.bump_content_version()
 
     associated_content_keys = [metadata.content_key for metadata in metadata_list]
     return associated_content_keys
 
 
+def _apply_content_metadata_association_delta(catalog_query, metadata_list, remove_missing=True):
+    """
+    Makes the ContentMetadata objects in ``metadata_list`` the content of ``catalog_query``, only
+    inserting and deleting the through-table rows that actually change, in chunks. Unless
+    ``remove_missing`` is False, content that isn't in ``metadata_list`` is removed from the query.
+
+    The change is sent as the ``catalog_query_content_changed`` signal, so that downstream indexing
+    can react to exactly the content that was added or removed.
+
+    Returns:
+        tuple: The lists of content keys that were added and removed.
+    """
+    through_model = ContentMetadata.catalog_queries.through
+    existing_keys_by_id = dict(
+        through_model.objects.filter(catalogquery_id=catalog_query.id).values_list(
+            'contentmetadata_id', 'contentmetadata__content_key',
+        )
+    )
+    desired_keys_by_id = {metadata.id: metadata.content_key for metadata in metadata_list}
+    ids_to_add = sorted(desired_keys_by_id.keys() - existing_keys_by_id.keys())
+    ids_to_remove = sorted(existing_keys_by_id.keys() - desired_keys_by_id.keys()) if remove_missing else []
+
+    batch_size = settings.CONTENT_METADATA_ASSOCIATION_BATCH_SIZE
+    with transaction.atomic():
+        for ids_batch in batch(ids_to_remove, batch_size=batch_size):
+            through_model.objects.filter(catalogquery_id=catalog_query.id, contentmetadata_id__in=ids_batch).delete()
+        through_model.objects.bulk_create(
+            [through_model(catalogquery_id=catalog_query.id, contentmetadata_id=id_to_add) for id_to_add in ids_to_add],
+            batch_size=batch_size,
+        )
+
+    added_content_keys = [desired_keys_by_id[id_to_add] for id_to_add in ids_to_add]
+    removed_content_keys = [existing_keys_by_id[id_to_remove] for id_to_remove in ids_to_remove]
+    LOGGER.info(
+        'Added %d and removed %d content items from catalog query %s, leaving %d unchanged',
+        len(added_content_keys),
+        len(removed_content_keys),
+        catalog_query,
+        len(existing_keys_by_id) - len(removed_content_keys),
+    )
+    if added_content_keys or removed_content_keys:
+        catalog_query_content_changed.send(
+            sender=CatalogQuery,
+            catalog_query=catalog_query,
+            added_content_keys=added_content_keys,
+            removed_content_keys=removed_content_keys,
+        )
+    return added_content_keys, removed_content_keys
+
+
 def create_course_associated_programs(programs, course_content_metadata):
     """
     Creates or updates a ContentMetadata object for each entry in `programs`,
@@ -1752,7 +2677,112 @@ def update_contentmetadata_from_discovery(catalog_query, dry_run=False):
     Returns:
         list of str: Returns the content keys that were associated from the query results.
     """
+    started_at = localized_utcnow()
+    start_time = time.perf_counter()
+    modified_since = DiscoverySyncWatermark.get_modified_since(DiscoverySyncWatermark.SEARCH_ALL, catalog_query)
+    if modified_since:
+        associated_content_keys = _sync_modified_contentmetadata_from_discovery(catalog_query, modified_since, dry_run)
+    elif STREAM_DISCOVERY_CONTENT_INGEST_SWITCH.is_enabled():
+        associated_content_keys = _stream_contentmetadata_from_discovery(catalog_query, dry_run)
+    else:
+        associated_content_keys = _load_contentmetadata_from_discovery(catalog_query, dry_run)
+
+    if associated_content_keys is not None and not dry_run:
+        DiscoverySyncWatermark.record_sync(
+            DiscoverySyncWatermark.SEARCH_ALL,
+            started_at,
+            is_full_sync=not modified_since,
+            catalog_query=catalog_query,
+            sync_seconds=time.perf_counter() - start_time,
+        )
+    return _complete_contentmetadata_update(catalog_query, associated_content_keys, dry_run)
+
+
+def update_contentmetadata_from_shared_discovery_fetch(shared_content_filter, catalog_queries, dry_run=False):
+    """
+    Same as ``update_contentmetadata_from_discovery()``, for a group of catalog queries planned by
+    ``filters.plan_shared_content_fetches()``. The group's content is fetched from discovery's /search/all
+    endpoint once, with the group's shared content filter, and the content of each query is then picked
+    out of the shared results locally.
 
+    Args:
+        shared_content_filter (dict): The shared content filter of the group of catalog queries.
+        catalog_queries (list of CatalogQuery): The catalog queries of the group.
+        dry_run (boolean): Logs rather than commits updated content metadata.
+    Returns:
+        dict: The content keys that were associated with each catalog query, by catalog query id.
+    """
+    started_at = localized_utcnow()
+    start_time = time.perf_counter()
+    try:
+        metadata = DiscoveryApiClient().get_metadata_by_content_filter(shared_content_filter)
+    except Exception as exc:
+        LOGGER.exception(f'update_contentmetadata_from_shared_discovery_fetch failed {shared_content_filter}')
+        raise exc
+    # Each query of the group is timed as its share of the fetch, plus the time to update its own content.
+    fetch_seconds_per_query = (time.perf_counter() - start_time) / len(catalog_queries)
+
+    page_size = DiscoveryApiClient.SEARCH_ALL_PAGE_SIZE
+    individual_request_count = 0
+    associated_content_keys_by_query_id = {}
+    for catalog_query in catalog_queries:
+        query_start_time = time.perf_counter()
+        query_metadata = filters.filter_shared_content(catalog_query.content_filter, metadata)
+        # The number of /search/all requests the query would have made with a fetch of its own.
+        individual_request_count += max(1, math.ceil(len(query_metadata) / page_size))
+        associated_content_keys = None
+        if query_metadata:
+            associated_content_keys = associate_content_metadata_with_query(query_metadata, catalog_query, dry_run)
+            if not dry_run:
+                DiscoverySyncWatermark.record_sync(
+                    DiscoverySyncWatermark.SEARCH_ALL,
+                    started_at,
+                    is_full_sync=True,
+                    catalog_query=catalog_query,
+                    sync_seconds=fetch_seconds_per_query + time.perf_counter() - query_start_time,
+                )
+        associated_content_keys_by_query_id[catalog_query.id] = _complete_contentmetadata_update(
+            catalog_query, associated_content_keys, dry_run,
+        )
+
+    shared_request_count = max(1, math.ceil(len(metadata) / page_size))
+    LOGGER.info(
+        'Retrieved %d content items from course-discovery for %d catalog queries with shared content filter %s, '
+        'using %d /search/all requests instead of %d (%d saved)',
+        len(metadata),
+        len(catalog_queries),
+        shared_content_filter,
+        shared_request_count,
+        individual_request_count,
+        individual_request_count - shared_request_count,
+    )
+    return associated_content_keys_by_query_id
+
+
+def _complete_contentmetadata_update(catalog_query, associated_content_keys, dry_run=False):
+    """
+    Synchronizes the restricted content of `catalog_query` once its content from discovery's /search/all
+    endpoint has been associated. Returns all of the associated content keys, or an empty list if
+    `associated_content_keys` is None because discovery had no results for the query.
+    """
+    if associated_content_keys is None:
+        return []
+    LOGGER.info(
+        'Associated %d content items (%d unique) with catalog query %s',
+        len(associated_content_keys),
+        len(set(associated_content_keys)),
+        catalog_query,
+    )
+
+    restricted_content_keys = synchronize_restricted_content(catalog_query, dry_run=dry_run)
+    return associated_content_keys + restricted_content_keys
+
+
+def _load_contentmetadata_from_discovery(catalog_query, dry_run=False):
+    """
+    Loads every page of the discovery results of `catalog_query`, then creates/updates and associates
+    the ContentMetadata objects. Returns the associated content keys, or None if discovery had no results.
+    """
     try:
         # metadata will be an empty dict if unavailable from cache or API.
         metadata = CatalogQueryMetadata(catalog_query).metadata
@@ -1761,7 +2791,7 @@ def update_contentmetadata_from_discovery(catalog_query, dry_run=False):
         raise exc
 
     if not metadata:
-        return []
+        return None
 
     # associate content metadata with a catalog query only when we get valid results
     # back from the discovery service. if metadata is `None`, an error occurred while
@@ -1773,17 +2803,78 @@ def update_contentmetadata_from_discovery(catalog_query, dry_run=False):
         len(set(metadata_content_keys)),
         catalog_query,
     )
+    return associate_content_metadata_with_query(metadata, catalog_query, dry_run)
+
+
+def _sync_modified_contentmetadata_from_discovery(catalog_query, modified_since, dry_run=False):
+    """
+    Creates/updates the ContentMetadata objects of `catalog_query` that discovery reports as modified since
+    `modified_since`, and adds them to the query's content. Content that stopped matching the query, along
+    with programs and pathways, which have no modified time, is left for the next full sync.
+    Returns the associated content keys.
+    """
+    content_filter = catalog_query.content_filter | {
+        DISCOVERY_MODIFIED_SINCE_FILTER_KEY: modified_since.isoformat(),
+    }
+    try:
+        discovery_client = DiscoveryApiClient()
+        metadata = discovery_client.retrieve_metadata_for_content_filter(
+            content_filter, discovery_client.SEARCH_ALL_QUERY_PARAMS,
+        )
+    except Exception as exc:
+        LOGGER.exception(f'update_contentmetadata_from_discovery failed {catalog_query}')
+        raise exc
 
-    associated_content_keys = associate_content_metadata_with_query(metadata, catalog_query, dry_run)
     LOGGER.info(
-        'Associated %d content items (%d unique) with catalog query %s',
-        len(associated_content_keys),
-        len(set(associated_content_keys)),
+        'Retrieved %d content items modified since %s from course-discovery for catalog query %s',
+        len(metadata),
+        modified_since,
         catalog_query,
     )
+    metadata_list = create_content_metadata(metadata, catalog_query, dry_run)
+    if metadata_list and not dry_run:
+        _apply_content_metadata_association_delta(catalog_query, metadata_list, remove_missing=False)
+        EnterpriseCatalogContentMembership.refresh_for_catalog_query(catalog_query)
+        catalog_query.bump_content_version()
+    return [metadata.content_key for metadata in metadata_list]
 
-    restricted_content_keys = synchronize_restricted_content(catalog_query, dry_run=dry_run)
-    return associated_content_keys + restricted_content_keys
+
+def _stream_contentmetadata_from_discovery(catalog_query, dry_run=False):
+    """
+    Creates/updates the ContentMetadata objects of `catalog_query` batch by batch while its discovery
+    result pages are still being fetched, then associates them. Returns the associated content keys,
+    or None if discovery had no results.
+    """
+    metadata_pages = iter(DiscoveryApiClient().iter_metadata_pages_by_query(catalog_query))
+    retrieved_content_keys = []
+
+    def tracked_pages(pages):
+        for page in pages:
+            retrieved_content_keys.extend(get_content_key(entry) for entry in page)
+            yield page
+
+    try:
+        # As with a full load, only associate content metadata with the query when discovery
+        # returned some results, so that an empty response never clears the query's content.
+        first_page = next((page for page in metadata_pages if page), None)
+        if first_page is None:
+            return None
+        associated_content_keys = associate_content_metadata_pages_with_query(
+            tracked_pages(itertools.chain([first_page], metadata_pages)),
+            catalog_query,
+            dry_run,
+        )
+    except Exception as exc:
+        LOGGER.exception(f'update_contentmetadata_from_discovery failed {catalog_query}')
+        raise exc
+
+    LOGGER.info(
+        'Retrieved %d content items (%d unique) from course-discovery for catalog query %s',
+        len(retrieved_content_keys),
+        len(set(retrieved_content_keys)),
+        catalog_query,
+    )
+    return associated_content_keys
 
 
 def synchronize_restricted_content(catalog_query, dry_run=False):
@@ -1843,6 +2934,10 @@ def synchronize_restricted_content(catalog_query, dry_run=False):
             course_run_dict=course_run_dict,
         )
         results.append(course_run_record.content_key)
+
+    if not dry_run:
+        EnterpriseCatalogContentMembership.refresh_for_catalog_query(catalog_query)
+        catalog_query.bump_content_version()
     return results
 
 
@@ -0,0 +1,115 @@
+"""
+Utility functions for scheduling the catalog query updates of the update_content_metadata command
+"""
+import logging
+
+from django.db.models import Count
+
+from enterprise_catalog.apps.api_client.discovery import DiscoveryApiClient
+from enterprise_catalog.apps.catalog.constants import (
+    DISCOVERY_MODIFIED_SINCE_FILTER_KEY,
+)
+from enterprise_catalog.apps.catalog.models import (
+    ContentMetadata,
+    DiscoverySyncWatermark,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_unchanged_catalog_queries(catalog_queries):
+    """
+    Returns the catalog queries whose next update would be an incremental sync that finds no content
+    modified by course-discovery since their last sync, and can thus be skipped.
+
+    Each candidate costs a single /search/all request for one result. Queries that are due for a full sync,
+    whose content filter changed since their last sync, or whose restricted runs or force-included courses
+    aren't requested with their content filter, are never skipped.
+    """
+    discovery_client = None
+    unchanged_catalog_queries = []
+    for catalog_query in catalog_queries:
+        modified_since = DiscoverySyncWatermark.get_modified_since(DiscoverySyncWatermark.SEARCH_ALL, catalog_query)
+        if not modified_since:
+            continue
+        if catalog_query.restricted_runs_allowed or catalog_query.content_filter.get(
+            'enterprise_force_include_aggregation_keys'
+        ):
+            continue
+
+        discovery_client = discovery_client or DiscoveryApiClient()
+        content_filter = catalog_query.content_filter | {
+            DISCOVERY_MODIFIED_SINCE_FILTER_KEY: modified_since.isoformat(),
+        }
+        try:
+            modified_content_count = discovery_client.get_content_count_by_content_filter(content_filter)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception(
+                'Could not check for content modified since %s for catalog query %s, it will be updated.',
+                modified_since,
+                catalog_query,
+            )
+            continue
+        if not modified_content_count:
+            unchanged_catalog_queries.append(catalog_query)
+    return unchanged_catalog_queries
+
+
+def estimate_catalog_query_update_seconds(catalog_queries):
+    """
+    Estimates how many seconds updating each of ``catalog_queries`` takes, from the duration of its last sync.
+    Queries that were never timed are estimated from their amount of content, at the average rate of the
+    timed queries.
+
+    Returns:
+        dict: The estimated seconds of each catalog query by id, or None when there's nothing to estimate from.
+    """
+    catalog_query_ids = [catalog_query.id for catalog_query in catalog_queries]
+    last_sync_seconds_by_id = dict(
+        DiscoverySyncWatermark.objects.filter(
+            endpoint=DiscoverySyncWatermark.SEARCH_ALL,
+            catalog_query_id__in=catalog_query_ids,
+            last_sync_seconds__isnull=False,
+        ).values_list('catalog_query_id', 'last_sync_seconds')
+    )
+    content_count_by_id = dict(
+        ContentMetadata.catalog_queries.through.objects.filter(
+            catalogquery_id__in=catalog_query_ids,
+        ).values('catalogquery_id').annotate(
+            content_count=Count('id'),
+        ).values_list('catalogquery_id', 'content_count')
+    )
+
+    timed_content_count = sum(content_count_by_id.get(query_id, 0) for query_id in last_sync_seconds_by_id)
+    seconds_per_content = sum(last_sync_seconds_by_id.values()) / timed_content_count if timed_content_count else None
+
+    estimated_seconds_by_id = {}
+    for query_id in catalog_query_ids:
+        if query_id in last_sync_seconds_by_id:
+            estimated_seconds_by_id[query_id] = last_sync_seconds_by_id[query_id]
+        elif seconds_per_content is not None and query_id in content_count_by_id:
+            estimated_seconds_by_id[query_id] = content_count_by_id[query_id] * seconds_per_content
+        else:
+            estimated_seconds_by_id[query_id] = None
+    return estimated_seconds_by_id
+
+
+def order_catalog_query_updates(planned_updates, estimated_seconds_by_id):
+    """
+    Orders planned catalog query updates longest first, which keeps the total time it takes to run them
+    across a limited number of workers short. Updates that can't be estimated are run first, since they
+    may well be the longest.
+
+    Args:
+        planned_updates (list): ``(task, catalog_queries)`` pairs, each a task that updates the given queries.
+        estimated_seconds_by_id (dict): The result of ``estimate_catalog_query_update_seconds()``.
+    Returns:
+        list: The tasks of ``planned_updates``, in the order they should be run.
+    """
+    def estimated_duration(planned_update):
+        _, catalog_queries = planned_update
+        estimates = [estimated_seconds_by_id.get(catalog_query.id) for catalog_query in catalog_queries]
+        return (None in estimates, sum(estimate or 0 for estimate in estimates))
+
+    return [task for task, _ in sorted(planned_updates, key=estimated_duration, reverse=True)]
@@ -0,0 +1,12 @@
+"""
+Signals sent by the catalog app.
+"""
+from django.dispatch import Signal
+
+
+# Sent once the content associated with a CatalogQuery has been synced from course-discovery and has changed.
+# Arguments:
+#   catalog_query (CatalogQuery): The catalog query whose content changed.
+#   added_content_keys (list of str): The content keys that were added to the catalog query.
+#   removed_content_keys (list of str): The content keys that were removed from the catalog query.
+catalog_query_content_changed = Signal()
@@ -1,6 +1,7 @@
 """ Tests for catalog query filtering. """
 import json
 import logging
+from unittest import mock
 
 import ddt
 import pytest
@@ -504,3 +505,46 @@ class QueryFilterTests(TestCase):
         query_data = json.loads(query_json)
         content_metadata = json.loads(content_metadata_json)
         assert not filters.does_query_match_content(query_data, content_metadata)
+
+    def test_plan_shared_content_fetches(self):
+        """
+        Queries that only differ by their aggregation keys share a fetch of the union of their keys,
+        while other queries are fetched individually.
+        """
+        query_a = mock.Mock(content_filter={'org': 'edX', 'aggregation_key': ['course:edX+A', 'course:edX+B']})
+        query_b = mock.Mock(content_filter={'org': 'edX', 'aggregation_key': 'course:edX+C'})
+        query_c = mock.Mock(content_filter={'org': 'edX', 'aggregation_key': ['course:edX+A']})
+        other_org_query = mock.Mock(content_filter={'org': 'MITx', 'aggregation_key': ['course:MITx+A']})
+        force_include_query = mock.Mock(content_filter={
+            'org': 'edX',
+            'aggregation_key': ['course:edX+D'],
+            'enterprise_force_include_aggregation_keys': ['course:edX+E'],
+        })
+
+        shared_fetches, individual_queries = filters.plan_shared_content_fetches(
+            [query_a, other_org_query, query_b, force_include_query, query_c]
+        )
+
+        assert shared_fetches == [(
+            {'org': 'edX', 'aggregation_key': ['course:edX+A', 'course:edX+B', 'course:edX+C']},
+            [query_a, query_b, query_c],
+        )]
+        assert individual_queries == [force_include_query, other_org_query]
+
+    def test_shared_content_filter(self):
+        """
+        The shared filter drops the aggregation keys if any query doesn't restrict them, and each query
+        picks its own content out of the shared results.
+        """
+        content_filter_a = {'org': 'edX', 'aggregation_key': ['course:edX+A']}
+        content_filter_b = {'org': 'edX'}
+        shared_content_filter = filters.get_shared_content_filter([content_filter_a, content_filter_b])
+        assert shared_content_filter == {'org': 'edX'}
+        assert filters.get_shared_content_filter([content_filter_a, {'org': 'MITx'}]) is None
+
+        metadata = [
+            {'key': 'edX+A', 'aggregation_key': 'course:edX+A'},
+            {'key': 'edX+B', 'aggregation_key': 'course:edX+B'},
+        ]
+        assert filters.filter_shared_content(content_filter_a, metadata) == metadata[:1]
+        assert filters.filter_shared_content(content_filter_b, metadata) == metadata
@@ -9,8 +9,12 @@ from uuid import uuid4
 
 import ddt
 from django.conf import settings
-from django.db import DatabaseError
+from django.core.cache import cache
+from django.db import DatabaseError, DataError, connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from edx_django_utils.cache import RequestCache
+from waffle.testutils import override_switch
 
 from enterprise_catalog.apps.catalog.constants import (
     COURSE,
@@ -18,36 +22,59 @@ from enterprise_catalog.apps.catalog.constants import (
     COURSE_RUN_RESTRICTION_TYPE_KEY,
     EXEC_ED_2U_COURSE_TYPE,
     EXEC_ED_2U_ENTITLEMENT_MODE,
+    LEARNER_PATHWAY,
     PROGRAM,
     QUERY_FOR_RESTRICTED_RUNS,
     RESTRICTED_RUNS_ALLOWED_KEY,
     RESTRICTION_FOR_B2B,
 )
 from enterprise_catalog.apps.catalog.models import (
+    CatalogQuery,
     ContentMetadata,
+    ContentMetadataChildKey,
+    ContentMetadataReference,
+    DiscoverySyncWatermark,
+    EnterpriseCatalog,
+    EnterpriseCatalogContentMembership,
     RestrictedCourseMetadata,
     _check_content_association_threshold,
+    _create_new_content_metadata,
     _execute_updates_existing_records_avoid_deadlock,
     _get_defaults_from_metadata,
     _partition_content_metadata_defaults,
     _should_allow_metadata,
     _should_skip_course_update,
     _update_existing_content_metadata,
+    associate_content_metadata_with_query,
 )
 from enterprise_catalog.apps.catalog.models import \
     create_content_metadata as create_content_metadata_func
 from enterprise_catalog.apps.catalog.models import (
+    create_content_metadata_from_pages,
     synchronize_restricted_content,
     update_contentmetadata_from_discovery,
+    update_contentmetadata_from_shared_discovery_fetch,
+)
+from enterprise_catalog.apps.catalog.signals import (
+    catalog_query_content_changed,
 )
 from enterprise_catalog.apps.catalog.tests import factories
 from enterprise_catalog.apps.catalog.utils import localized_utcnow
+from enterprise_catalog.apps.catalog.waffle import (
+    INCREMENTAL_DISCOVERY_SYNC_SWITCH,
+    STREAM_DISCOVERY_CONTENT_INGEST_SWITCH,
+)
 
 
 @ddt.ddt
 class TestModels(TestCase):
     """ Models tests. """
 
+    def setUp(self):
+        super().setUp()
+        # Waffle switches memoize their state in the request cache, which would otherwise outlive each test.
+        RequestCache.clear_all_namespaces()
+
     @ddt.data(
         {'content_type': COURSE_RUN, 'course_type': EXEC_ED_2U_COURSE_TYPE, 'expected_value': False},
         {'content_type': PROGRAM, 'course_type': EXEC_ED_2U_COURSE_TYPE, 'expected_value': False},
@@ -798,6 +825,257 @@ class TestModels(TestCase):
         update_contentmetadata_from_discovery(catalog.catalog_query)
         assert len(catalog.catalog_query.contentmetadata_set.all()) == 1
 
+    @override_switch(STREAM_DISCOVERY_CONTENT_INGEST_SWITCH.name, active=True)
+    @override_settings(SELECT_EXISTING_CONTENT_METADATA_BATCH_SIZE=2)
+    @mock.patch('enterprise_catalog.apps.catalog.models.DiscoveryApiClient')
+    def test_contentmetadata_update_from_discovery_streaming(self, mock_client):
+        """
+        With streaming ingest, content metadata is written while discovery pages are still arriving,
+        and is associated with the query once all pages have been written.
+        """
+        catalog = factories.EnterpriseCatalogFactory()
+        pages = [
+            [
+                {'aggregation_key': f'course:edX+page{page}x{index}', 'key': f'edX+page{page}x{index}'}
+                for index in range(3)
+            ]
+            for page in range(3)
+        ]
+        content_metadata_counts_when_fetched = []
+
+        def iter_metadata_pages_by_query(catalog_query):  # pylint: disable=unused-argument
+            for page in pages:
+                content_metadata_counts_when_fetched.append(ContentMetadata.objects.count())
+                yield page
+        mock_client.return_value.iter_metadata_pages_by_query.side_effect = iter_metadata_pages_by_query
+
+        associated_content_keys = update_contentmetadata_from_discovery(catalog.catalog_query)
+
+        expected_content_keys = [entry['key'] for page in pages for entry in page]
+        assert associated_content_keys == expected_content_keys
+        assert set(catalog.content_metadata.values_list('content_key', flat=True)) == set(expected_content_keys)
+        # Earlier batches were already written by the time the later pages were fetched.
+        assert content_metadata_counts_when_fetched[0] == 0
+        assert content_metadata_counts_when_fetched[-1] > 0
+
+    def test_create_content_metadata_from_pages_keeps_references(self):
+        """
+        Content metadata written from pages is only kept as references to the written records,
+        so that their metadata isn't held in memory until the last page is written.
+        """
+        references = create_content_metadata_from_pages([
+            [{'aggregation_key': 'course:edX+aX', 'key': 'edX+aX'}],
+            [{'aggregation_key': 'course:edX+bX', 'key': 'edX+bX'}],
+        ])
+
+        assert references == [
+            ContentMetadataReference(ContentMetadata.objects.get(content_key=content_key).id, content_key)
+            for content_key in ['edX+aX', 'edX+bX']
+        ]
+
+    @override_switch(STREAM_DISCOVERY_CONTENT_INGEST_SWITCH.name, active=True)
+    @mock.patch('enterprise_catalog.apps.catalog.models.DiscoveryApiClient')
+    def test_contentmetadata_update_from_discovery_streaming_guardrails(self, mock_client):
+        """
+        With streaming ingest, empty discovery results leave the query's content alone, and the
+        content association guardrails are applied to the final set of content.
+        """
+        catalog = factories.EnterpriseCatalogFactory()
+        content_metadata = [
+            factories.ContentMetadataFactory(content_key=f'the-content-key-{x}', content_type=COURSE)
+            for x in range(100)
+        ]
+        catalog.catalog_query.contentmetadata_set.set(content_metadata, clear=True)
+        catalog.catalog_query.modified -= timedelta(days=2)
+
+        mock_client.return_value.iter_metadata_pages_by_query.return_value = iter([[], []])
+        assert update_contentmetadata_from_discovery(catalog.catalog_query) == []
+        assert catalog.catalog_query.contentmetadata_set.count() == 100
+
+        mock_client.return_value.iter_metadata_pages_by_query.return_value = iter([
+            [{'aggregation_key': 'course:edX+testX', 'key': 'edX+testX'}],
+            [{'aggregation_key': 'course:edX+otherX', 'key': 'edX+otherX'}],
+        ])
+        update_contentmetadata_from_discovery(catalog.catalog_query)
+        assert catalog.catalog_query.contentmetadata_set.count() == 100
+
+    @mock.patch('enterprise_catalog.apps.catalog.models.DiscoveryApiClient')
+    def test_contentmetadata_update_from_shared_discovery_fetch(self, mock_client):
+        """
+        A group of catalog queries is fetched from discovery once, with the shared content filter,
+        and each query is associated with the content its own filter matches.
+        """
+        query_a = factories.CatalogQueryFactory(content_filter={'org': 'edX', 'aggregation_key': ['course:edX+A']})
+        query_b = factories.CatalogQueryFactory(
+            content_filter={'org': 'edX', 'aggregation_key': ['course:edX+A', 'course:edX+B']},
+        )
+        query_c = factories.CatalogQueryFactory(content_filter={'org': 'edX', 'aggregation_key': ['course:edX+C']})
+        shared_content_filter = {'org': 'edX', 'aggregation_key': ['course:edX+A', 'course:edX+B', 'course:edX+C']}
+        mock_client.SEARCH_ALL_PAGE_SIZE = 100
+        mock_client.return_value.get_metadata_by_content_filter.return_value = [
+            {'aggregation_key': 'course:edX+A', 'key': 'edX+A'},
+            {'aggregation_key': 'course:edX+B', 'key': 'edX+B'},
+        ]
+
+        associated_content_keys_by_query_id = update_contentmetadata_from_shared_discovery_fetch(
+            shared_content_filter, [query_a, query_b, query_c],
+        )
+
+        mock_client.return_value.get_metadata_by_content_filter.assert_called_once_with(shared_content_filter)
+        assert associated_content_keys_by_query_id == {
+            query_a.id: ['edX+A'],
+            query_b.id: ['edX+A', 'edX+B'],
+            query_c.id: [],
+        }
+        assert set(query_a.contentmetadata_set.values_list('content_key', flat=True)) == {'edX+A'}
+        assert set(query_b.contentmetadata_set.values_list('content_key', flat=True)) == {'edX+A', 'edX+B'}
+        assert not query_c.contentmetadata_set.exists()
+
+    @override_switch(INCREMENTAL_DISCOVERY_SYNC_SWITCH.name, active=True)
+    @mock.patch('enterprise_catalog.apps.catalog.models.DiscoveryApiClient')
+    def test_contentmetadata_update_from_discovery_incremental(self, mock_client):
+        """
+        Once a catalog query has been fully synced, only content modified since its watermark is requested,
+        and it is added to the query's existing content.
+        """
+        catalog_query = factories.CatalogQueryFactory(content_filter={'org': 'edX'})
+        existing_metadata = factories.ContentMetadataFactory(content_key='edX+existingX', content_type=COURSE)
+        catalog_query.contentmetadata_set.add(existing_metadata)
+        synced_through = localized_utcnow() - timedelta(days=1)
+        CatalogQuery.objects.filter(id=catalog_query.id).update(modified=synced_through - timedelta(days=1))
+        catalog_query.refresh_from_db()
+        DiscoverySyncWatermark.record_sync(
+            DiscoverySyncWatermark.SEARCH_ALL, synced_through, is_full_sync=True, catalog_query=catalog_query,
+        )
+        mock_client.return_value.retrieve_metadata_for_content_filter.return_value = [
+            {'aggregation_key': 'course:edX+modifiedX', 'key': 'edX+modifiedX'},
+        ]
+
+        associated_content_keys = update_contentmetadata_from_discovery(catalog_query)
+
+        assert associated_content_keys == ['edX+modifiedX']
+        requested_content_filter = mock_client.return_value.retrieve_metadata_for_content_filter.call_args.args[0]
+        assert requested_content_filter == {'org': 'edX', 'modified__gte': synced_through.isoformat()}
+        assert set(catalog_query.contentmetadata_set.values_list('content_key', flat=True)) == {
+            'edX+existingX', 'edX+modifiedX',
+        }
+        watermark = DiscoverySyncWatermark.objects.get(catalog_query=catalog_query)
+        assert watermark.synced_through > synced_through
+        assert watermark.last_full_sync == synced_through
+        assert watermark.last_sync_seconds >= 0
+
+        # Once the last full sync is too old, the next sync is a full one.
+        watermark.last_full_sync -= timedelta(seconds=settings.DISCOVERY_FULL_SYNC_INTERVAL)
+        watermark.save()
+        assert DiscoverySyncWatermark.get_modified_since(DiscoverySyncWatermark.SEARCH_ALL, catalog_query) is None
+
+    @override_switch(INCREMENTAL_DISCOVERY_SYNC_SWITCH.name, active=True)
+    @override_settings(DISCOVERY_CATALOG_QUERY_CACHE_TIMEOUT=0)
+    @mock.patch('enterprise_catalog.apps.api_client.discovery.DiscoveryApiClient')
+    @mock.patch('enterprise_catalog.apps.catalog.models.DiscoveryApiClient')
+    def test_contentmetadata_update_from_discovery_edited_query(self, mock_client, mock_full_sync_client):
+        """
+        Once a catalog query's content filter is edited after its last sync, the next sync is a full one,
+        which removes the content that no longer matches the query.
+        """
+        catalog_query = factories.CatalogQueryFactory(content_filter={'org': 'edX'})
+        removed_metadata = factories.ContentMetadataFactory(content_key='edX+removedX', content_type=COURSE)
+        catalog_query.contentmetadata_set.add(removed_metadata)
+        DiscoverySyncWatermark.record_sync(
+            DiscoverySyncWatermark.SEARCH_ALL, localized_utcnow(), is_full_sync=True, catalog_query=catalog_query,
+        )
+        catalog_query.content_filter = {'org': 'MITx'}
+        catalog_query.save()
+        mock_full_sync_client.return_value.get_metadata_by_query.return_value = [
+            {'aggregation_key': 'course:MITx+keptX', 'key': 'MITx+keptX'},
+        ]
+
+        assert DiscoverySyncWatermark.get_modified_since(DiscoverySyncWatermark.SEARCH_ALL, catalog_query) is None
+        update_contentmetadata_from_discovery(catalog_query)
+
+        mock_client.return_value.retrieve_metadata_for_content_filter.assert_not_called()
+        mock_full_sync_client.return_value.get_metadata_by_query.assert_called_once()
+        assert set(catalog_query.contentmetadata_set.values_list('content_key', flat=True)) == {'MITx+keptX'}
+
+    def test_associate_content_metadata_with_query_applies_delta(self):
+        """
+        Associating content with a query only inserts and deletes the associations that changed,
+        and sends the change as the catalog_query_content_changed signal.
+        """
+        catalog_query = factories.CatalogQueryFactory()
+        through_model = ContentMetadata.catalog_queries.through
+        metadata = [
+            {'aggregation_key': f'course:edX+{index}x', 'key': f'edX+{index}x', 'content_type': COURSE}
+            for index in range(3)
+        ]
+        associate_content_metadata_with_query(metadata, catalog_query)
+        unchanged_row_ids = set(
+            through_model.objects.filter(
+                catalogquery_id=catalog_query.id,
+                contentmetadata__content_key__in=['edX+1x', 'edX+2x'],
+            ).values_list('id', flat=True)
+        )
+        signal_receiver = mock.Mock()
+        catalog_query_content_changed.connect(signal_receiver)
+        self.addCleanup(catalog_query_content_changed.disconnect, signal_receiver)
+
+        metadata = metadata[1:] + [{'aggregation_key': 'course:edX+3x', 'key': 'edX+3x', 'content_type': COURSE}]
+        associate_content_metadata_with_query(metadata, catalog_query)
+
+        assert set(catalog_query.contentmetadata_set.values_list('content_key', flat=True)) == {
+            'edX+1x', 'edX+2x', 'edX+3x',
+        }
+        assert unchanged_row_ids <= set(
+            through_model.objects.filter(catalogquery_id=catalog_query.id).values_list('id', flat=True)
+        )
+        signal_receiver.assert_called_once_with(
+            signal=catalog_query_content_changed,
+            sender=CatalogQuery,
+            catalog_query=catalog_query,
+            added_content_keys=['edX+3x'],
+            removed_content_keys=['edX+0x'],
+        )
+
+    def test_content_metadata_child_keys_follow_json_metadata(self):
+        """
+        The child content keys of a program are indexed when it's saved, and only the keys that
+        changed are rewritten when its json metadata is bulk updated.
+        """
+        program = factories.ContentMetadataFactory(
+            content_type=PROGRAM,
+            _json_metadata={'courses': [{'key': 'edX+aX'}, {'key': 'edX+bX'}]},
+        )
+        assert set(program.child_keys.values_list('child_content_type', 'child_content_key')) == {
+            (COURSE, 'edX+aX'), (COURSE, 'edX+bX'),
+        }
+        unchanged_child_key_id = program.child_keys.get(child_content_key='edX+bX').id
+
+        program.json_metadata = {'courses': [{'key': 'edX+bX'}, {'key': 'edX+cX'}]}
+        ContentMetadata.objects.bulk_update([program], ['_json_metadata'])
+
+        assert set(program.child_keys.values_list('child_content_type', 'child_content_key')) == {
+            (COURSE, 'edX+bX'), (COURSE, 'edX+cX'),
+        }
+        assert program.child_keys.get(child_content_key='edX+bX').id == unchanged_child_key_id
+
+    def test_get_missing_child_content_keys(self):
+        """
+        Content referenced by programs and pathways without content metadata is found with the child key index.
+        """
+        factories.ContentMetadataFactory(content_type=COURSE, content_key='edX+presentX')
+        factories.ContentMetadataFactory(
+            content_type=PROGRAM,
+            _json_metadata={'courses': [{'key': 'edX+presentX'}, {'key': 'edX+missingX'}]},
+        )
+        factories.ContentMetadataFactory(
+            content_type=LEARNER_PATHWAY,
+            _json_metadata={'steps': [{'courses': [{'key': 'edX+pathwayX'}], 'programs': [{'uuid': 'program-uuid'}]}]},
+        )
+
+        assert ContentMetadataChildKey.get_missing_child_content_keys(PROGRAM, COURSE) == {'edX+missingX'}
+        assert ContentMetadataChildKey.get_missing_child_content_keys(LEARNER_PATHWAY, COURSE) == {'edX+pathwayX'}
+        assert ContentMetadataChildKey.get_missing_child_content_keys(LEARNER_PATHWAY, PROGRAM) == {'program-uuid'}
+
     def test_bulk_update_changes_modified_time(self):
         """
         Test that `ContentMetadata.objects.bulk_update()` changes
@@ -815,6 +1093,122 @@ class TestModels(TestCase):
             record.refresh_from_db()
             self.assertGreater(record.modified, original_modified_time)
 
+    @ddt.data(
+        # A course with a published, enrollable, and marketable run is published and active.
+        (COURSE, {'course_runs': [{'status': 'published', 'is_enrollable': True, 'is_marketable': True}]}, True, True),
+        # A course whose only published run isn't enrollable is published but inactive.
+        (
+            COURSE,
+            {'course_runs': [{'status': 'published', 'is_enrollable': False, 'is_marketable': True}]},
+            True,
+            False,
+        ),
+        # A course without any published runs is neither.
+        (COURSE, {'course_runs': [{'status': 'unpublished', 'is_enrollable': True}]}, False, False),
+        # A course without runs falls back to its own status.
+        (COURSE, {'status': 'unpublished', 'course_runs': []}, False, False),
+        (COURSE, {'course_runs': []}, True, False),
+        # Other content types are always published and active.
+        (PROGRAM, {'status': 'unpublished'}, True, True),
+    )
+    @ddt.unpack
+    def test_status_flags_computed_on_save(self, content_type, json_metadata, expected_published, expected_active):
+        """
+        Test that the `is_published` and `is_active` flags are derived from the json metadata on save.
+        """
+        record = factories.ContentMetadataFactory(content_type=content_type, _json_metadata=json_metadata)
+        record.refresh_from_db()
+        self.assertEqual(record.is_published, expected_published)
+        self.assertEqual(record.is_active, expected_active)
+
+    def test_bulk_update_refreshes_status_flags(self):
+        """
+        Test that `ContentMetadata.objects.bulk_update()` refreshes the status flags
+        of the updated records when their json metadata is updated.
+        """
+        records = factories.ContentMetadataFactory.create_batch(3, content_type=COURSE)
+        for record in records:
+            self.assertTrue(record.is_published)
+            self.assertTrue(record.is_active)
+            record._json_metadata['course_runs'] = []  # pylint: disable=protected-access
+            record._json_metadata['status'] = 'unpublished'  # pylint: disable=protected-access
+
+        fields = ['_json_metadata']
+        ContentMetadata.objects.bulk_update(records, fields, batch_size=10)
+
+        self.assertEqual(fields, ['_json_metadata'])
+        for record in records:
+            record.refresh_from_db()
+            self.assertFalse(record.is_published)
+            self.assertFalse(record.is_active)
+
+    def test_get_content_version(self):
+        """
+        Test that the content version of a catalog changes when content is modified in, added to,
+        or removed from the catalog, and only then.
+        """
+        catalog = factories.EnterpriseCatalogFactory()
+        metadata = [
+            {'aggregation_key': 'course:edX+testX', 'key': 'edX+testX', 'content_type': COURSE},
+            {'aggregation_key': 'course:edX+otherX', 'key': 'edX+otherX', 'content_type': COURSE},
+        ]
+        associate_content_metadata_with_query(metadata, catalog.catalog_query)
+
+        with self.assertNumQueries(3):
+            last_modified, etag = catalog.get_content_version(include_customer_modified=False)
+        assert catalog.get_content_version(include_customer_modified=False) == (last_modified, etag)
+
+        ContentMetadata.objects.get(content_key='edX+testX').save()
+        modified_last_modified, modified_etag = catalog.get_content_version(include_customer_modified=False)
+        assert modified_last_modified > last_modified
+        assert modified_etag != etag
+
+        associate_content_metadata_with_query(metadata[:1], catalog.catalog_query)
+        _, removed_etag = catalog.get_content_version(include_customer_modified=False)
+        assert removed_etag not in (etag, modified_etag)
+
+    def test_get_matching_content_single_query(self):
+        """
+        Test that matching content by course run keys, with and without restricted runs,
+        takes a single query.
+        """
+        catalog = factories.EnterpriseCatalogFactory()
+        course = factories.ContentMetadataFactory(content_key='edX+testX', content_type=COURSE)
+        run = factories.ContentMetadataFactory(
+            content_key='course-v1:edX+testX+1T2025',
+            content_type=COURSE_RUN,
+            parent_content_key=course.content_key,
+        )
+        catalog.catalog_query.contentmetadata_set.add(course)
+
+        for include_restricted in (False, True):
+            with self.assertNumQueries(1):
+                matching_content = list(catalog.get_matching_content([run.content_key], include_restricted))
+            assert matching_content == [course]
+            with self.assertNumQueries(1):
+                assert catalog.contains_content_keys([run.content_key], include_restricted)
+
+    def test_catalog_query_content_version(self):
+        """
+        Test that the content version of a catalog query is stable until its content is refreshed,
+        and is not bumped by a dry run.
+        """
+        catalog_query = factories.CatalogQueryFactory()
+        content_version = catalog_query.content_version
+        assert catalog_query.content_version == content_version
+
+        metadata = [{'aggregation_key': 'course:edX+testX', 'key': 'edX+testX', 'content_type': COURSE}]
+        associate_content_metadata_with_query(metadata, catalog_query, dry_run=True)
+        assert catalog_query.content_version == content_version
+
+        associate_content_metadata_with_query(metadata, catalog_query)
+        assert catalog_query.content_version != content_version
+
+        # An evicted version starts over from a new random token.
+        content_version = catalog_query.content_version
+        cache.clear()
+        assert catalog_query.content_version != content_version
+
     def test_restricted_runs_allowed_happy_path(self):
         """
         Test the happy path for computing a CatalogQuery's `restricted_runs_allowed`.
@@ -1686,19 +2080,19 @@ class TestCreateContentMetadata(TestCase):
         self.sample_metadata = [
             {
                 'key': 'course-1',
-                'uuid': 'uuid-1',
+                'uuid': str(uuid4()),
                 'content_type': 'course',
                 'title': 'Test Course 1',
             },
             {
                 'key': 'course-2',
-                'uuid': 'uuid-2',
+                'uuid': str(uuid4()),
                 'content_type': 'course',
                 'title': 'Test Course 2',
             },
             {
                 'key': 'course-3',
-                'uuid': 'uuid-3',
+                'uuid': str(uuid4()),
                 'content_type': 'course',
                 'title': 'Test Course 3',
             }
@@ -1787,6 +2181,110 @@ class TestCreateContentMetadata(TestCase):
         self.assertEqual(mock_execute_updates.call_count, 4)
         self.assertEqual(len(result), 1)  # Only the successful item from second batch
 
+    @mock.patch('enterprise_catalog.apps.catalog.models.set_custom_attribute')
+    @mock.patch('enterprise_catalog.apps.catalog.models.time.sleep')
+    @mock.patch('enterprise_catalog.apps.catalog.models._execute_updates_existing_records_avoid_deadlock')
+    @override_settings(
+        CATALOG_CONTENT_METADATA_RETRY_MAX=5,
+        CATALOG_CONTENT_METADATA_RETRY_BACKOFF_SECONDS=0.1,
+        SELECT_EXISTING_CONTENT_METADATA_BATCH_SIZE=3,
+    )
+    def test_create_content_metadata_retry_bisects_failed_batches(
+        self, mock_execute_updates, mock_sleep, mock_set_custom_attribute,
+    ):
+        """
+        Test that a failed batch is retried in halves, after a backoff, so that only the record
+        that keeps failing is retried on its own.
+        """
+        def mock_execute_side_effect(content_keys, filtered_batched_metadata, _dry_run):
+            if 'course-2' in content_keys:
+                raise DatabaseError('Deadlock found when trying to get lock')
+            return filtered_batched_metadata, []
+
+        mock_execute_updates.side_effect = mock_execute_side_effect
+
+        result = create_content_metadata_func(self.sample_metadata, self.catalog_query)
+
+        assert [entry['key'] for entry in result] == ['course-1', 'course-3']
+        assert [call_args[0][0] for call_args in mock_execute_updates.call_args_list] == [
+            ['course-1', 'course-2', 'course-3'],
+            ['course-1'],
+            ['course-2', 'course-3'],
+            ['course-2'],
+            ['course-3'],
+            ['course-2'],
+        ]
+        assert mock_sleep.call_count == 5
+        assert all(0 <= call_args[0][0] <= 0.4 for call_args in mock_sleep.call_args_list)
+        mock_set_custom_attribute.assert_has_calls([
+            mock.call('content_metadata_retry_count', 5),
+            mock.call('content_metadata_max_retry_depth', 3),
+            mock.call('content_metadata_retry_remaining_count', 1),
+        ])
+
+    @mock.patch('enterprise_catalog.apps.catalog.models.set_custom_attribute')
+    @mock.patch('enterprise_catalog.apps.catalog.models._execute_updates_existing_records_avoid_deadlock')
+    @override_settings(
+        CATALOG_CONTENT_METADATA_RETRY_MAX=1000,
+        CATALOG_CONTENT_METADATA_RETRY_MAX_DEPTH=4,
+        SELECT_EXISTING_CONTENT_METADATA_BATCH_SIZE=3,
+    )
+    def test_create_content_metadata_retry_gives_up_on_failing_record(
+        self, mock_execute_updates, mock_set_custom_attribute,
+    ):
+        """
+        Test that a record that keeps failing on its own is given up on once it fails at the maximum
+        retry depth, rather than retried until the total number of retries runs out.
+        """
+        def mock_execute_side_effect(content_keys, filtered_batched_metadata, _dry_run):
+            if 'course-2' in content_keys:
+                raise DataError('Data too long for column')
+            return filtered_batched_metadata, []
+
+        mock_execute_updates.side_effect = mock_execute_side_effect
+
+        result = create_content_metadata_func(self.sample_metadata, self.catalog_query)
+
+        assert [entry['key'] for entry in result] == ['course-1', 'course-3']
+        # course-2 fails in its batch and with course-3 at depth 1, then on its own at depths 2 to 4.
+        assert [call_args[0][0] for call_args in mock_execute_updates.call_args_list].count(['course-2']) == 3
+        mock_set_custom_attribute.assert_has_calls([
+            mock.call('content_metadata_retry_count', 6),
+            mock.call('content_metadata_max_retry_depth', 4),
+            mock.call('content_metadata_retry_remaining_count', 1),
+        ])
+
+    def test_create_content_metadata_bulk_creates_with_history(self):
+        """
+        Test that new content metadata and its history records are bulk inserted, with one
+        INSERT each regardless of how many records are created.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            result = create_content_metadata_func(self.sample_metadata, self.catalog_query)
+
+        insert_queries = [query for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(insert_queries), 2)
+
+        self.assertEqual([metadata.content_key for metadata in result], ['course-1', 'course-2', 'course-3'])
+        self.assertTrue(all(metadata.pk for metadata in result))
+        self.assertEqual(ContentMetadata.history.filter(history_type='+').count(), 3)  # pylint: disable=no-member
+
+    def test_create_new_content_metadata_conflicting_keys(self):
+        """
+        Test that a conflicting content key only causes that key to be skipped, rather than the whole batch.
+        """
+        factories.ContentMetadataFactory(content_key='course-2', content_type=COURSE)
+        defaults = [
+            {'content_key': entry['key'], 'content_type': entry['content_type'], '_json_metadata': entry}
+            for entry in self.sample_metadata + self.sample_metadata[:1]
+        ]
+
+        result = _create_new_content_metadata(defaults)
+
+        self.assertEqual([metadata.content_key for metadata in result], ['course-1', 'course-3'])
+        self.assertEqual(ContentMetadata.objects.filter(content_key__in=['course-1', 'course-3']).count(), 2)
+        self.assertEqual(ContentMetadata.history.filter(content_key='course-1').count(), 1)  # pylint: disable=no-member
+
 
 class TestGetDefaultsFromMetadata(TestCase):
     """
@@ -2384,3 +2882,220 @@ class TestContentAssociationSafeguards(TestCase):
         # Verify the counts are in the log message
         self.assertEqual(call_args[0][1], 3)  # batch_count
         self.assertEqual(call_args[0][2], 1)  # accounted_count
+
+
+class TestEnterpriseCatalogContentMembership(TestCase):
+    """
+    Tests for the denormalized EnterpriseCatalogContentMembership table.
+    """
+
+    def _membership_rows(self, enterprise_catalog):
+        return set(
+            EnterpriseCatalogContentMembership.objects.filter(
+                enterprise_catalog=enterprise_catalog,
+            ).values_list('content_key', 'parent_content_key', 'is_restricted_run')
+        )
+
+    def test_associate_content_metadata_with_query_refreshes_membership(self):
+        """
+        Associating content with a query should rebuild the membership rows of every catalog using it.
+        """
+        catalog = factories.EnterpriseCatalogFactory()
+        other_catalog = factories.EnterpriseCatalogFactory(catalog_query=catalog.catalog_query)
+        metadata = [
+            {'aggregation_key': 'course:edX+testX', 'key': 'edX+testX', 'content_type': COURSE},
+            {'aggregation_key': 'courserun:edX+testX', 'key': 'course-v1:edX+testX+1', 'content_type': COURSE_RUN},
+        ]
+
+        associate_content_metadata_with_query(metadata, catalog.catalog_query)
+
+        expected_rows = {
+            ('edX+testX', None, False),
+            ('course-v1:edX+testX+1', 'edX+testX', False),
+        }
+        assert self._membership_rows(catalog) == expected_rows
+        assert self._membership_rows(other_catalog) == expected_rows
+
+        # Dropping content from the query drops it from the membership table.
+        associate_content_metadata_with_query(metadata[:1], catalog.catalog_query)
+        assert self._membership_rows(catalog) == {('edX+testX', None, False)}
+
+    def test_associate_content_metadata_with_query_dry_run_leaves_membership(self):
+        """
+        A dry run should not write any membership rows.
+        """
+        catalog = factories.EnterpriseCatalogFactory()
+        metadata = [{'aggregation_key': 'course:edX+testX', 'key': 'edX+testX', 'content_type': COURSE}]
+
+        associate_content_metadata_with_query(metadata, catalog.catalog_query, dry_run=True)
+
+        assert not self._membership_rows(catalog)
+
+    def test_refresh_only_rewrites_changed_rows(self):
+        """
+        Unchanged membership rows should be left in place during a refresh.
+        """
+        catalog = factories.EnterpriseCatalogFactory()
+        course = factories.ContentMetadataFactory(content_key='edX+testX', content_type=COURSE)
+        catalog.catalog_query.contentmetadata_set.add(course)
+        EnterpriseCatalogContentMembership.refresh_for_catalog_query(catalog.catalog_query)
+        original_row = EnterpriseCatalogContentMembership.objects.get(enterprise_catalog=catalog)
+
+        program = factories.ContentMetadataFactory(content_type=PROGRAM)
+        catalog.catalog_query.contentmetadata_set.add(program)
+        EnterpriseCatalogContentMembership.refresh_for_catalog_query(catalog.catalog_query)
+
+        assert EnterpriseCatalogContentMembership.objects.get(
+            enterprise_catalog=catalog, content_key='edX+testX',
+        ).id == original_row.id
+        assert self._membership_rows(catalog) == {
+            ('edX+testX', None, False),
+            (program.content_key, None, False),
+        }
+
+    def test_catalog_save_refreshes_membership(self):
+        """
+        Changing a catalog's query or customer should rebuild that catalog's membership rows.
+        """
+        catalog = factories.EnterpriseCatalogFactory()
+        new_query = factories.CatalogQueryFactory()
+        course = factories.ContentMetadataFactory(content_key='edX+testX', content_type=COURSE)
+        new_query.contentmetadata_set.add(course)
+        assert not self._membership_rows(catalog)
+
+        catalog.catalog_query = new_query
+        catalog.save()
+        assert self._membership_rows(catalog) == {('edX+testX', None, False)}
+
+        catalog.enterprise_uuid = uuid4()
+        catalog.save()
+        assert EnterpriseCatalogContentMembership.objects.get(
+            enterprise_catalog=catalog,
+        ).enterprise_uuid == catalog.enterprise_uuid
+
+        catalog.catalog_query = None
+        catalog.save()
+        assert not self._membership_rows(catalog)
+
+    @mock.patch.object(EnterpriseCatalogContentMembership, 'refresh_for_catalog')
+    def test_catalog_save_skips_refresh_when_query_and_customer_unchanged(self, mock_refresh_for_catalog):
+        """
+        Saving a catalog without changing its query or customer should not rebuild its membership rows.
+        """
+        catalog = factories.EnterpriseCatalogFactory()
+        mock_refresh_for_catalog.assert_called_once_with(catalog)
+        mock_refresh_for_catalog.reset_mock()
+
+        catalog.title = 'new title'
+        catalog.save()
+        loaded_catalog = EnterpriseCatalog.objects.get(uuid=catalog.uuid)
+        loaded_catalog.title = 'newer title'
+        loaded_catalog.save()
+        mock_refresh_for_catalog.assert_not_called()
+
+        loaded_catalog.catalog_query = factories.CatalogQueryFactory()
+        loaded_catalog.save()
+        mock_refresh_for_catalog.assert_called_once_with(loaded_catalog)
+
+    def test_allowed_restricted_runs_are_members(self):
+        """
+        Restricted runs allowed by a catalog's query should be stored as restricted rows, which are only
+        matched when restricted content is requested.
+        """
+        catalog_query = factories.CatalogQueryFactory(
+            content_filter={
+                RESTRICTED_RUNS_ALLOWED_KEY: {'course:edX+testX': ['course-v1:edX+testX+restricted']},
+            },
+        )
+        catalog = factories.EnterpriseCatalogFactory(catalog_query=catalog_query)
+        course = factories.ContentMetadataFactory(content_key='edX+testX', content_type=COURSE)
+        catalog_query.contentmetadata_set.add(course)
+        restricted_course = factories.RestrictedCourseMetadataFactory(
+            content_key='edX+testX',
+            unrestricted_parent=course,
+            catalog_query=catalog_query,
+        )
+        restricted_run = factories.ContentMetadataFactory(
+            content_key='course-v1:edX+testX+restricted',
+            content_type=COURSE_RUN,
+            parent_content_key='edX+testX',
+        )
+        factories.RestrictedRunAllowedForRestrictedCourseFactory(course=restricted_course, run=restricted_run)
+
+        EnterpriseCatalogContentMembership.refresh_for_catalog_query(catalog_query)
+
+        assert self._membership_rows(catalog) == {
+            ('edX+testX', None, False),
+            ('course-v1:edX+testX+restricted', 'edX+testX', True),
+        }
+        matching = EnterpriseCatalogContentMembership.objects.matching_content_keys
+        assert not matching(catalog.enterprise_uuid, [restricted_run.content_key]).exists()
+        assert matching(catalog.enterprise_uuid, [restricted_run.content_key], include_restricted=True).exists()
+
+
+@ddt.ddt
+class TestFilterContentKeysForCatalogs(TestCase):
+    """
+    Tests for EnterpriseCatalog.filter_content_keys_for_catalogs().
+    """
+
+    @ddt.data(
+        {'num_catalogs': 1, 'num_courses': 1},
+        {'num_catalogs': 5, 'num_courses': 10},
+        {'num_catalogs': 20, 'num_courses': 50},
+    )
+    @ddt.unpack
+    def test_query_count_is_flat(self, num_catalogs, num_courses):
+        """
+        Filtering any number of content keys against any number of catalogs should take a single query.
+        """
+        enterprise_uuid = uuid4()
+        expected_keys = set()
+        for catalog_index in range(num_catalogs):
+            catalog = factories.EnterpriseCatalogFactory(enterprise_uuid=enterprise_uuid)
+            courses = [
+                factories.ContentMetadataFactory(
+                    content_key=f'edX+course{catalog_index}x{course_index}',
+                    content_type=COURSE,
+                ) for course_index in range(num_courses)
+            ]
+            catalog.catalog_query.contentmetadata_set.add(*courses)
+            expected_keys.update(course.content_key for course in courses)
+        requested_keys = expected_keys | {'edX+NotInAnyCatalog'}
+
+        with self.assertNumQueries(1):
+            filtered_keys = EnterpriseCatalog.filter_content_keys_for_catalogs(
+                EnterpriseCatalog.objects.filter(enterprise_uuid=enterprise_uuid),
+                requested_keys,
+            )
+
+        assert filtered_keys == expected_keys
+
+    def test_parent_keys_and_restricted_runs(self):
+        """
+        Course keys should match through their runs, and restricted runs should only be
+        matched when include_restricted is True.
+        """
+        catalog = factories.EnterpriseCatalogFactory()
+        other_catalog = factories.EnterpriseCatalogFactory(enterprise_uuid=catalog.enterprise_uuid)
+        run = factories.ContentMetadataFactory(
+            content_key='course-v1:edX+testX+1',
+            content_type=COURSE_RUN,
+            parent_content_key='edX+testX',
+        )
+        restricted_run = factories.ContentMetadataFactory(
+            content_key='course-v1:edX+restrictedX+1',
+            content_type=COURSE_RUN,
+            parent_content_key='edX+restrictedX',
+        )
+        factories.RestrictedRunAllowedForRestrictedCourseFactory(run=restricted_run)
+        catalog.catalog_query.contentmetadata_set.add(run)
+        other_catalog.catalog_query.contentmetadata_set.add(restricted_run)
+        catalogs = [catalog, other_catalog]
+        requested_keys = {'edX+testX', 'course-v1:edX+restrictedX+1', 'edX+NotInAnyCatalog'}
+
+        assert EnterpriseCatalog.filter_content_keys_for_catalogs(catalogs, requested_keys) == {'edX+testX'}
+        assert EnterpriseCatalog.filter_content_keys_for_catalogs(
+            catalogs, requested_keys, include_restricted=True,
+        ) == {'edX+testX', 'course-v1:edX+restrictedX+1'}
+        assert EnterpriseCatalog.filter_content_keys_for_catalogs(catalogs, set()) == set()
@@ -0,0 +1,123 @@
+""" Tests for scheduling catalog query updates. """
+from unittest import mock
+
+from django.test import TestCase
+from edx_django_utils.cache import RequestCache
+from waffle.testutils import override_switch
+
+from enterprise_catalog.apps.catalog import scheduling
+from enterprise_catalog.apps.catalog.models import DiscoverySyncWatermark
+from enterprise_catalog.apps.catalog.tests.factories import (
+    CatalogQueryFactory,
+    ContentMetadataFactory,
+)
+from enterprise_catalog.apps.catalog.utils import localized_utcnow
+from enterprise_catalog.apps.catalog.waffle import (
+    INCREMENTAL_DISCOVERY_SYNC_SWITCH,
+)
+
+
+class SchedulingTests(TestCase):
+    """
+    Tests for scheduling the catalog query updates of the update_content_metadata command.
+    """
+
+    def setUp(self):
+        super().setUp()
+        # Waffle switches memoize their state in the request cache, which would otherwise outlive each test.
+        RequestCache.clear_all_namespaces()
+
+    def _record_sync(self, catalog_query, sync_seconds=None):
+        DiscoverySyncWatermark.record_sync(
+            DiscoverySyncWatermark.SEARCH_ALL,
+            localized_utcnow(),
+            is_full_sync=True,
+            catalog_query=catalog_query,
+            sync_seconds=sync_seconds,
+        )
+
+    @override_switch(INCREMENTAL_DISCOVERY_SYNC_SWITCH.name, active=True)
+    @mock.patch('enterprise_catalog.apps.catalog.scheduling.DiscoveryApiClient')
+    def test_get_unchanged_catalog_queries(self, mock_client):
+        """
+        Only queries that course-discovery modified no content of since their last incremental sync are unchanged.
+        """
+        unchanged_query = CatalogQueryFactory(content_filter={'org': 'unchanged'})
+        modified_content_query = CatalogQueryFactory(content_filter={'org': 'modified'})
+        failed_check_query = CatalogQueryFactory(content_filter={'org': 'failed'})
+        never_synced_query = CatalogQueryFactory(content_filter={'org': 'never-synced'})
+        edited_query = CatalogQueryFactory(content_filter={'org': 'edited'})
+        restricted_query = CatalogQueryFactory(
+            content_filter={'org': 'restricted', 'restricted_runs_allowed': {'course:edX+fakeX': ['run']}},
+        )
+        for catalog_query in (
+            unchanged_query, modified_content_query, failed_check_query, edited_query, restricted_query,
+        ):
+            self._record_sync(catalog_query)
+        edited_query.content_filter = {'org': 'edited', 'level_type': 'Introductory'}
+        edited_query.save()
+
+        def get_content_count(content_filter):
+            if content_filter['org'] == 'failed':
+                raise Exception('Server Error')
+            return 0 if content_filter['org'] == 'unchanged' else 5
+        mock_client.return_value.get_content_count_by_content_filter.side_effect = get_content_count
+
+        unchanged_catalog_queries = scheduling.get_unchanged_catalog_queries([
+            unchanged_query, modified_content_query, failed_check_query, never_synced_query, edited_query,
+            restricted_query,
+        ])
+
+        assert unchanged_catalog_queries == [unchanged_query]
+        checked_orgs = [
+            call.args[0]['org'] for call in mock_client.return_value.get_content_count_by_content_filter.call_args_list
+        ]
+        assert checked_orgs == ['unchanged', 'modified', 'failed']
+        assert 'modified__gte' in mock_client.return_value.get_content_count_by_content_filter.call_args.args[0]
+
+    @mock.patch('enterprise_catalog.apps.catalog.scheduling.DiscoveryApiClient')
+    def test_get_unchanged_catalog_queries_without_incremental_sync(self, mock_client):
+        """
+        Without incremental syncs, every query is fully synced, so none are unchanged.
+        """
+        catalog_query = CatalogQueryFactory()
+        self._record_sync(catalog_query)
+
+        assert not scheduling.get_unchanged_catalog_queries([catalog_query])
+        mock_client.assert_not_called()
+
+    def test_estimate_and_order_catalog_query_updates(self):
+        """
+        Updates are ordered longest first, estimating the queries that were never timed from their amount of
+        content, and running those that can't be estimated at all first.
+        """
+        timed_query = CatalogQueryFactory()
+        slow_query = CatalogQueryFactory()
+        untimed_query = CatalogQueryFactory()
+        empty_query = CatalogQueryFactory()
+        self._record_sync(timed_query, sync_seconds=10)
+        self._record_sync(slow_query, sync_seconds=50)
+        timed_query.contentmetadata_set.add(*ContentMetadataFactory.create_batch(2))
+        slow_query.contentmetadata_set.add(*ContentMetadataFactory.create_batch(10))
+        untimed_query.contentmetadata_set.add(*ContentMetadataFactory.create_batch(6))
+
+        estimated_seconds_by_id = scheduling.estimate_catalog_query_update_seconds(
+            [timed_query, slow_query, untimed_query, empty_query],
+        )
+
+        assert estimated_seconds_by_id == {
+            timed_query.id: 10,
+            slow_query.id: 50,
+            # 60 seconds were taken for 12 timed pieces of content.
+            untimed_query.id: 30,
+            empty_query.id: None,
+        }
+        assert scheduling.order_catalog_query_updates(
+            [
+                ('timed task', [timed_query]),
+                ('untimed task', [untimed_query]),
+                ('shared task', [timed_query, slow_query]),
+                ('empty task', [empty_query]),
+            ],
+            estimated_seconds_by_id,
+        ) == ['empty task', 'shared task', 'untimed task', 'timed task']
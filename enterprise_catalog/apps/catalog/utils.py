@@ -2,6 +2,7 @@
 Utility functions for catalog app.
 """
 import hashlib
+import itertools
 import json
 from datetime import datetime, timezone
 from logging import getLogger
@@ -28,6 +29,14 @@ def get_content_filter_hash(content_filter):
     return content_filter_hash
 
 
+def get_content_keys_hash(content_keys):
+    """
+    Returns a hash of the given content keys which doesn't depend on their order or on duplicates.
+    """
+    normalized_content_keys = json.dumps(sorted(set(content_keys))).encode()
+    return hashlib.md5(normalized_content_keys).hexdigest()
+
+
 def get_content_uuid(metadata):
     """
     Returns the content uuid for a piece of metadata. Returns None for course runs.
@@ -104,6 +113,22 @@ def batch(iterable, batch_size=1):
         yield iterable[index:min(index + batch_size, iterable_len)]
 
 
+def batch_pages(pages, batch_size=1):
+    """
+    Regroup the items of a sequence of pages into equal-sized batches, lazily consuming
+    the pages as batches are requested.
+
+    Arguments:
+        pages (iterable of lists): the pages whose items should be batched, e.g. a generator of API result pages
+        batch_size (int): the size of each batch. Defaults to 1.
+    Returns:
+        generator: iterates through each batch of the items of all pages
+    """
+    items = itertools.chain.from_iterable(pages)
+    while batched_items := list(itertools.islice(items, batch_size)):
+        yield batched_items
+
+
 def localized_utcnow():
     """Helper function to return localized utcnow()."""
     return datetime.now(timezone.utc)
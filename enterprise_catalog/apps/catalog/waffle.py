@@ -10,6 +10,13 @@ WAFFLE_NAMESPACE = 'catalog'
 
 DISABLE_MODEL_ADMIN_CHANGES = 'disable_model_admin_changes'
 LEARNER_PORTAL_ENROLLMENT_ALL_SUBSIDIES_AND_CONTENT_TYPES = 'learner_portal_enrollment_all_subsidies_and_content_types'
+USE_CATALOG_CONTENT_MEMBERSHIP = 'use_catalog_content_membership'
+STREAM_DISCOVERY_CONTENT_INGEST = 'stream_discovery_content_ingest'
+SHARE_DISCOVERY_FETCHES_ACROSS_QUERIES = 'share_discovery_fetches_across_queries'
+INCREMENTAL_DISCOVERY_SYNC = 'incremental_discovery_sync'
+SHARD_FULL_COURSE_METADATA_UPDATE = 'shard_full_course_metadata_update'
+ASYNC_DISCOVERY_CLIENT = 'async_discovery_client'
+SCHEDULE_CATALOG_QUERY_UPDATES = 'schedule_catalog_query_updates'
 
 # .. toggle_name: catalog.disable_model_admin_changes
 # .. toggle_implementation: WaffleSwitch
@@ -21,3 +28,98 @@ DISABLE_MODEL_ADMIN_CHANGES_SWITCH = WaffleSwitch(
     f'{WAFFLE_NAMESPACE}.{DISABLE_MODEL_ADMIN_CHANGES}',
     module_name=__name__,
 )
+
+# .. toggle_name: catalog.use_catalog_content_membership
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, the enterprise-customer contains_content_items endpoints answer
+#   customer-level containment from the denormalized EnterpriseCatalogContentMembership table with a single
+#   query, instead of checking each of the customer's catalogs in turn. Only enable once the table has been
+#   populated by a full run of the update_content_metadata management command.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-16
+USE_CATALOG_CONTENT_MEMBERSHIP_SWITCH = WaffleSwitch(
+    f'{WAFFLE_NAMESPACE}.{USE_CATALOG_CONTENT_MEMBERSHIP}',
+    module_name=__name__,
+)
+
+# .. toggle_name: catalog.stream_discovery_content_ingest
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, update_contentmetadata_from_discovery writes the content metadata of a
+#   catalog query batch by batch as course-discovery /search/all/ pages arrive, instead of first loading every
+#   page into memory. The content association guardrails still run once all pages have been written.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-16
+STREAM_DISCOVERY_CONTENT_INGEST_SWITCH = WaffleSwitch(
+    f'{WAFFLE_NAMESPACE}.{STREAM_DISCOVERY_CONTENT_INGEST}',
+    module_name=__name__,
+)
+
+# .. toggle_name: catalog.share_discovery_fetches_across_queries
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, the update_content_metadata management command groups catalog queries
+#   whose content filters only differ by their aggregation_key lists, fetches the content of each group from
+#   course-discovery /search/all/ once, and picks out the content of each query locally. Other catalog queries
+#   are still fetched individually.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-16
+SHARE_DISCOVERY_FETCHES_ACROSS_QUERIES_SWITCH = WaffleSwitch(
+    f'{WAFFLE_NAMESPACE}.{SHARE_DISCOVERY_FETCHES_ACROSS_QUERIES}',
+    module_name=__name__,
+)
+
+# .. toggle_name: catalog.incremental_discovery_sync
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, catalog query and full course metadata updates only request the content
+#   course-discovery modified since their last successful sync, as recorded by DiscoverySyncWatermark records.
+#   A full sync, which also removes content that no longer matches, still runs every DISCOVERY_FULL_SYNC_INTERVAL.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-16
+INCREMENTAL_DISCOVERY_SYNC_SWITCH = WaffleSwitch(
+    f'{WAFFLE_NAMESPACE}.{INCREMENTAL_DISCOVERY_SYNC}',
+    module_name=__name__,
+)
+
+# .. toggle_name: catalog.shard_full_course_metadata_update
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, the update_content_metadata management command (unless run with --no-async)
+#   has update_full_content_metadata_task split the courses to update into shards of
+#   FULL_COURSE_METADATA_UPDATE_SHARD_SIZE, and update the full course metadata of each shard in parallel on
+#   celery workers, rather than all courses one batch at a time in the command's process.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-16
+SHARD_FULL_COURSE_METADATA_UPDATE_SWITCH = WaffleSwitch(
+    f'{WAFFLE_NAMESPACE}.{SHARD_FULL_COURSE_METADATA_UPDATE}',
+    module_name=__name__,
+)
+
+# .. toggle_name: catalog.async_discovery_client
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, the celery tasks fetch courses and programs by key from course-discovery
+#   with AsyncDiscoveryApiClient, which requests all key batches (and their pages) concurrently over a pool of
+#   keep-alive connections, instead of one request at a time.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-16
+ASYNC_DISCOVERY_CLIENT_SWITCH = WaffleSwitch(
+    f'{WAFFLE_NAMESPACE}.{ASYNC_DISCOVERY_CLIENT}',
+    module_name=__name__,
+)
+
+# .. toggle_name: catalog.schedule_catalog_query_updates
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, the update_content_metadata management command skips catalog queries whose
+#   content course-discovery hasn't modified since their last incremental sync, and runs the remaining catalog
+#   query updates longest first (by the duration of their last sync, or their amount of content), with at most
+#   CATALOG_QUERY_UPDATE_MAX_CONCURRENCY of them running at a time, rather than all at once in one celery group.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-16
+SCHEDULE_CATALOG_QUERY_UPDATES_SWITCH = WaffleSwitch(
+    f'{WAFFLE_NAMESPACE}.{SCHEDULE_CATALOG_QUERY_UPDATES}',
+    module_name=__name__,
+)
@@ -416,8 +416,25 @@ SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 # How long we keep API Client data in cache. (seconds)
 ONE_HOUR = 60 * 60
 ENTERPRISE_CUSTOMER_CACHE_TIMEOUT = ONE_HOUR
+# How much longer than ENTERPRISE_CUSTOMER_CACHE_TIMEOUT we may keep serving stale
+# customer data while a background refresh against the edx-enterprise API runs.
+ENTERPRISE_CUSTOMER_CACHE_STALE_TIMEOUT = ONE_HOUR
+# The maximum number of customers kept in the per-process cache that sits in front
+# of the shared cache. Set to 0 to disable the in-process tier.
+ENTERPRISE_CUSTOMER_LOCAL_CACHE_MAX_SIZE = 1024
 DISCOVERY_CATALOG_QUERY_CACHE_TIMEOUT = ONE_HOUR
 DISCOVERY_COURSE_DATA_CACHE_TIMEOUT = ONE_HOUR
+# How long the full index of course reviews fetched by update_full_content_metadata_task
+# is cached, so that runs within this window share it. Set to 0 to fetch it on every run.
+DISCOVERY_COURSE_REVIEWS_CACHE_TIMEOUT = 0
+# When set to 'record', DiscoveryApiClient also writes every course-discovery response
+# to gzipped files under DISCOVERY_RECORDING_DIR. When set to 'replay', it answers
+# requests from those files instead of course-discovery. See the replay_discovery_sync command.
+DISCOVERY_RECORDING_MODE = None
+DISCOVERY_RECORDING_DIR = None
+# How often incremental syncs of course-discovery content fall back to a full sync,
+# to catch content that was removed or stopped matching a catalog query. (seconds)
+DISCOVERY_FULL_SYNC_INTERVAL = ONE_HOUR * 24 * 7
 
 # URLs
 LMS_BASE_URL = os.environ.get('LMS_BASE_URL', '')
@@ -515,6 +532,50 @@ UPDATE_EXISTING_CONTENT_METADATA_BATCH_SIZE = 4
 # remain somewhat small to avoid deadlocks.
 SELECT_EXISTING_CONTENT_METADATA_BATCH_SIZE = 20
 
+# The base, and maximum, backoff in seconds before a batch of content metadata whose
+# update failed (e.g. due to a deadlock) is bisected and retried. Each level of
+# bisection doubles the backoff, and the actual sleep is a random fraction of it.
+CATALOG_CONTENT_METADATA_RETRY_BACKOFF_SECONDS = 0.1
+CATALOG_CONTENT_METADATA_RETRY_BACKOFF_MAX_SECONDS = 5
+# The deepest level of bisection a record whose update keeps failing on its own (e.g. due to
+# a DataError) is retried at, after which it's given up on.
+CATALOG_CONTENT_METADATA_RETRY_MAX_DEPTH = 8
+
+# The number of course keys per shard when update_full_content_metadata_task
+# updates full course metadata in parallel across workers.
+FULL_COURSE_METADATA_UPDATE_SHARD_SIZE = 1000
+
+# The maximum number of catalog query updates the update_content_metadata command runs
+# at a time, and how often it checks whether they've finished (seconds), when the
+# catalog.schedule_catalog_query_updates switch is enabled.
+CATALOG_QUERY_UPDATE_MAX_CONCURRENCY = 8
+CATALOG_QUERY_UPDATE_POLL_INTERVAL = 5
+
+# The batch size with which new ContentMetadata records, and their history
+# records, are bulk inserted.
+CONTENT_METADATA_BULK_CREATE_BATCH_SIZE = 100
+
+# The batch size with which the associations between a CatalogQuery and its
+# ContentMetadata are inserted and deleted when the query's content changes,
+# and with which the child content keys of programs and pathways are rewritten.
+CONTENT_METADATA_ASSOCIATION_BATCH_SIZE = 1000
+
+# The batch size with which EnterpriseCatalogContentMembership rows are
+# inserted when a catalog's denormalized content membership is refreshed.
+# These rows are small (a handful of keys and a flag), so we can batch
+# far more aggressively than for content metadata records.
+CATALOG_CONTENT_MEMBERSHIP_BATCH_SIZE = 1000
+
+# The number of parent content keys per query used when child records
+# (e.g. the course runs of a page of courses) are fetched in bulk during
+# serialization. Keeps the IN clause of each query to a reasonable size.
+CHILD_RECORDS_QUERY_BATCH_SIZE = 500
+
+# The number of content metadata records fetched, filtered, and serialized at a time
+# when get_content_metadata streams a traversed (single page) response. Peak memory
+# of a streaming response is bounded by this value rather than by the catalog size.
+GET_CONTENT_METADATA_STREAMING_CHUNK_SIZE = 500
+
 # Allows us to opt into experimental deadlock mitigation strategy
 TRY_AVOID_DEADLOCK = False
 
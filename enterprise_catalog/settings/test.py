@@ -38,6 +38,12 @@ PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
 # Use a small limit to keep test_create_too_many_sets fast.
 HIGHLIGHTSETS_PER_ENTERPRISE_LIMIT = 3
 
+# Don't sleep between retries of failed content metadata batches.
+CATALOG_CONTENT_METADATA_RETRY_BACKOFF_SECONDS = 0
+
+# Don't wait between checks for finished catalog query updates.
+CATALOG_QUERY_UPDATE_POLL_INTERVAL = 0
+
 # Disable API throttling by default in tests; individual tests can re-enable
 # specific rates via ``override_settings``. DRF treats a ``None`` rate as no limit.
 REST_FRAMEWORK = {
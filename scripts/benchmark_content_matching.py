@@ -0,0 +1,123 @@
+"""
+Query-count and latency benchmark for ``EnterpriseCatalog.get_matching_content()``.
+
+Measures the content matching behind the following endpoints, for both course and
+course run keys, with and without restricted runs:
+
+- v1 ``contains_content_items`` (``contains_content_keys()``)
+- v2 ``contains_content_items`` (``contains_content_keys(include_restricted=True)``)
+- v1/v2 ``content-metadata/<content_key>`` (``get_matching_content([content_key]).first()``)
+- ``get_content_metadata?content_keys=`` (``list(get_matching_content(content_keys))``)
+
+Usage (from the project root, inside the app container)::
+
+    cat scripts/benchmark_content_matching.py | ./manage.py shell
+
+The script creates a throwaway catalog with ``NUM_COURSES`` courses of ``RUNS_PER_COURSE``
+runs each inside a transaction, and rolls it back once the benchmark is done.
+"""
+import statistics
+import time
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from enterprise_catalog.apps.catalog.constants import (
+    COURSE,
+    COURSE_RUN,
+    RESTRICTED_RUNS_ALLOWED_KEY,
+)
+from enterprise_catalog.apps.catalog.tests import factories
+
+
+NUM_COURSES = 500
+RUNS_PER_COURSE = 3
+NUM_REQUESTED_KEYS = 50
+ITERATIONS = 50
+
+
+class Rollback(Exception):
+    pass
+
+
+def measure(label, func):
+    with CaptureQueriesContext(connection) as queries:
+        func()
+    timings = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(
+        f'{label:<55} queries={len(queries):<3} '
+        f'p50={statistics.median(timings):7.2f}ms p95={timings[int(len(timings) * 0.95) - 1]:7.2f}ms'
+    )
+
+
+def run_benchmark():
+    catalog = factories.EnterpriseCatalogFactory()
+    courses, runs = [], []
+    for course_index in range(NUM_COURSES):
+        course_key = f'edX+bench{course_index}x'
+        courses.append(factories.ContentMetadataFactory(content_key=course_key, content_type=COURSE))
+        runs.extend(
+            factories.ContentMetadataFactory(
+                content_key=f'course-v1:{course_key}+{run_index}T2025',
+                parent_content_key=course_key,
+                content_type=COURSE_RUN,
+            ) for run_index in range(RUNS_PER_COURSE)
+        )
+    catalog.catalog_query.contentmetadata_set.add(*courses)
+
+    # Restrict the first run of the first few courses, and allow them for the catalog's query.
+    restricted_runs = runs[:NUM_REQUESTED_KEYS * RUNS_PER_COURSE:RUNS_PER_COURSE]
+    catalog.catalog_query.content_filter[RESTRICTED_RUNS_ALLOWED_KEY] = {
+        f'course:{run.parent_content_key}': [run.content_key] for run in restricted_runs
+    }
+    catalog.catalog_query.save()
+    for run in restricted_runs:
+        restricted_course = factories.RestrictedCourseMetadataFactory(
+            content_key=run.parent_content_key,
+            content_type=COURSE,
+            catalog_query=catalog.catalog_query,
+        )
+        factories.RestrictedRunAllowedForRestrictedCourseFactory(course=restricted_course, run=run)
+
+    course_keys = [course.content_key for course in courses[:NUM_REQUESTED_KEYS]]
+    run_keys = [run.content_key for run in runs[:NUM_REQUESTED_KEYS]]
+    restricted_run_keys = [run.content_key for run in restricted_runs]
+
+    for keys_label, content_keys in (
+        ('course keys', course_keys),
+        ('course run keys', run_keys),
+        ('restricted run keys', restricted_run_keys),
+    ):
+        measure(
+            f'v1 contains_content_items ({keys_label})',
+            lambda keys=content_keys: catalog.contains_content_keys(keys),
+        )
+        measure(
+            f'v2 contains_content_items ({keys_label})',
+            lambda keys=content_keys: catalog.contains_content_keys(keys, include_restricted=True),
+        )
+        measure(
+            f'v1 get_metadata_by_content_key ({keys_label})',
+            lambda keys=content_keys: catalog.get_matching_content(keys[:1]).first(),
+        )
+        measure(
+            f'v2 get_metadata_by_content_key ({keys_label})',
+            lambda keys=content_keys: catalog.get_matching_content(keys[:1], include_restricted=True).first(),
+        )
+        measure(
+            f'get_content_metadata?content_keys= ({keys_label})',
+            lambda keys=content_keys: list(catalog.get_matching_content(keys)),
+        )
+
+
+try:
+    with transaction.atomic():
+        run_benchmark()
+        raise Rollback()
+except Rollback:
+    pass
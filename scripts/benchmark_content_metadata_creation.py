@@ -0,0 +1,79 @@
+"""
+Query-count and latency benchmark for creating new ``ContentMetadata`` records, as done by
+``create_content_metadata()`` during initial loads and new catalog onboarding.
+
+Compares the bulk insert path of ``_create_new_content_metadata()`` with saving the same
+records one at a time, on a synthetic load of ``NUM_RECORDS`` new courses.
+
+Usage (from the project root, inside the app container)::
+
+    cat scripts/benchmark_content_metadata_creation.py | ./manage.py shell
+
+Each path runs inside its own transaction, which is rolled back once it has been measured.
+"""
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from enterprise_catalog.apps.catalog.constants import COURSE
+from enterprise_catalog.apps.catalog.models import (
+    ContentMetadata,
+    _create_content_metadata_one_by_one,
+    _create_new_content_metadata,
+)
+from enterprise_catalog.apps.catalog.utils import batch
+
+
+NUM_RECORDS = 50000
+
+
+class Rollback(Exception):
+    pass
+
+
+def synthetic_defaults():
+    return [
+        {
+            'content_key': f'edX+bench{index}x',
+            'content_type': COURSE,
+            'parent_content_key': None,
+            '_json_metadata': {
+                'key': f'edX+bench{index}x',
+                'aggregation_key': f'course:edX+bench{index}x',
+                'content_type': COURSE,
+                'title': f'Benchmark course {index}',
+                'course_runs': [],
+            },
+        }
+        for index in range(NUM_RECORDS)
+    ]
+
+
+def measure(label, create_batch):
+    defaults = synthetic_defaults()
+    try:
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            # Records are created in the same batches as create_content_metadata() uses.
+            for defaults_batch in batch(defaults, batch_size=settings.SELECT_EXISTING_CONTENT_METADATA_BATCH_SIZE):
+                create_batch(defaults_batch)
+            elapsed = time.perf_counter() - start
+            created_count = ContentMetadata.objects.filter(content_key__startswith='edX+bench').count()
+            raise Rollback()
+    except Rollback:
+        pass
+    print(
+        f'{label:<12} records={created_count:<6} queries={len(queries):<7} '
+        f'total={elapsed:8.2f}s per_record={elapsed / NUM_RECORDS * 1000:6.3f}ms'
+    )
+
+
+measure(
+    'one-by-one',
+    lambda defaults_batch: _create_content_metadata_one_by_one(
+        [ContentMetadata(**defaults) for defaults in defaults_batch]
+    ),
+)
+measure('bulk', _create_new_content_metadata)